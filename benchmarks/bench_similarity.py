@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Benchmark the password history similarity check against a linear scan.
+
+Builds a history of random passwords and times how long it takes to decide
+whether fresh candidates are within edit distance k of any entry, using
+``PasswordHistory`` and using one Levenshtein computation per entry.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from securepass.generator import PasswordGenerator
+from securepass.similarity import PasswordHistory, levenshtein
+
+
+def linear_scan(entries, candidate, max_distance):
+    """The baseline: a bounded distance computation against every entry."""
+    return any(levenshtein(candidate, entry, max_distance) <= max_distance for entry in entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history similarity checks")
+    parser.add_argument("--history", default="100,1000,10000", help="Comma-separated history sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Candidates checked per size")
+    parser.add_argument("--length", type=int, default=16, help="Password length")
+    parser.add_argument("--charset", default="alnum", help="Charset name")
+    parser.add_argument("--distance", type=int, default=3, help="Maximum edit distance k")
+    parser.add_argument("--linear-queries", type=int, default=5,
+                        help="Candidates checked by linear scan (it is slow)")
+    args = parser.parse_args()
+
+    candidates = PasswordGenerator.generate_passwords(args.queries, args.length, args.charset).tolist()
+    print(f"length {args.length}, charset {args.charset}, k = {args.distance}")
+    print(f"{'history':>8} {'build s':>9} {'index us/check':>15} {'linear us/check':>16} {'speedup':>8}")
+    for size in (int(s) for s in args.history.split(",")):
+        entries = PasswordGenerator.generate_passwords(size, args.length, args.charset).tolist()
+
+        start = time.perf_counter()
+        history = PasswordHistory(entries, args.distance)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for candidate in candidates:
+            history.too_similar(candidate)
+        indexed = (time.perf_counter() - start) / len(candidates)
+
+        sample = candidates[:args.linear_queries]
+        start = time.perf_counter()
+        for candidate in sample:
+            linear_scan(entries, candidate, args.distance)
+        linear = (time.perf_counter() - start) / len(sample)
+
+        print(f"{size:>8} {build:>9.3f} {indexed * 1e6:>15.1f} {linear * 1e6:>16.1f} "
+              f"{linear / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""
+Password File Audit
+
+Checks a newline-separated password file (a credential dump, an export of
+existing secrets) against a policy of length, character classes, repeated
+characters and blocklisted words, and grades every password with a strength
+score, producing one aggregated report.
+
+The file is memory-mapped and cut into byte ranges at newline boundaries,
+which a process pool audits in parallel. Within a range, work is done a
+block of lines at a time with bulk operations rather than a Python loop per
+line: ``bytes.translate`` and a segmented OR-scan over the block as one big
+integer reduce it to one character-class byte per line, ``map(len, ...)``
+gives the lengths, and a ``Counter`` tallies the (length, classes) pairs.
+Policy and score are then evaluated once per distinct pair for the whole
+range. Repeated runs are found by XOR-ing the block with itself shifted by
+one byte and searching the result for zero bytes. Only lines that contain a
+repeated run or a blocklisted word are visited individually.
+
+Lengths are counted in bytes, and every byte outside the letters and digits
+of :attr:`PasswordGenerator.charsets` (including non-ASCII) is a symbol.
+"""
+
+import math
+import mmap
+import os
+from collections import Counter
+from itertools import repeat
+from operator import lshift, or_
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from securepass.blocklist import Blocklist
+from securepass.generator import PasswordGenerator
+
+# Bytes of lines audited at a time inside a range; small enough that the
+# whole-block integer operations of the class scan stay in cache
+BLOCK_SIZE = 1 << 16
+
+# Byte ranges are at least this large, so small files are not split needlessly
+MIN_RANGE_SIZE = 1 << 24
+
+# Character classes and their mask bits, built from the generator's charsets
+_LETTERS = PasswordGenerator.charsets["letters"]
+_DIGITS = PasswordGenerator.charsets["digits"]
+_SYMBOLS = "".join(sorted(set(PasswordGenerator.charsets["full"]) - set(PasswordGenerator.charsets["alnum"])))
+CLASSES = ("lower", "upper", "digit", "symbol")
+_CLASS_CHARS = {
+    "lower": "".join(c for c in _LETTERS if c.islower()),
+    "upper": "".join(c for c in _LETTERS if c.isupper()),
+    "digit": _DIGITS,
+}
+_CLASS_BITS = {name: 1 << index for index, name in enumerate(CLASSES)}
+
+# Strength score bounds in estimated bits: 0 very weak, 1 weak, 2 fair, 3 strong, 4 very strong
+SCORE_THRESHOLDS = (28, 36, 60, 128)
+SCORE_NAMES = ("very weak", "weak", "fair", "strong", "very strong")
+
+
+def _class_table() -> bytes:
+    """Translate table from a byte to its class bit, and a newline to ``_LINE_END``."""
+    bits = {}
+    for name in ("lower", "upper", "digit"):
+        for byte in _CLASS_CHARS[name].encode("ascii"):
+            bits[byte] = _CLASS_BITS[name]
+    return bytes(_LINE_END if byte == 10 else bits.get(byte, _CLASS_BITS["symbol"]) for byte in range(256))
+
+
+# Marks a line end in the class scan; above every class bit
+_LINE_END = 0x10
+_CLASS_TABLE = _class_table()
+# 0xFF for bytes a line continues through, 0 for newlines, and the reverse
+_CONTINUES = bytes(0 if byte == 10 else 0xFF for byte in range(256))
+_NEWLINES = bytes(0xFF if byte == 10 else 0 for byte in range(256))
+# Drops everything but the line ends and strips their marker
+_LINE_MASKS = bytes(byte & (_LINE_END - 1) for byte in range(256)), bytes(range(_LINE_END))
+
+
+def _pool_bits(mask: int) -> float:
+    """log2 of the number of characters in the classes of ``mask``."""
+    size = sum(len(_CLASS_CHARS.get(name, _SYMBOLS)) for name in CLASSES if mask & _CLASS_BITS[name])
+    return math.log2(size) if size else 0.0
+
+
+_POOL_BITS = [_pool_bits(mask) for mask in range(16)]
+
+
+def strength_score(length: int, mask: int) -> int:
+    """Score 0-4 from the brute-force entropy estimate ``length * log2(pool size)``."""
+    bits = length * _POOL_BITS[mask]
+    return sum(bits >= threshold for threshold in SCORE_THRESHOLDS)
+
+
+class AuditPolicy:
+    """Requirements each audited password is checked against.
+
+    Attributes:
+        min_length: Shortest acceptable length
+        max_length: Longest acceptable length, or None
+        min_classes: Fewest character classes (of lower, upper, digit, symbol)
+        required: Classes every password must contain
+        max_repeat: Longest acceptable run of one repeated character, or None
+        blocklist: Path of a compiled blocklist (see :class:`Blocklist`), or None
+    """
+
+    __slots__ = ("min_length", "max_length", "min_classes", "required", "max_repeat", "blocklist")
+
+    def __init__(
+        self,
+        min_length: int = 12,
+        max_length: Optional[int] = None,
+        min_classes: int = 3,
+        required: Sequence[str] = (),
+        max_repeat: Optional[int] = None,
+        blocklist: Optional[str] = None,
+    ):
+        """Validate the requirements.
+
+        Raises:
+            ValueError: If a bound or class name is invalid
+        """
+        unknown = set(required) - set(CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown character class: {', '.join(sorted(unknown))}")
+        if min_length < 1 or (max_length is not None and max_length < min_length):
+            raise ValueError("Invalid length bounds")
+        if not 0 <= min_classes <= len(CLASSES) or (max_repeat is not None and max_repeat < 1):
+            raise ValueError("Invalid class count or repeat bound")
+        self.min_length = min_length
+        self.max_length = max_length
+        self.min_classes = min_classes
+        self.required = tuple(required)
+        self.max_repeat = max_repeat
+        self.blocklist = blocklist
+
+    def __repr__(self) -> str:
+        return (
+            f"AuditPolicy(min_length={self.min_length}, max_length={self.max_length}, "
+            f"min_classes={self.min_classes}, required={self.required!r}, "
+            f"max_repeat={self.max_repeat}, blocklist={self.blocklist!r})"
+        )
+
+    def failures(self, length: int, mask: int) -> List[str]:
+        """Reasons a password of ``length`` bytes with the classes of ``mask`` fails."""
+        reasons = []
+        if length < self.min_length:
+            reasons.append("too_short")
+        if self.max_length is not None and length > self.max_length:
+            reasons.append("too_long")
+        if bin(mask).count("1") < self.min_classes:
+            reasons.append("too_few_classes")
+        for name in self.required:
+            if not mask & _CLASS_BITS[name]:
+                reasons.append(f"missing_{name}")
+        return reasons
+
+
+class AuditReport:
+    """Aggregated audit results; reports of byte ranges are merged into one.
+
+    Attributes:
+        passwords: Non-empty lines audited
+        empty: Empty lines skipped
+        passed: Passwords meeting every requirement of the policy
+        failures: Passwords failing each requirement (one password may fail several)
+        scores: Passwords per strength score, 0 (very weak) to 4 (very strong)
+        classes: Passwords per number of character classes, 0 to 4
+        lengths: Passwords per length in bytes
+        bytes: Bytes read
+    """
+
+    def __init__(self) -> None:
+        self.passwords = 0
+        self.empty = 0
+        self.passed = 0
+        self.failures: Counter = Counter()
+        self.scores = [0] * len(SCORE_NAMES)
+        self.classes = [0] * (len(CLASSES) + 1)
+        self.lengths: Counter = Counter()
+        self.bytes = 0
+
+    def __repr__(self) -> str:
+        return f"AuditReport(passwords={self.passwords}, passed={self.passed}, failures={dict(self.failures)})"
+
+    def merge(self, other: "AuditReport") -> "AuditReport":
+        """Add ``other``'s counts to this report and return it."""
+        self.passwords += other.passwords
+        self.empty += other.empty
+        self.passed += other.passed
+        self.failures.update(other.failures)
+        self.scores = [a + b for a, b in zip(self.scores, other.scores)]
+        self.classes = [a + b for a, b in zip(self.classes, other.classes)]
+        self.lengths.update(other.lengths)
+        self.bytes += other.bytes
+        return self
+
+    @property
+    def mean_length(self) -> float:
+        return sum(length * n for length, n in self.lengths.items()) / self.passwords if self.passwords else 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "passwords": self.passwords,
+            "empty": self.empty,
+            "passed": self.passed,
+            "failures": dict(sorted(self.failures.items())),
+            "scores": dict(zip(SCORE_NAMES, self.scores)),
+            "classes": self.classes,
+            "min_length": min(self.lengths, default=0),
+            "max_length": max(self.lengths, default=0),
+            "mean_length": round(self.mean_length, 2),
+            "bytes": self.bytes,
+        }
+
+
+def _class_masks(block: bytes) -> bytes:
+    """One byte per line of ``block`` (ending in a newline): the OR of its class bits.
+
+    A segmented OR-scan over the block as one big integer: after the step
+    with shift d, every byte holds the OR of up to 2d bytes before it in its
+    own line, so each newline ends up with the classes of its whole line in
+    log2(longest line) steps of whole-buffer integer operations.
+    """
+    size = len(block)
+    values = int.from_bytes(block.translate(_CLASS_TABLE), "little")
+    # Byte i may take bytes from before it while they are in the same line
+    same_line = int.from_bytes(block.translate(_CONTINUES), "little") << 8 | 0xFF
+    shift = 8
+    while same_line:
+        values |= (values << shift) & same_line
+        same_line &= same_line << shift
+        shift *= 2
+    return values.to_bytes(size + 1, "little")[:size].translate(*_LINE_MASKS)
+
+
+def _repeated_lines(block: bytes, max_repeat: int) -> Iterator[int]:
+    """Numbers of the lines of ``block`` with more than ``max_repeat`` equal characters in a row."""
+    value = int.from_bytes(block, "little")
+    # Zero bytes where a character equals the one before it; never at a newline or the first byte
+    changes = (value ^ (value << 8)) | int.from_bytes(block.translate(_NEWLINES), "little") | 0xFF
+    changes_bytes = changes.to_bytes(len(block) + 1, "little")
+    run = bytes(max_repeat)
+    line = counted = 0
+    position = changes_bytes.find(run)
+    while position >= 0:
+        line += block.count(b"\n", counted, position)
+        yield line
+        counted = block.find(b"\n", position)
+        if counted < 0:
+            return
+        position = changes_bytes.find(run, counted)
+
+
+def _flagged_lines(block: bytes, policy: AuditPolicy, blocklist: Optional[Blocklist]) -> Dict[int, Tuple[str, ...]]:
+    """Line numbers of ``block`` with a repeated run or a blocklisted word, with the reasons."""
+    flagged: Dict[int, Tuple[str, ...]] = {}
+    if policy.max_repeat is not None:
+        for line in _repeated_lines(block, policy.max_repeat):
+            flagged[line] = ("repeated",)
+    if blocklist is not None:
+        for line in blocklist.matching_lines(block):
+            flagged[line] = flagged.get(line, ()) + ("blocklisted",)
+    return flagged
+
+
+class _Tally:
+    """Raw counts of ``length << 4 | classes`` keys, evaluated against the policy once at the end."""
+
+    def __init__(self) -> None:
+        self.keys: Counter = Counter()
+        self.flagged: Counter = Counter()
+        self.bytes = 0
+
+    def add(self, block: bytes, policy: AuditPolicy, blocklist: Optional[Blocklist]) -> None:
+        self.bytes += len(block)
+        block = block.replace(b"\r\n", b"\n")
+        if not block.endswith(b"\n"):
+            block += b"\n"
+        lines = block.split(b"\n")
+        lines.pop()
+        masks = _class_masks(block)
+        self.keys.update(map(or_, map(lshift, map(len, lines), repeat(4)), masks))
+        for line, reasons in _flagged_lines(block, policy, blocklist).items():
+            key = len(lines[line]) << 4 | masks[line]
+            self.keys[key] -= 1
+            self.flagged[key, reasons] += 1
+
+    def report(self, policy: AuditPolicy) -> "AuditReport":
+        report = AuditReport()
+        report.bytes = self.bytes
+        counts = [((key, ()), count) for key, count in self.keys.items()]
+        for (key, reasons), count in counts + list(self.flagged.items()):
+            length, mask = key >> 4, key & 15
+            if not count:
+                continue
+            if length == 0:
+                report.empty += count
+                continue
+            reasons = policy.failures(length, mask) + list(reasons)
+            report.passwords += count
+            report.failures.update(dict.fromkeys(reasons, count))
+            if not reasons:
+                report.passed += count
+            report.scores[strength_score(length, mask)] += count
+            report.classes[bin(mask).count("1")] += count
+            report.lengths[length] += count
+        return report
+
+
+def audit_block(block: bytes, policy: AuditPolicy, blocklist: Optional[Blocklist] = None) -> "AuditReport":
+    """Audit the newline-separated passwords of ``block``.
+
+    Args:
+        block: Password lines; a final line without a newline is audited too
+        policy: Requirements to check
+        blocklist: Opened blocklist, when the policy has one
+
+    Returns:
+        The report
+    """
+    tally = _Tally()
+    tally.add(block, policy, blocklist)
+    return tally.report(policy)
+
+
+def split_ranges(data: bytes, parts: int) -> List[Tuple[int, int]]:
+    """Cut ``data`` (e.g. an mmap) into about ``parts`` ranges ending at newlines."""
+    size = len(data)
+    ranges = []
+    start = 0
+    for part in range(1, parts):
+        cut = data.find(b"\n", max(start, size * part // parts))
+        if cut < 0:
+            break
+        if cut + 1 > start:
+            ranges.append((start, cut + 1))
+            start = cut + 1
+    if start < size or not ranges:
+        ranges.append((start, size))
+    return ranges
+
+
+def _blocks(data: bytes, start: int, end: int) -> Iterator[bytes]:
+    """Slices of ``data[start:end]`` of about ``BLOCK_SIZE`` bytes, ending at newlines."""
+    while start < end:
+        stop = min(start + BLOCK_SIZE, end)
+        if stop < end:
+            cut = data.rfind(b"\n", start, stop)
+            if cut < 0:
+                # One line longer than a block
+                cut = data.find(b"\n", stop, end)
+            stop = cut + 1 if cut >= 0 else end
+        yield data[start:stop]
+        start = stop
+
+
+def _audit_range(path: str, start: int, end: int, policy: AuditPolicy) -> AuditReport:
+    """Audit bytes ``start`` to ``end`` of ``path`` (run in a worker process)."""
+    tally = _Tally()
+    blocklist = Blocklist(policy.blocklist) if policy.blocklist else None
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for block in _blocks(data, start, end):
+                tally.add(block, policy, blocklist)
+    finally:
+        if blocklist is not None:
+            blocklist.close()
+    return tally.report(policy)
+
+
+def audit_file(path: str, policy: Optional[AuditPolicy] = None, workers: Optional[int] = None) -> AuditReport:
+    """Audit every line of the password file at ``path``.
+
+    Args:
+        path: Newline-separated password file
+        policy: Requirements to check (default: :class:`AuditPolicy` defaults)
+        workers: Processes to use; defaults to the CPU count
+
+    Returns:
+        The aggregated report
+
+    Raises:
+        ValueError: If the workers count is invalid or the blocklist cannot be opened
+    """
+    policy = policy or AuditPolicy()
+    processes = workers if workers is not None else (os.cpu_count() or 1)
+    if processes < 1:
+        raise ValueError(f"Invalid worker count: {processes}")
+    if os.path.getsize(path) == 0:
+        return AuditReport()
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        parts = max(1, min(4 * processes, len(data) // MIN_RANGE_SIZE))
+        ranges = split_ranges(data, parts) if processes > 1 else [(0, len(data))]
+
+    report = AuditReport()
+    if len(ranges) == 1:
+        return report.merge(_audit_range(path, *ranges[0], policy))
+    # Imported here: multiprocessing is costly to load and only needed for a pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(ranges))) as pool:
+        futures = [pool.submit(_audit_range, path, start, end, policy) for start, end in ranges]
+        for future in futures:
+            report.merge(future.result())
+    return report
@@ -0,0 +1,176 @@
+"""
+Password Batch Container
+
+Stores many equal-length passwords in one contiguous ``bytearray`` and only
+decodes a password to ``str`` when it is accessed.
+"""
+
+import os
+from typing import Iterator, List, Union
+
+# Upper bound on buffers passed to one writev() call
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+class PasswordBatch:
+    """Fixed-stride container of ASCII passwords.
+
+    Password ``i`` occupies ``buffer[i * stride:(i + 1) * stride]``. The
+    container supports ``len()``, indexing, slicing and iteration like a
+    ``list[str]`` while holding about one byte per character.
+
+    Attributes:
+        collisions: Duplicates replaced while generating a unique batch
+    """
+
+    __slots__ = ("_buffer", "_stride", "_count", "collisions")
+
+    def __init__(self, buffer: Union[bytes, bytearray], stride: int):
+        """Wrap ``buffer`` as a batch of ``len(buffer) // stride`` passwords.
+
+        Raises:
+            ValueError: If stride is not positive or does not divide the buffer
+        """
+        if stride <= 0:
+            raise ValueError(f"Invalid stride: {stride}")
+        if len(buffer) % stride:
+            raise ValueError("Buffer length is not a multiple of the stride")
+        self._buffer = buffer if isinstance(buffer, bytearray) else bytearray(buffer)
+        self._stride = stride
+        self._count = len(buffer) // stride
+        self.collisions = 0
+
+    @property
+    def stride(self) -> int:
+        """Length in bytes of every password in the batch."""
+        return self._stride
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        # Never include the passwords themselves
+        return f"PasswordBatch(count={self._count}, stride={self._stride})"
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, "PasswordBatch"]:
+        stride = self._stride
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step == 1:
+                return PasswordBatch(self._buffer[start * stride:max(start, stop) * stride], stride)
+            view = memoryview(self._buffer)
+            selected = bytearray()
+            for i in range(start, stop, step):
+                selected += view[i * stride:(i + 1) * stride]
+            return PasswordBatch(selected, stride)
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("PasswordBatch index out of range")
+        offset = index * stride
+        return self._buffer[offset:offset + stride].decode("ascii")
+
+    def __setitem__(self, index: int, password: str) -> None:
+        """Replace password ``index`` with another of the same length.
+
+        Raises:
+            ValueError: If the replacement has a different length or is not ASCII
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("PasswordBatch index out of range")
+        data = password.encode("ascii")
+        if len(data) != self._stride:
+            raise ValueError(f"Password length {len(data)} does not match stride {self._stride}")
+        offset = index * self._stride
+        self._buffer[offset:offset + self._stride] = data
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = self._buffer
+        stride = self._stride
+        for offset in range(0, self._count * stride, stride):
+            yield buffer[offset:offset + stride].decode("ascii")
+
+    def view(self) -> memoryview:
+        """Return a read-only view of the packed passwords."""
+        return memoryview(self._buffer).toreadonly()
+
+    def tolist(self) -> List[str]:
+        """Decode every password into a list of strings."""
+        return list(self)
+
+    def to_bytes(self, sep: bytes = b"\n") -> bytes:
+        """Return every password followed by ``sep`` as one bytes object.
+
+        Built with one strided slice assignment per character position
+        rather than one operation per password.
+        """
+        stride = self._stride
+        count = self._count
+        step = stride + len(sep)
+        out = bytearray(step * count)
+        buffer = self._buffer
+        for j in range(stride):
+            out[j::step] = buffer[j:count * stride:stride]
+        for j in range(len(sep)):
+            out[stride + j::step] = sep[j:j + 1] * count
+        return bytes(out)
+
+    def write_to(self, fd, sep: bytes = b"\n") -> int:
+        """Write every password followed by ``sep`` to a file descriptor.
+
+        Passwords are handed to ``os.writev`` as ``memoryview`` slices of the
+        batch buffer, so nothing is copied or decoded on the way out.
+
+        Args:
+            fd: File descriptor, or an object with a ``fileno()`` method
+            sep: Separator written after each password
+
+        Returns:
+            Number of bytes written
+        """
+        if hasattr(fd, "fileno"):
+            if hasattr(fd, "flush"):
+                fd.flush()
+            fd = fd.fileno()
+
+        view = memoryview(self._buffer)
+        stride = self._stride
+        sep_view = memoryview(sep)
+        # Each password contributes one or two buffers (password, separator)
+        per_call = _IOV_MAX // 2 if sep else _IOV_MAX
+        written = 0
+        for first in range(0, self._count, per_call):
+            buffers = []
+            for i in range(first, min(first + per_call, self._count)):
+                buffers.append(view[i * stride:(i + 1) * stride])
+                if sep:
+                    buffers.append(sep_view)
+            written += _write_all(fd, buffers)
+        return written
+
+
+def _write_all(fd: int, buffers: List[memoryview]) -> int:
+    """Write ``buffers`` to ``fd`` in order, resuming after partial writes."""
+    total = sum(len(b) for b in buffers)
+    remaining = total
+    while remaining:
+        if hasattr(os, "writev"):
+            count = os.writev(fd, buffers)
+        else:
+            count = os.write(fd, buffers[0])
+        remaining -= count
+        # Drop fully written buffers and trim a partially written one
+        while buffers and count >= len(buffers[0]):
+            count -= len(buffers[0])
+            buffers.pop(0)
+        if count:
+            buffers[0] = buffers[0][count:]
+    return total
@@ -0,0 +1,296 @@
+"""
+Blocklist Substring Rejection
+
+Rejects passwords that contain any word of a blocklist (a dictionary, brand
+names, profanity) anywhere inside them, case-insensitively.
+
+Matching runs an Aho–Corasick automaton over the password once, so a check
+costs O(password length) whatever the size of the list. The automaton is
+compiled once and saved next to the wordlist in an array-backed format:
+states are numbered breadth-first, the outgoing edges of every state are
+stored contiguously (a compressed sparse row layout of edge labels and
+target states), and failure links and match lengths are flat arrays. Later
+runs memory-map the saved automaton instead of rebuilding it, so they start
+in constant time and share the pages between processes.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+# Words shorter than this are ignored: nearly every password contains some
+# two- or three-letter word
+DEFAULT_MIN_WORD_LENGTH = 4
+
+# Longest word kept; a match length must fit in one byte
+MAX_WORD_LENGTH = 255
+
+CACHE_SUFFIX = ".ac"
+
+# magic, version, minimum word length, source size, source mtime, states, edges
+_HEADER = struct.Struct("=4sHHQQII")
+_MAGIC = b"SPAC"
+_VERSION = 1
+
+
+def _words(source: Iterable[str], min_length: int) -> List[bytes]:
+    """Normalize blocklist words: lowercase ASCII, deduplicated and sorted."""
+    words = set()
+    for line in source:
+        word = line.strip().lower()
+        if len(word) < min_length or len(word) > MAX_WORD_LENGTH or not word.isascii():
+            continue
+        words.add(word.encode("ascii"))
+    return sorted(words)
+
+
+class Blocklist:
+    """Aho–Corasick automaton over a wordlist, memory-mapped from its cache file.
+
+    Example::
+
+        with Blocklist.open("words.txt") as blocklist:
+            password = PasswordGenerator.generate_password(reject=blocklist.contains)
+    """
+
+    def __init__(self, path: str):
+        """Map a compiled automaton written by :meth:`compile`.
+
+        Raises:
+            ValueError: If the file is not a compiled blocklist
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = self._map[:_HEADER.size]
+            if len(header) < _HEADER.size:
+                raise ValueError(f"Not a compiled blocklist: {path}")
+            magic, version, min_length, size, mtime, states, edges = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"Not a compiled blocklist: {path}")
+        except ValueError:
+            self._map.close()
+            raise
+        self.min_word_length = min_length
+        self.source_stamp = (size, mtime)
+        self.states = states
+
+        view = memoryview(self._map)
+        offset = _HEADER.size
+        self._starts = view[offset:offset + 4 * (states + 1)].cast("I")
+        offset += 4 * (states + 1)
+        self._targets = view[offset:offset + 4 * edges].cast("I")
+        offset += 4 * edges
+        self._fail = view[offset:offset + 4 * states].cast("I")
+        offset += 4 * states
+        self._match = view[offset:offset + states]
+        offset += states
+        # One byte per edge; a bytes copy lets lookups use bytes.find(int)
+        self._labels = self._map[offset:offset + edges]
+        self._views = [view, self._starts, self._targets, self._fail, self._match]
+        # Dense transitions out of the root, where every search restarts
+        self._root = [0] * 256
+        for index in range(self._starts[0], self._starts[1]):
+            self._root[self._labels[index]] = self._targets[index]
+
+    @classmethod
+    def compile(
+        cls,
+        words: Iterable[str],
+        path: str,
+        min_word_length: int = DEFAULT_MIN_WORD_LENGTH,
+        source_stamp: Tuple[int, int] = (0, 0),
+    ) -> "Blocklist":
+        """Build the automaton for ``words``, write it to ``path`` and open it.
+
+        Args:
+            words: Blocklist words (surrounding whitespace is ignored)
+            path: Where the compiled automaton is written (atomically)
+            min_word_length: Shorter words are skipped
+            source_stamp: (size, mtime_ns) of the wordlist, recorded so a
+                stale cache can be detected
+
+        Returns:
+            The compiled blocklist
+        """
+        words = _words(words, min_word_length)
+        labels = bytearray()
+        targets = array("I")
+        starts = array("I")
+        fail = array("I", [0])
+        match = bytearray([0])
+
+        # Breadth-first over the trie: a state is a run of sorted words sharing
+        # a prefix, so its children are consecutive groups of that run
+        queue = deque([(0, len(words), 0)])
+        state = 0
+        next_state = 1
+        while queue:
+            lo, hi, depth = queue.popleft()
+            starts.append(len(labels))
+            if lo < hi and len(words[lo]) == depth:
+                lo += 1
+            while lo < hi:
+                label = words[lo][depth]
+                end = lo + 1
+                while end < hi and words[end][depth] == label:
+                    end += 1
+                labels.append(label)
+                targets.append(next_state)
+
+                # The failure link is the longest proper suffix that is also a state
+                link = 0
+                if state:
+                    s = fail[state]
+                    while True:
+                        index = labels.find(label, starts[s], starts[s + 1])
+                        if index >= 0:
+                            link = targets[index]
+                            break
+                        if s == 0:
+                            break
+                        s = fail[s]
+                fail.append(link)
+                match.append(depth + 1 if len(words[lo]) == depth + 1 else match[link])
+
+                queue.append((lo, end, depth + 1))
+                next_state += 1
+                lo = end
+            state += 1
+        starts.append(len(labels))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, partial = tempfile.mkstemp(dir=directory, prefix=".blocklist-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, min_word_length, source_stamp[0],
+                                     source_stamp[1], state, len(labels)))
+                starts.tofile(f)
+                targets.tofile(f)
+                fail.tofile(f)
+                f.write(match)
+                f.write(labels)
+            os.replace(partial, path)
+        except BaseException:
+            os.unlink(partial)
+            raise
+        return cls(path)
+
+    @classmethod
+    def open(
+        cls,
+        wordlist: str,
+        cache_path: Optional[str] = None,
+        min_word_length: int = DEFAULT_MIN_WORD_LENGTH,
+    ) -> "Blocklist":
+        """Open the compiled automaton for ``wordlist``, compiling it if needed.
+
+        Args:
+            wordlist: Text file with one word per line
+            cache_path: Compiled automaton (default: ``wordlist`` + ``.ac``);
+                rebuilt when missing or not made from the current wordlist
+            min_word_length: Shorter words are skipped
+
+        Returns:
+            The compiled blocklist
+        """
+        cache_path = cache_path or wordlist + CACHE_SUFFIX
+        info = os.stat(wordlist)
+        stamp = (info.st_size, info.st_mtime_ns)
+        if os.path.exists(cache_path):
+            try:
+                cached = cls(cache_path)
+            except ValueError:
+                cached = None
+            if cached is not None:
+                if cached.source_stamp == stamp and cached.min_word_length == min_word_length:
+                    return cached
+                cached.close()
+        with open(wordlist, encoding="utf-8", errors="replace") as f:
+            return cls.compile(f, cache_path, min_word_length, stamp)
+
+    def __enter__(self) -> "Blocklist":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the array views and unmap the automaton."""
+        if self._map is None:
+            return
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+        self._map = None
+
+    def _scan(self, data: bytes, start: int = 0) -> Tuple[int, int]:
+        """Return (end, length) of the first blocked word in lowercased ``data``
+        at or after ``start``, or (-1, 0)."""
+        find = self._labels.find
+        starts, targets, fail = self._starts, self._targets, self._fail
+        match, root = self._match, self._root
+        state = 0
+        for position in range(start, len(data)):
+            char = data[position]
+            while state:
+                index = find(char, starts[state], starts[state + 1])
+                if index >= 0:
+                    state = targets[index]
+                    break
+                state = fail[state]
+            else:
+                state = root[char]
+            if match[state]:
+                return position, match[state]
+        return -1, 0
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains(password)
+
+    def contains(self, password: str) -> bool:
+        """Return True if ``password`` contains a blocked word.
+
+        Usable as the ``reject`` predicate of
+        :meth:`PasswordGenerator.generate_password`.
+        """
+        return self._scan(password.lower().encode("ascii", "replace"))[0] >= 0
+
+    def find(self, password: str) -> Optional[str]:
+        """Return the first blocked word found in ``password`` (as written there), or None."""
+        end, length = self._scan(password.lower().encode("ascii", "replace"))
+        if end < 0:
+            return None
+        return password[end + 1 - length:end + 1]
+
+    def check_many(self, passwords: Iterable[str]) -> List[bool]:
+        """Return, for each password, whether it contains a blocked word."""
+        return [self.contains(password) for password in passwords]
+
+    def matching_lines(self, block: bytes) -> List[int]:
+        """Return the zero-based numbers of the lines of ``block`` that contain a blocked word.
+
+        The whole block is scanned in one pass. Words never contain a
+        newline, so the automaton is back at its root at every line break
+        and a match cannot span two lines; after a match the scan skips to
+        the next line.
+        """
+        data = block.lower()
+        lines: List[int] = []
+        line = 0
+        counted = 0
+        position = 0
+        while True:
+            end, _ = self._scan(data, position)
+            if end < 0:
+                return lines
+            line += data.count(b"\n", counted, end)
+            lines.append(line)
+            position = counted = data.find(b"\n", end)
+            if position < 0:
+                return lines
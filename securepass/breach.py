@@ -0,0 +1,142 @@
+"""
+Offline Breached-Password Check
+
+Looks passwords up in a local, sorted corpus of SHA-1 hashes in the format
+of the Have I Been Pwned "Pwned Passwords" download (one ``HASH:COUNT`` line
+per hash, sorted by hash). The corpus is memory-mapped and binary-searched,
+so a lookup touches O(log n) pages and the file is never read linearly.
+"""
+
+import hashlib
+import mmap
+import os
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+# Hex digits of the hash prefix used by the prefix index (16 bits)
+INDEX_PREFIX_DIGITS = 4
+_INDEX_ENTRIES = 16 ** INDEX_PREFIX_DIGITS
+
+
+def sha1_hex(password: str) -> bytes:
+    """Return the uppercase hex SHA-1 of ``password`` as ASCII bytes."""
+    return hashlib.sha1(password.encode("utf-8")).hexdigest().upper().encode("ascii")
+
+
+class BreachCorpus:
+    """Memory-mapped sorted SHA-1 corpus.
+
+    Example::
+
+        with BreachCorpus("pwned-passwords-sha1-ordered-by-hash.txt") as corpus:
+            if "hunter2" in corpus:
+                ...
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        """Open the corpus at ``path``.
+
+        Args:
+            path: Sorted hash file
+            index_path: Optional prefix index built by :meth:`build_index`;
+                narrows every search to one prefix bucket
+
+        Raises:
+            ValueError: If the index does not belong to this corpus
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+        )
+        # Pwned Passwords files use uppercase hex; accept lowercase corpora too
+        head = self._map[:4096] if self._map is not None else b""
+        self._lowercase = any(c in head.split(b"\n", 1)[0][:40] for c in b"abcdef")
+        self._index = self._load_index(index_path) if index_path else None
+
+    def __enter__(self) -> "BreachCorpus":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap and close the corpus file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains(password)
+
+    def contains(self, password: str) -> bool:
+        """Return True if ``password`` appears in the corpus."""
+        return self.contains_hash(sha1_hex(password))
+
+    def check_many(self, passwords: Iterable[str]) -> List[bool]:
+        """Return, for each password, whether it appears in the corpus."""
+        return [self.contains(password) for password in passwords]
+
+    def contains_hash(self, digest: bytes) -> bool:
+        """Return True if the hex SHA-1 ``digest`` appears in the corpus."""
+        if self._map is None:
+            return False
+        digest = digest.lower() if self._lowercase else digest.upper()
+        lo, hi = self._bucket(digest)
+        start = self._lower_bound(digest, lo, hi)
+        return self._map[start:start + len(digest)] == digest
+
+    def build_index(self, index_path: str) -> None:
+        """Write a prefix index for this corpus to ``index_path``.
+
+        The index holds the offset of the first line of every 16-bit hash
+        prefix, found by binary search, so building it costs about
+        65536 * log2(n) seeks rather than a pass over the file.
+        """
+        offsets = array("Q", [0]) * (_INDEX_ENTRIES + 1)
+        if self._map is not None:
+            for prefix in range(_INDEX_ENTRIES):
+                key = b"%0*X" % (INDEX_PREFIX_DIGITS, prefix)
+                if self._lowercase:
+                    key = key.lower()
+                lo = offsets[prefix - 1] if prefix else 0
+                offsets[prefix] = self._lower_bound(key, lo, self._size)
+        # The final entry records the corpus size so a stale index is detected
+        offsets[_INDEX_ENTRIES] = self._size
+        with open(index_path, "wb") as f:
+            offsets.tofile(f)
+
+    def _load_index(self, index_path: str) -> array:
+        offsets = array("Q")
+        with open(index_path, "rb") as f:
+            offsets.frombytes(f.read())
+        if len(offsets) != _INDEX_ENTRIES + 1 or offsets[_INDEX_ENTRIES] != self._size:
+            raise ValueError(f"Index {index_path} does not match corpus {self.path}")
+        return offsets
+
+    def _bucket(self, digest: bytes) -> Tuple[int, int]:
+        """Return the byte range that can contain ``digest``."""
+        if self._index is None:
+            return 0, self._size
+        prefix = int(digest[:INDEX_PREFIX_DIGITS], 16)
+        return self._index[prefix], self._index[prefix + 1]
+
+    def _lower_bound(self, key: bytes, lo: int, hi: int) -> int:
+        """Return the start of the first line in ``[lo, hi)`` not less than ``key``.
+
+        ``lo`` and ``hi`` must be line starts (or the end of the file).
+        """
+        m = self._map
+        width = len(key)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            newline = m.rfind(b"\n", lo, mid)
+            start = lo if newline < 0 else newline + 1
+            if m[start:start + width] < key:
+                end = m.find(b"\n", start, hi)
+                lo = hi if end < 0 else end + 1
+            else:
+                hi = start
+        return lo
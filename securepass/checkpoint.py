@@ -0,0 +1,197 @@
+"""
+Checkpointed Chunked Output
+
+Writes very large runs (hundreds of millions of passwords or codes) into a
+directory of numbered chunk files, ``chunk-000000.txt``, ``chunk-000001.txt``
+and so on, so a job that is killed can be resumed instead of restarted.
+
+Each chunk is written to a temporary file, flushed to disk and renamed into
+place, so a chunk file either holds the whole chunk or does not exist. After
+every chunk, ``checkpoint.json`` is atomically replaced with the number of
+finished chunks and the job's parameters. Resuming the same job skips the
+finished chunks, discards any half-written temporary file and carries on
+with the first missing chunk: finished output is never regenerated, and no
+password is written twice.
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import BinaryIO, Callable, Dict, Iterator, NamedTuple, Optional
+
+CHECKPOINT_NAME = "checkpoint.json"
+DEFAULT_CHUNK_SIZE = 1000000
+
+_PARTIAL_PREFIX = ".passgen-"
+_CHUNK_PREFIX = "chunk-"
+_CHUNK_SUFFIX = ".txt"
+
+
+class Progress(NamedTuple):
+    """Progress of a chunked job after a chunk has been written."""
+
+    chunks_done: int
+    chunks: int
+    items_done: int
+    items: int
+    rate: float
+    chunk_seconds: float
+    eta: float
+
+    def __str__(self) -> str:
+        return (f"Chunk {self.chunks_done}/{self.chunks}: {self.items_done}/{self.items} written, "
+                f"{self.rate:.0f}/s ({self.chunk_seconds:.2f}s per chunk), "
+                f"ETA {format_duration(self.eta)}")
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as ``1h02m03s``, ``2m03s`` or ``3s``."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def _atomic_write(path: str, write: Callable[[BinaryIO], None]) -> None:
+    """Write a file through a synced temporary file in the same directory, then rename it."""
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=_PARTIAL_PREFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+
+
+class ChunkedJob:
+    """A run of ``count`` items written ``chunk_size`` at a time into ``directory``.
+
+    Example::
+
+        job = ChunkedJob("out", 500_000_000, params={"length": 20})
+        job.run(lambda out, start, n: out.write(draw(n).to_bytes()), report=print)
+    """
+
+    def __init__(self, directory: str, count: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 params: Optional[Dict] = None, checkpoint: bool = True):
+        """Prepare the output directory, picking up a previous checkpoint.
+
+        Args:
+            directory: Output directory, created if missing
+            count: Total number of items
+            chunk_size: Items per chunk file
+            params: JSON-serialisable job parameters; resuming requires the same
+            checkpoint: Keep ``checkpoint.json`` so the job can be resumed
+
+        Raises:
+            ValueError: If the sizes are invalid, the checkpoint belongs to a
+                different job, or the directory holds chunks of an unknown job
+        """
+        if count < 1 or chunk_size < 1:
+            raise ValueError("Count and chunk size must be positive")
+        self.directory = directory
+        self.count = count
+        self.chunk_size = chunk_size
+        # Round-tripped so tuples compare equal to the lists read back from the checkpoint
+        self.params = json.loads(json.dumps(params or {}))
+        self.checkpoint = checkpoint
+        self.chunks = -(-count // chunk_size)
+        os.makedirs(directory, exist_ok=True)
+        self.completed = self._resume()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.directory, CHECKPOINT_NAME)
+
+    def chunk_path(self, index: int) -> str:
+        """Path of chunk ``index`` (zero-based)."""
+        return os.path.join(self.directory, f"{_CHUNK_PREFIX}{index:06d}{_CHUNK_SUFFIX}")
+
+    def chunk_range(self, index: int) -> range:
+        """Zero-based numbers of the items in chunk ``index``."""
+        start = index * self.chunk_size
+        return range(start, min(start + self.chunk_size, self.count))
+
+    def _state(self, completed: int) -> Dict:
+        return {"count": self.count, "chunk_size": self.chunk_size, "params": self.params,
+                "completed": completed}
+
+    def _resume(self) -> int:
+        """Clean up after an interrupted run and return the number of finished chunks."""
+        for name in os.listdir(self.directory):
+            if name.startswith(_PARTIAL_PREFIX):
+                os.unlink(os.path.join(self.directory, name))
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = None
+        except ValueError as e:
+            raise ValueError(f"Invalid checkpoint {self.checkpoint_path}: {e}") from e
+
+        if state is None:
+            if any(name.startswith(_CHUNK_PREFIX) for name in os.listdir(self.directory)):
+                raise ValueError(f"{self.directory} already holds chunk files but no checkpoint; "
+                                 f"use an empty directory")
+            return 0
+        if not self.checkpoint:
+            raise ValueError(f"{self.directory} holds a checkpointed job; resume it with the checkpoint")
+        completed = state.get("completed")
+        expected = self._state(completed)
+        if state != expected or not isinstance(completed, int) or not 0 <= completed <= self.chunks:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different job "
+                             f"(count {state.get('count')}, chunk size {state.get('chunk_size')}, "
+                             f"{json.dumps(state.get('params'), sort_keys=True)})")
+        # A chunk renamed into place just before the job died is finished even
+        # though the checkpoint was not updated to say so
+        while completed < self.chunks and os.path.exists(self.chunk_path(completed)):
+            completed += 1
+        return completed
+
+    def _save(self, completed: int) -> None:
+        state = json.dumps(self._state(completed), sort_keys=True).encode("utf-8") + b"\n"
+        _atomic_write(self.checkpoint_path, lambda f: f.write(state))
+
+    def pending(self) -> Iterator[int]:
+        """Indexes of the chunks still to be written."""
+        return iter(range(self.completed, self.chunks))
+
+    def run(self, write_chunk: Callable[[BinaryIO, int, int], None],
+            report: Optional[Callable[[Progress], None]] = None) -> int:
+        """Write every pending chunk.
+
+        Args:
+            write_chunk: Called as ``write_chunk(out, start, n)`` to write items
+                ``start`` to ``start + n - 1`` (zero-based) of the job to ``out``
+            report: Called with a :class:`Progress` after every chunk
+
+        Returns:
+            Number of chunks written by this call
+        """
+        if self.checkpoint and self.completed == 0:
+            self._save(0)
+        started = time.perf_counter()
+        first = self.completed
+        written_items = 0
+        for index in self.pending():
+            items = self.chunk_range(index)
+            _atomic_write(self.chunk_path(index), lambda f: write_chunk(f, items.start, len(items)))
+            self.completed = index + 1
+            if self.checkpoint:
+                self._save(self.completed)
+            written_items += len(items)
+            if report is not None:
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                rate = written_items / elapsed
+                done = min(self.completed * self.chunk_size, self.count)
+                report(Progress(self.completed, self.chunks, done, self.count, rate,
+                                elapsed / (self.completed - first), (self.count - done) / rate))
+        return self.completed - first
@@ -6,14 +6,46 @@ Generates cryptographically secure passwords and copies them to clipboard.
 """
 
 import click
+import csv
+import json
+import os
+import sqlite3
 import sys
-from typing import Optional
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
 
+from securepass.audit import CLASSES as AUDIT_CLASSES, SCORE_NAMES, AuditPolicy, AuditReport, audit_file
+from securepass.batch import PasswordBatch
+from securepass.blocklist import Blocklist
+from securepass.breach import BreachCorpus
+from securepass.checkpoint import DEFAULT_CHUNK_SIZE, ChunkedJob
+from securepass.encryption import DecryptionError, EncryptedWriter, decrypt_stream
+from securepass.exporters import FORMATS as EXPORT_FORMATS, open_exporter, with_passwords
 from securepass.generator import PasswordGenerator
+from securepass.hashing import FORMATS, HASH_ONLY_FORMATS, SCHEMES, check_format, format_record, hash_passwords
+from securepass.ledger import IssuanceLedger
+from securepass.partition import CodeSpace, parse_node
+from securepass.pins import MAX_PIN_LENGTH, MIN_PIN_LENGTH, PinGenerator
+from securepass.shamir import combine_many, format_shares, parse_share, parse_split, split
+from securepass.similarity import DEFAULT_MAX_DISTANCE
+from securepass.provision import provision_csv
+from securepass.recovery import CHECKS, RecoveryCodes, parse_layout
+from securepass.store import SecretStore, parse_interval
+from securepass.template import render_template
+from securepass.tokens import DEFAULT_LENGTH as TOKEN_LENGTH, DEFAULT_PREFIX as TOKEN_PREFIX
+from securepass.tokens import validate_many as validate_tokens
 from securepass.clipboard import ClipboardDriver
 from securepass.utils.vprint import vprint
 
-@click.command()
+if TYPE_CHECKING:
+    from securepass.vault import VaultKVWriter
+
+# Passwords generated per batch in --count mode
+_BATCH_SIZE = 65536
+
+@click.group(invoke_without_command=True)
 @click.option('-l', '--length', default=20, type=click.IntRange(8, 128), help='Password length (8-128 characters)')
 @click.option('-c', '--charset', 
               type=click.Choice(['full', 'alnum', 'letters', 'digits', 'special', 'all']), 
@@ -21,8 +53,59 @@ from securepass.utils.vprint import vprint
               help='Character set to use')
 @click.option('-v', '--verbose', is_flag=True, help='Enable verbose output')
 @click.option('--copy/--no-copy', default=True, help='Enable/disable clipboard copying')
-def cli(length: int, charset: str, verbose: bool, copy: bool) -> str:
+@click.option('--reject-breached', 'breach_corpus', type=click.Path(exists=True, dir_okay=False),
+              help='Redraw passwords found in a sorted SHA-1 breach corpus (HIBP format)')
+@click.option('--breach-index', type=click.Path(dir_okay=False),
+              help='Prefix index for the breach corpus; built on first use if missing')
+@click.option('--blocklist', type=click.Path(exists=True, dir_okay=False),
+              help='Redraw passwords containing any word of this wordlist (case-insensitive)')
+@click.option('--blocklist-cache', type=click.Path(dir_okay=False),
+              help='Compiled blocklist automaton (default: the wordlist path + .ac); built if stale')
+@click.option('-n', '--count', type=click.IntRange(min=1),
+              help='Generate COUNT passwords and print them one per line (no clipboard)')
+@click.option('--hash', 'hash_scheme', type=click.Choice(SCHEMES),
+              help='Hash every password of --count with this KDF')
+@click.option('--format', 'output_format', type=click.Choice(FORMATS), default='jsonl',
+              help='Output format for hashed passwords (htpasswd and shadow need bcrypt)')
+@click.option('--user-prefix', default='user', help='Account name prefix for hashed output')
+@click.option('--plaintext-out', type=click.Path(dir_okay=False, writable=True),
+              help='Also write user:password lines here (required by htpasswd/shadow, which hold hashes only)')
+@click.option('--workers', type=click.IntRange(min=1), help='Maximum hashing processes')
+@click.option('--encrypt-to', type=click.Path(dir_okay=False, writable=True),
+              help='Write --count output to FILE encrypted (see "passgen decrypt")')
+@click.option('--passphrase-env', metavar='VAR',
+              help='Read the encryption passphrase from environment variable VAR (default: prompt)')
+@click.option('--ledger', 'ledger_path', type=click.Path(dir_okay=False),
+              help='Record a keyed hash of every issued password in this SQLite ledger')
+@click.option('--no-reuse', is_flag=True, help='Never issue a password already in the ledger')
+@click.option('--ledger-key-env', metavar='VAR', default='SECUREPASS_LEDGER_KEY', show_default=True,
+              help='Environment variable holding the ledger HMAC key')
+@click.option('--split', 'split_spec', metavar='THRESHOLD/SHARES',
+              help='Print Shamir shares instead of the password, e.g. 3/5 (see "passgen combine")')
+@click.option('--output', 'output_dir', type=click.Path(file_okay=False, writable=True),
+              help='Write --count output into numbered chunk files in directory DIR')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, type=click.IntRange(min=1), show_default=True,
+              help='Passwords per chunk file with --output')
+@click.option('--checkpoint', is_flag=True,
+              help='Keep a checkpoint in the --output directory; rerunning resumes an interrupted job')
+@click.pass_context
+def cli(ctx: click.Context, length: int, charset: str, verbose: bool, copy: bool,
+        breach_corpus: Optional[str] = None, breach_index: Optional[str] = None,
+        count: Optional[int] = None, hash_scheme: Optional[str] = None,
+        output_format: str = 'jsonl', user_prefix: str = 'user',
+        plaintext_out: Optional[str] = None, workers: Optional[int] = None,
+        encrypt_to: Optional[str] = None, passphrase_env: Optional[str] = None,
+        ledger_path: Optional[str] = None, no_reuse: bool = False,
+        ledger_key_env: str = 'SECUREPASS_LEDGER_KEY', blocklist: Optional[str] = None,
+        blocklist_cache: Optional[str] = None, split_spec: Optional[str] = None,
+        output_dir: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint: bool = False) -> str:
     """Generate secure passwords and optionally copy to clipboard."""
+    if ctx.invoked_subcommand is not None:
+        return ''
+    corpus = None
+    ledger = None
+    words = None
     try:
         # Use built-in click echo for verbose output to ensure it's captured
         if verbose:
@@ -35,8 +118,80 @@ def cli(length: int, charset: str, verbose: bool, copy: bool) -> str:
             if verbose:
                 click.echo(f"Note: '{charset}' charset maps to 'full' charset", err=True)
         
-        password = PasswordGenerator.generate_password(length, generator_charset)
-        
+        options = {}
+        if breach_corpus:
+            corpus = _open_corpus(breach_corpus, breach_index, verbose)
+            options['reject'] = corpus.contains
+        if blocklist:
+            if verbose:
+                click.echo(f"Loading blocklist {blocklist}", err=True)
+            words = Blocklist.open(blocklist, blocklist_cache)
+            options['reject'] = _reject_either(options.get('reject'), words.contains)
+        if ledger_path:
+            ledger = _open_ledger(ledger_path, ledger_key_env)
+        elif no_reuse:
+            raise click.UsageError("--no-reuse requires --ledger")
+        shares = parse_split(split_spec) if split_spec else None
+        if shares and hash_scheme:
+            raise click.UsageError("--split cannot be combined with --hash")
+        if hash_scheme:
+            check_format(output_format, hash_scheme)
+
+        if checkpoint and not output_dir:
+            raise click.UsageError("--checkpoint requires --output")
+
+        if count is not None and output_dir:
+            if encrypt_to or plaintext_out:
+                raise click.UsageError("--output cannot be combined with --encrypt-to or --plaintext-out")
+            if hash_scheme and output_format in HASH_ONLY_FORMATS:
+                # Chunk files must carry the plaintext with its hash, as jsonl records do
+                raise click.UsageError(f"--output with --hash writes jsonl records; --format {output_format} "
+                                       f"holds hashes only")
+            _generate_chunked(output_dir, chunk_size, checkpoint, count, length, generator_charset,
+                              options, hash_scheme, output_format, user_prefix, workers, ledger,
+                              no_reuse, shares, job={
+                                  'length': length, 'charset': generator_charset, 'hash': hash_scheme,
+                                  'format': output_format if hash_scheme else None,
+                                  'user_prefix': user_prefix if hash_scheme else None, 'split': shares,
+                              })
+            return ''
+        if count is not None:
+            passphrase = None
+            if encrypt_to:
+                if plaintext_out:
+                    raise click.UsageError("--plaintext-out cannot be combined with --encrypt-to")
+            if hash_scheme and output_format in HASH_ONLY_FORMATS and not plaintext_out:
+                raise click.UsageError(f"--format {output_format} holds hashes only: add --plaintext-out "
+                                       f"to keep the passwords, or use --format jsonl")
+            if encrypt_to:
+                passphrase = _passphrase(passphrase_env, confirm=True)
+            _generate_many(count, length, generator_charset, options, hash_scheme,
+                           output_format, user_prefix, plaintext_out, workers, verbose,
+                           encrypt_to, passphrase, ledger, no_reuse, shares)
+            return ''
+        if hash_scheme:
+            raise click.UsageError("--hash requires --count")
+        if encrypt_to:
+            raise click.UsageError("--encrypt-to requires --count")
+        if output_dir:
+            raise click.UsageError("--output requires --count")
+
+        if ledger is not None and no_reuse:
+            # Claim through the ledger last, so only otherwise acceptable passwords are recorded
+            options['reject'] = _reject_either(options.get('reject'), ledger.reject_reused)
+        password = PasswordGenerator.generate_password(length, generator_charset, **options)
+        if ledger is not None and not no_reuse:
+            ledger.record_many([password])
+
+        if shares:
+            # The shares replace the password: it is neither copied nor shown
+            threshold, count = shares
+            click.echo(f"Generated {length}-character password split into {count} shares "
+                       f"(any {threshold} recover it)")
+            click.echo(format_shares(split(password.encode('ascii'), threshold, count), length)
+                       .decode('ascii').replace(' ', '\n'), nl=False)
+            return ''
+
         if copy:
             try:
                 ClipboardDriver.copy_password(password, verbose)
@@ -54,6 +209,584 @@ def cli(length: int, charset: str, verbose: bool, copy: bool) -> str:
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if corpus is not None:
+            corpus.close()
+        if words is not None:
+            words.close()
+        if ledger is not None:
+            ledger.close()
+
+@cli.command()
+@click.argument('users', type=click.File('r', encoding='utf-8'))
+@click.option('-o', '--output', type=click.File('w', encoding='utf-8', lazy=True), default='-',
+              help='Output CSV (default: stdout)')
+@click.option('-p', '--policy', help='passwordrules requirement string, e.g. "required: upper; minlength: 12"')
+@click.option('-l', '--length', type=click.IntRange(8, 128), help='Password length (default 20)')
+@click.option('-c', '--charset', type=click.Choice(['full', 'alnum', 'letters', 'digits']),
+              default='full', help='Character set to use when no policy is given')
+@click.option('--hash', 'hash_scheme', type=click.Choice(SCHEMES), help='Also hash every password')
+@click.option('--plaintext/--no-plaintext', default=True,
+              help='Include the plaintext password column (default: yes)')
+@click.option('--workers', type=click.IntRange(min=1), help='Maximum hashing processes')
+@click.option('-v', '--verbose', is_flag=True, help='Report progress while provisioning')
+def provision(users, output, policy: Optional[str], length: Optional[int], charset: str,
+              hash_scheme: Optional[str], plaintext: bool, workers: Optional[int],
+              verbose: bool) -> None:
+    """Add a generated password to every row of the USERS csv file."""
+    def progress(rows: int, elapsed: float) -> None:
+        if verbose:
+            click.echo(f"Provisioned {rows} rows ({rows / max(elapsed, 1e-9):.0f} rows/s)", err=True)
+
+    started = time.perf_counter()
+    try:
+        rows = provision_csv(
+            users, output, length=length, charset=charset, policy=policy,
+            hash_scheme=hash_scheme, workers=workers, include_plaintext=plaintext,
+            progress=progress,
+        )
+    except (ValueError, RuntimeError, ImportError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    click.echo(f"Provisioned {rows} accounts in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)", err=True)
+
+@cli.command()
+@click.argument('accounts', type=click.File('r', encoding='utf-8'))
+@click.option('-f', '--format', 'export_format', required=True, type=click.Choice(EXPORT_FORMATS),
+              help='Password manager import format')
+@click.option('-o', '--output', type=click.File('w', encoding='utf-8', lazy=True), default='-',
+              help='Where to write the export (default: stdout)')
+@click.option('-l', '--length', default=20, type=click.IntRange(8, 128), help='Password length (default 20)')
+@click.option('-c', '--charset', type=click.Choice(['full', 'alnum', 'letters', 'digits']),
+              default='full', help='Character set to use')
+@click.option('--folder', help='Bitwarden folder or KeePass group for every entry')
+def export(accounts, export_format: str, output, length: int, charset: str, folder: Optional[str]) -> None:
+    """Generate a password for every row of the ACCOUNTS csv (name and
+    optional username columns) and write a password manager import file."""
+    started = time.perf_counter()
+    try:
+        reader = csv.DictReader(accounts)
+        if reader.fieldnames is None or 'name' not in reader.fieldnames:
+            raise ValueError("Accounts CSV needs a header row with a name column")
+        pairs = _account_pairs(reader)
+        with open_exporter(export_format, output, folder) as exporter:
+            written = exporter.write(with_passwords(pairs, length, charset))
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    click.echo(f"Exported {written} entries in {elapsed:.2f}s ({written / elapsed:.0f} entries/s)", err=True)
+
+@cli.command()
+@click.argument('encrypted', type=click.File('rb'))
+@click.option('-o', '--output', type=click.File('wb', lazy=True), default='-',
+              help='Where to write the plaintext (default: stdout)')
+@click.option('--passphrase-env', metavar='VAR',
+              help='Read the passphrase from environment variable VAR (default: prompt)')
+def decrypt(encrypted, output, passphrase_env: Optional[str]) -> None:
+    """Stream the plaintext of an ENCRYPTED file written with --encrypt-to."""
+    try:
+        passphrase = _passphrase(passphrase_env, confirm=False)
+        for chunk in decrypt_stream(encrypted, passphrase):
+            output.write(chunk)
+        output.flush()
+    except (DecryptionError, ImportError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+def _account_pairs(reader: csv.DictReader) -> Iterator[Tuple[str, str]]:
+    """Yield ``(name, username)`` for every accounts row, rejecting rows without a name."""
+    for row in reader:
+        name = row.get('name') or ''
+        if not name:
+            raise ValueError(f"Accounts CSV line {reader.line_num} has no name")
+        yield name, row.get('username') or ''
+
+def _vault_options(command: Callable) -> Callable:
+    """Add the options selecting a Vault KV mount to write secrets to."""
+    options = [
+        click.option('--vault-url', metavar='URL',
+                     help='Write secrets to this Vault (or compatible) server, e.g. https://vault:8200'),
+        click.option('--vault-token-env', metavar='VAR', default='VAULT_TOKEN', show_default=True,
+                     help='Environment variable holding the Vault token'),
+        click.option('--vault-mount', default='secret', show_default=True, help='KV engine mount path'),
+        click.option('--vault-kv-version', type=click.Choice(['1', '2']), default='2', show_default=True,
+                     callback=lambda ctx, param, value: int(value), help='KV engine version'),
+        click.option('--vault-workers', type=click.IntRange(1, 64),
+                     help='Connections and writes in flight [default: 8]'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+@cli.command()
+@click.option('--store', 'store_path', required=True, type=click.Path(dir_okay=False),
+              help='SQLite secret store')
+@click.option('--chunk-size', default=10000, type=click.IntRange(min=1),
+              help='Entries rotated per transaction')
+@click.option('--limit', type=click.IntRange(min=1), help='Rotate at most this many entries')
+@click.option('--keep-history', default=0, type=click.IntRange(min=0),
+              help='Keep this many previous secrets per entry and avoid new ones close to them')
+@click.option('--max-distance', default=DEFAULT_MAX_DISTANCE, type=click.IntRange(min=0),
+              show_default=True,
+              help='Redraw a new secret within this many edits of the current or a kept secret')
+@click.option('-v', '--verbose', is_flag=True, help='Report progress while rotating')
+@_vault_options
+def rotate(store_path: str, chunk_size: int, limit: Optional[int], keep_history: int,
+           max_distance: int, verbose: bool, vault_url: Optional[str], vault_token_env: str,
+           vault_mount: str, vault_kv_version: int, vault_workers: Optional[int]) -> None:
+    """Regenerate every secret in the store whose rotation is due.
+
+    With --vault-url, every committed chunk of rotated secrets is also
+    written to Vault; if that fails, "passgen push" re-sends the store.
+    """
+    def progress(rows: int) -> None:
+        if verbose:
+            click.echo(f"Rotated {rows} entries", err=True)
+
+    started = time.perf_counter()
+    vault = None
+    try:
+        if vault_url:
+            vault = _open_vault(vault_url, vault_token_env, vault_mount, vault_kv_version, vault_workers)
+        with SecretStore(store_path) as store:
+            rotated = store.rotate(chunk_size=chunk_size, limit=limit, progress=progress,
+                                   keep_history=keep_history, max_distance=max_distance,
+                                   on_rotated=vault.write_many if vault is not None else None)
+    except (ValueError, RuntimeError, sqlite3.Error) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if vault is not None:
+            vault.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    click.echo(f"Rotated {rotated} entries in {elapsed:.2f}s", err=True)
+
+@cli.command()
+@click.option('--store', 'store_path', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='SQLite secret store')
+@_vault_options
+def push(store_path: str, vault_url: Optional[str], vault_token_env: str, vault_mount: str,
+         vault_kv_version: int, vault_workers: Optional[int]) -> None:
+    """Write every current secret of the store to Vault (e.g. after a failed push)."""
+    if not vault_url:
+        raise click.UsageError("push requires --vault-url")
+    started = time.perf_counter()
+    try:
+        with _open_vault(vault_url, vault_token_env, vault_mount, vault_kv_version,
+                         vault_workers) as vault, SecretStore(store_path) as store:
+            pushed = vault.write_many(store.items())
+    except (ValueError, RuntimeError, sqlite3.Error) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    click.echo(f"Pushed {pushed} secrets in {elapsed:.2f}s", err=True)
+
+@cli.command('add-secret')
+@click.argument('names', nargs=-1, required=True)
+@click.option('--store', 'store_path', required=True, type=click.Path(dir_okay=False),
+              help='SQLite secret store')
+@click.option('--every', default='90d', help='Rotation interval, e.g. 30d, 12h, 3600 (default 90d)')
+@click.option('-l', '--length', type=click.IntRange(8, 128), help='Secret length (default 20)')
+@click.option('-c', '--charset', type=click.Choice(['full', 'alnum', 'letters', 'digits']),
+              default='full', help='Character set to use when no rules are given')
+@click.option('--rules', help='passwordrules requirement string the secret must satisfy')
+def add_secret(names, store_path: str, every: str, length: Optional[int], charset: str,
+               rules: Optional[str]) -> None:
+    """Add NAMES to the store with a freshly generated secret and rotation policy."""
+    try:
+        with SecretStore(store_path) as store:
+            added = store.add_many(names, length=length, charset=charset, rules=rules,
+                                   interval=parse_interval(every))
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    click.echo(f"Added {added} entries", err=True)
+
+@cli.command()
+@click.argument('template', type=click.File('r', encoding='utf-8'))
+@click.option('-o', '--output', type=click.Path(dir_okay=False, writable=True),
+              help='Rendered file (default: stdout); only replaced once rendering succeeds')
+def render(template, output: Optional[str]) -> None:
+    """Replace {{ passgen ... }} placeholders in TEMPLATE with fresh secrets."""
+    try:
+        if output is None:
+            render_template(template, sys.stdout)
+            return
+        directory = os.path.dirname(os.path.abspath(output))
+        fd, partial = tempfile.mkstemp(dir=directory, prefix='.passgen-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                render_template(template, f)
+            os.replace(partial, output)
+        except BaseException:
+            os.unlink(partial)
+            raise
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+@cli.command()
+@click.option('--node', 'node_spec', required=True, metavar='NODE/NODES',
+              help='This node\'s share of the code space, e.g. 3/16 (zero-based)')
+@click.option('-n', '--count', required=True, type=click.IntRange(min=1), help='Number of codes to issue')
+@click.option('-l', '--length', default=10, type=click.IntRange(1, 128), help='Code length (default 10)')
+@click.option('-c', '--charset', type=click.Choice(['alnum', 'letters', 'digits']), default='alnum',
+              help='Character set for codes')
+@click.option('--state', 'state_path', type=click.Path(dir_okay=False),
+              help='File holding how many codes this node has issued; advanced on every run')
+@click.option('--offset', type=click.IntRange(min=0),
+              help='Start at this position in the node\'s range instead of using --state')
+@click.option('--key-env', metavar='VAR', default='SECUREPASS_CODE_KEY', show_default=True,
+              help='Environment variable holding the permutation key shared by all nodes')
+def codes(node_spec: str, count: int, length: int, charset: str, state_path: Optional[str],
+          offset: Optional[int], key_env: str) -> None:
+    """Issue codes that never collide with any other node's, without coordination."""
+    try:
+        if (state_path is None) == (offset is None):
+            raise click.UsageError("Give exactly one of --state or --offset")
+        key = os.environ.get(key_env)
+        if not key:
+            raise click.UsageError(f"codes needs a permutation key in environment variable {key_env}")
+        node, nodes = parse_node(node_spec)
+        space = CodeSpace(key.encode('utf-8'), length, charset)
+        start, stop = space.partition(node, nodes)
+        position = offset if offset is not None else _read_position(state_path)
+        if start + position + count > stop:
+            raise ValueError(f"Node {node_spec} has only {stop - start - position} codes left")
+        if state_path is not None:
+            # Reserve the range before issuing: a crash skips codes, it never repeats them
+            _write_position(state_path, position + count)
+        with _open_output(None, None) as out:
+            for first in range(0, count, _BATCH_SIZE):
+                batch = space.codes(start + position + first, min(_BATCH_SIZE, count - first))
+                out.write(batch.to_bytes())
+    except (ValueError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+def _read_position(path: str) -> int:
+    """Read a node's issued-code counter; a missing file means none issued yet."""
+    try:
+        with open(path, encoding='ascii') as f:
+            text = f.read().strip()
+    except FileNotFoundError:
+        return 0
+    if not text.isdigit():
+        raise ValueError(f"Invalid state file {path}: {text!r}")
+    return int(text)
+
+def _write_position(path: str, position: int) -> None:
+    """Atomically replace a node's issued-code counter."""
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.passgen-')
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        f.write(f"{position}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+@cli.command('recovery-codes')
+@click.option('--users', required=True, type=click.IntRange(min=1), help='Number of users')
+@click.option('--per-user', default=10, type=click.IntRange(min=1), help='Codes per user (default 10)')
+@click.option('--layout', default='xxxx-xxxx', help='Code layout; the last character is the check digit')
+@click.option('-c', '--charset', type=click.Choice(['digits', 'alnum']), default='digits',
+              help='Character set for codes')
+@click.option('--check', type=click.Choice(CHECKS),
+              help='Check character algorithm (default: damm for digits, luhn for alnum)')
+@click.option('-o', '--output', type=click.File('wb', lazy=True), default='-',
+              help='Where to write the codes (default: stdout)')
+def recovery_codes(users: int, per_user: int, layout: str, charset: str, check: Optional[str],
+                   output) -> None:
+    """Generate recovery code sets: one line per user, codes separated by spaces."""
+    try:
+        groups, group_size = parse_layout(layout)
+        codes = RecoveryCodes(charset, groups, group_size, check)
+        for batch in codes.generate_sets(users, per_user):
+            output.write(codes.format_sets(batch, per_user))
+        output.flush()
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+@cli.command()
+@click.option('--prefix', default=TOKEN_PREFIX, show_default=True, help='Token prefix, ending in _')
+@click.option('-l', '--length', default=TOKEN_LENGTH, type=click.IntRange(16, 128), show_default=True,
+              help='Random characters per token (a 6-character checksum is appended)')
+@click.option('-n', '--count', default=1, type=click.IntRange(min=1), help='Number of tokens')
+def token(prefix: str, length: int, count: int) -> None:
+    """Generate checksummed API tokens such as sp_live_<random><checksum>."""
+    try:
+        with _open_output(None, None) as out:
+            for first in range(0, count, _BATCH_SIZE):
+                batch = PasswordGenerator.generate_tokens(min(_BATCH_SIZE, count - first),
+                                                          prefix, length)
+                out.write(batch.to_bytes())
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+@cli.command()
+@click.option('-l', '--length', default=6, type=click.IntRange(MIN_PIN_LENGTH, MAX_PIN_LENGTH),
+              show_default=True, help='Number of digits')
+@click.option('-n', '--count', default=1, type=click.IntRange(min=1), help='Number of PINs')
+@click.option('--exclude', 'exclude_file', type=click.File('r', encoding='utf-8'),
+              help='Also exclude the PINs listed in FILE, one per line (e.g. a top-N list)')
+def pin(length: int, count: int, exclude_file) -> None:
+    """Generate PINs, excluding repeats, sequences, dates and common PINs."""
+    try:
+        pins = PinGenerator(length, exclude_file)
+        with _open_output(None, None) as out:
+            for first in range(0, count, _BATCH_SIZE):
+                out.write(pins.generate(min(_BATCH_SIZE, count - first)).to_bytes())
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+@cli.command()
+@click.argument('inputs', nargs=-1, type=click.File('r', encoding='utf-8'))
+def combine(inputs) -> None:
+    """Recover secrets from Shamir shares written by --split.
+
+    Each line holds shares of one secret, separated by spaces. With several
+    INPUTS (e.g. one file per custodian) their lines are read side by side;
+    with none, shares are read from stdin.
+    """
+    try:
+        rows = zip(*inputs) if inputs else ((line,) for line in sys.stdin)
+        share_sets = []
+        for row in rows:
+            fields = ' '.join(row).split()
+            if fields:
+                share_sets.append([parse_share(field) for field in fields])
+            if len(share_sets) == _BATCH_SIZE:
+                _echo_combined(share_sets)
+                share_sets = []
+        _echo_combined(share_sets)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+def _echo_combined(share_sets) -> None:
+    """Echo the secrets recovered from ``share_sets``, one per line."""
+    if share_sets:
+        click.echo(b'\n'.join(combine_many(share_sets)).decode('utf-8', 'replace'))
+
+@cli.command()
+@click.argument('password_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--min-length', default=12, type=click.IntRange(min=1), show_default=True,
+              help='Shortest acceptable password')
+@click.option('--max-length', type=click.IntRange(min=1), help='Longest acceptable password')
+@click.option('--min-classes', default=3, type=click.IntRange(0, len(AUDIT_CLASSES)), show_default=True,
+              help='Fewest character classes (lower, upper, digit, symbol)')
+@click.option('--require', 'required', multiple=True, type=click.Choice(AUDIT_CLASSES),
+              help='Character class every password must contain (repeatable)')
+@click.option('--max-repeat', type=click.IntRange(min=1),
+              help='Longest acceptable run of one repeated character')
+@click.option('--blocklist', type=click.Path(exists=True, dir_okay=False),
+              help='Fail passwords containing any word of this wordlist (case-insensitive)')
+@click.option('--blocklist-cache', type=click.Path(dir_okay=False),
+              help='Compiled blocklist automaton (default: the wordlist path + .ac); built if stale')
+@click.option('--workers', type=click.IntRange(min=1), help='Maximum audit processes (default: CPU count)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON')
+def audit(password_file: str, min_length: int, max_length: Optional[int], min_classes: int,
+          required: Tuple[str, ...], max_repeat: Optional[int], blocklist: Optional[str],
+          blocklist_cache: Optional[str], workers: Optional[int], as_json: bool) -> None:
+    """Check every line of PASSWORD_FILE against a policy and report strength."""
+    started = time.perf_counter()
+    try:
+        compiled = None
+        if blocklist:
+            # Compile once here; the workers memory-map the compiled automaton
+            with Blocklist.open(blocklist, blocklist_cache) as words:
+                compiled = words.path
+        policy = AuditPolicy(min_length, max_length, min_classes, required, max_repeat, compiled)
+        report = audit_file(password_file, policy, workers)
+    except ValueError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    if as_json:
+        click.echo(json.dumps(report.as_dict(), indent=2))
+    else:
+        _print_audit(report, time.perf_counter() - started)
+
+def _print_audit(report: AuditReport, elapsed: float) -> None:
+    """Print an audit report as text."""
+    def share(count: int) -> str:
+        return f"{count:,} ({100 * count / max(report.passwords, 1):.1f}%)"
+
+    elapsed = max(elapsed, 1e-9)
+    click.echo(f"Audited {report.passwords:,} passwords ({report.bytes / 1e6:.1f} MB) in {elapsed:.2f}s "
+               f"({report.bytes / 1e6 / elapsed:.1f} MB/s)")
+    click.echo(f"Passed policy: {share(report.passed)}")
+    if report.failures:
+        click.echo("Failed:")
+        for reason, count in report.failures.most_common():
+            click.echo(f"  {reason.replace('_', ' ')}: {share(count)}")
+    click.echo("Strength:")
+    for name, count in zip(SCORE_NAMES, report.scores):
+        click.echo(f"  {name}: {share(count)}")
+    click.echo("Character classes: " + ", ".join(f"{n}: {count:,}" for n, count in enumerate(report.classes)))
+    details = report.as_dict()
+    click.echo(f"Length: min {details['min_length']}, mean {details['mean_length']}, max {details['max_length']}")
+    if report.empty:
+        click.echo(f"Empty lines skipped: {report.empty:,}")
+
+@cli.command('check-tokens')
+@click.argument('candidates', type=click.File('r', encoding='utf-8', errors='replace'), default='-')
+@click.option('--prefix', help='Only accept tokens with this prefix')
+@click.option('--invalid', is_flag=True, help='Print the candidates that are not valid tokens instead')
+def check_tokens(candidates, prefix: Optional[str], invalid: bool) -> None:
+    """Print the lines of CANDIDATES (default: stdin) that are valid tokens."""
+    lines = []
+    for line in candidates:
+        lines.append(line.rstrip('\r\n'))
+        if len(lines) == _BATCH_SIZE * 16:
+            _print_checked(lines, prefix, invalid)
+            lines = []
+    _print_checked(lines, prefix, invalid)
+
+def _print_checked(lines, prefix: Optional[str], invalid: bool) -> None:
+    """Echo the lines whose token validity differs from ``invalid``."""
+    selected = [line for line, valid in zip(lines, validate_tokens(lines, prefix)) if valid != invalid]
+    if selected:
+        click.echo('\n'.join(selected))
+
+def _iter_batches(count: int, length: int, charset: str, options: Dict,
+                  ledger: Optional[IssuanceLedger] = None,
+                  no_reuse: bool = False) -> Iterator[PasswordBatch]:
+    """Yield ``count`` passwords as bounded batches, recorded in the ledger if given."""
+    def draw(n: int) -> PasswordBatch:
+        return PasswordGenerator.generate_passwords(n, length, charset, **options)
+
+    for start in range(0, count, _BATCH_SIZE):
+        batch = draw(min(_BATCH_SIZE, count - start))
+        if ledger is not None:
+            if no_reuse:
+                ledger.replace_reused(batch, draw)
+            else:
+                ledger.record_many(batch)
+        yield batch
+
+def _reject_either(first: Optional[Callable[[str], bool]],
+                   second: Callable[[str], bool]) -> Callable[[str], bool]:
+    """Combine two reject predicates; ``second`` only sees candidates ``first`` accepts."""
+    if first is None:
+        return second
+    return lambda password: first(password) or second(password)
+
+def _open_ledger(path: str, key_env: str) -> IssuanceLedger:
+    """Open the issuance ledger with the key from environment variable ``key_env``."""
+    key = os.environ.get(key_env)
+    if not key:
+        raise click.UsageError(f"--ledger needs an HMAC key in environment variable {key_env}")
+    return IssuanceLedger(path, key.encode('utf-8'))
+
+@contextmanager
+def _open_output(encrypt_to: Optional[str], passphrase: Optional[str]) -> Iterator[BinaryIO]:
+    """Open the --count output: stdout, or an encrypted file."""
+    if encrypt_to is None:
+        sys.stdout.flush()
+        stdout = sys.stdout.buffer
+        yield stdout
+        stdout.flush()
+        return
+    with open(encrypt_to, 'wb') as f, EncryptedWriter(f, passphrase) as writer:
+        yield writer
+
+def _generate_many(count: int, length: int, charset: str, options: Dict,
+                   hash_scheme: Optional[str], output_format: str, user_prefix: str,
+                   plaintext_out: Optional[str], workers: Optional[int], verbose: bool,
+                   encrypt_to: Optional[str] = None, passphrase: Optional[str] = None,
+                   ledger: Optional[IssuanceLedger] = None, no_reuse: bool = False,
+                   shares: Optional[Tuple[int, int]] = None) -> None:
+    """Write ``count`` passwords, their Shamir shares, or hashed records when a KDF is selected."""
+    started = time.perf_counter()
+    batches = _iter_batches(count, length, charset, options, ledger, no_reuse)
+    with _open_output(encrypt_to, passphrase) as out:
+        plaintext = open(plaintext_out, "w") if plaintext_out else None
+        try:
+            _write_passwords(out, batches, length, hash_scheme, output_format, user_prefix,
+                             workers, shares, plaintext)
+        finally:
+            if plaintext is not None:
+                plaintext.close()
+
+    if verbose:
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        click.echo(f"Generated {count} passwords in {elapsed:.2f}s ({count / elapsed:.0f}/s)", err=True)
+
+def _write_passwords(out: BinaryIO, batches: Iterator[PasswordBatch], length: int,
+                     hash_scheme: Optional[str], output_format: str, user_prefix: str,
+                     workers: Optional[int], shares: Optional[Tuple[int, int]],
+                     plaintext=None, first_number: int = 1) -> None:
+    """Write passwords as lines, Shamir shares or hashed records numbered from ``first_number``."""
+    if shares is not None:
+        for batch in batches:
+            out.write(format_shares(split(batch.to_bytes(b''), *shares), length))
+    elif hash_scheme is None:
+        for batch in batches:
+            out.write(batch.to_bytes())
+    else:
+        passwords = (password for batch in batches for password in batch)
+        records = hash_passwords(passwords, hash_scheme, workers=workers)
+        for number, (password, hashed) in enumerate(records, first_number):
+            user = f"{user_prefix}{number}"
+            out.write(format_record(output_format, user, password, hashed).encode() + b"\n")
+            if plaintext is not None:
+                plaintext.write(f"{user}:{password}\n")
+
+def _generate_chunked(output_dir: str, chunk_size: int, checkpoint: bool, count: int, length: int,
+                      charset: str, options: Dict, hash_scheme: Optional[str], output_format: str,
+                      user_prefix: str, workers: Optional[int], ledger: Optional[IssuanceLedger],
+                      no_reuse: bool, shares: Optional[Tuple[int, int]], job: Dict) -> None:
+    """Write ``count`` passwords into chunk files, resuming from a checkpoint if there is one."""
+    chunked = ChunkedJob(output_dir, count, chunk_size, params=job, checkpoint=checkpoint)
+    if chunked.completed == chunked.chunks:
+        click.echo(f"All {chunked.chunks} chunks in {output_dir} are already written", err=True)
+        return
+    if chunked.completed:
+        click.echo(f"Resuming at chunk {chunked.completed + 1}/{chunked.chunks} "
+                   f"({chunked.completed} already written)", err=True)
+
+    def write_chunk(out: BinaryIO, start: int, n: int) -> None:
+        batches = _iter_batches(n, length, charset, options, ledger, no_reuse)
+        _write_passwords(out, batches, length, hash_scheme, output_format, user_prefix,
+                         workers, shares, first_number=start + 1)
+
+    started = time.perf_counter()
+    written = chunked.run(write_chunk, report=lambda progress: click.echo(str(progress), err=True))
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    click.echo(f"Wrote {written} of {chunked.chunks} chunks to {output_dir} in {elapsed:.2f}s", err=True)
+
+def _passphrase(env_var: Optional[str], confirm: bool) -> str:
+    """Read the encryption passphrase from ``env_var`` or prompt for it."""
+    if env_var:
+        if not os.environ.get(env_var):
+            raise click.UsageError(f"Environment variable {env_var} is not set")
+        return os.environ[env_var]
+    return click.prompt('Passphrase', hide_input=True, confirmation_prompt=confirm, err=True)
+
+def _open_vault(url: str, token_env: str, mount: str, kv_version: int,
+                workers: Optional[int]) -> "VaultKVWriter":
+    """Connect to Vault with the token from environment variable ``token_env``."""
+    # Imported here: http.client and ssl are only needed when writing to Vault
+    from securepass.vault import VaultKVWriter
+
+    token = os.environ.get(token_env)
+    if not token:
+        raise click.UsageError(f"--vault-url needs a Vault token in environment variable {token_env}")
+    pool = {} if workers is None else {'pool_size': workers}
+    return VaultKVWriter(url, token, mount=mount, kv_version=kv_version, **pool)
+
+def _open_corpus(path: str, index_path: Optional[str], verbose: bool) -> BreachCorpus:
+    """Open a breach corpus, building its prefix index first if requested and missing."""
+    if index_path and not os.path.exists(index_path):
+        if verbose:
+            click.echo(f"Building breach corpus index {index_path}", err=True)
+        with BreachCorpus(path) as corpus:
+            corpus.build_index(index_path)
+    return BreachCorpus(path, index_path)
 
 def main() -> int:
     """Main entry point for the CLI tool."""
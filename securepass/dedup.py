@@ -0,0 +1,224 @@
+"""
+Duplicate Removal for Password Batches
+
+Makes every password in a packed batch unique. Small batches are checked
+with an exact hash set; batches whose set would exceed the memory budget use
+a blocked Bloom filter and re-check only the Bloom positives exactly, in as
+many passes as it takes for that check to fit the budget too.
+"""
+
+import math
+from array import array
+from typing import Callable, Dict, Iterator, Set, Tuple
+
+# Peak bytes per entry beyond the item itself of a set or dict of short
+# bytes objects, counting the object header and the table while it grows
+_SET_ENTRY_OVERHEAD = 176
+_DICT_ENTRY_OVERHEAD = 136
+
+# Bloom filter block size: one 64-byte cache line
+_BLOCK_BITS = 512
+
+# Fewer bits per item than this would make Bloom positives, each of which
+# needs an exact re-check, dominate the memory use
+_MIN_BITS_PER_ITEM = 8
+
+# Most bytes of the buffer copied out at a time while scanning it
+_SCAN_BYTES = 1 << 20
+
+
+class BlockedBloomFilter:
+    """Bloom filter whose probes for one item all fall in one 512-bit block.
+
+    Keeping an item's bits inside a single cache line makes each lookup one
+    memory access. Items are hashed with Python's randomized ``hash()``.
+    """
+
+    __slots__ = ("_bits", "_blocks", "hashes")
+
+    def __init__(self, size_bytes: int, expected_items: int):
+        """Create a filter of about ``size_bytes`` bytes.
+
+        Args:
+            size_bytes: Memory to use; rounded down to whole 64-byte blocks
+            expected_items: Planned number of insertions, used to pick the
+                number of probes per item
+        """
+        blocks = max(1, size_bytes // (_BLOCK_BITS // 8))
+        self._blocks = blocks
+        self._bits = bytearray(blocks * (_BLOCK_BITS // 8))
+        bits_per_item = blocks * _BLOCK_BITS / max(1, expected_items)
+        self.hashes = min(8, max(1, round(math.log(2) * bits_per_item)))
+
+    def add(self, item: bytes) -> bool:
+        """Insert ``item``; return True if it was possibly present before."""
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        base = (h >> 18) % self._blocks * _BLOCK_BITS
+        pos = h & 511
+        step = (h >> 9) & 511 | 1
+        bits = self._bits
+        present = True
+        for _ in range(self.hashes):
+            bit = base + pos
+            index = bit >> 3
+            mask = 1 << (bit & 7)
+            if not bits[index] & mask:
+                present = False
+                bits[index] |= mask
+            pos = (pos + step) & 511
+        return present
+
+
+def make_unique(
+    buffer: bytearray,
+    stride: int,
+    draw: Callable[[int], bytes],
+    memory_budget: int,
+) -> int:
+    """Replace duplicate passwords in a packed buffer with fresh draws.
+
+    Everything the check allocates counts against ``memory_budget``: the
+    chunk of the buffer copied out for scanning, the exact set or the Bloom
+    filter, the indices of Bloom positives and the exact re-check of them.
+
+    Args:
+        buffer: Packed passwords, modified in place
+        stride: Length of each password
+        draw: Returns ``count`` fresh passwords packed into bytes
+        memory_budget: Bytes the duplicate check may use
+
+    Returns:
+        Number of duplicates that were replaced
+
+    Raises:
+        ValueError: If the memory budget is too small for the batch
+    """
+    count = len(buffer) // stride
+    if count == 0:
+        return 0
+    scan_bytes = min(len(buffer), _SCAN_BYTES, max(stride, memory_budget // 16 // stride * stride))
+    # The next chunk is copied while the previous one is still referenced
+    available = memory_budget - 2 * scan_bytes
+    if count * (stride + _SET_ENTRY_OVERHEAD) <= available:
+        return _make_unique_exact(buffer, stride, draw, scan_bytes)
+
+    # Half for the filter, half for the positives and their exact re-check
+    bloom_bytes = available // 2
+    if bloom_bytes * 8 < count * _MIN_BITS_PER_ITEM:
+        raise ValueError(
+            f"Memory budget of {memory_budget} bytes is too small to deduplicate {count} passwords"
+        )
+    bloom = BlockedBloomFilter(bloom_bytes, count)
+    return _make_unique_bloom(buffer, stride, draw, bloom, scan_bytes, available - bloom_bytes)
+
+
+def _scan(buffer: bytearray, stride: int, scan_bytes: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(index, data)`` chunks of ``buffer``, copied ``scan_bytes`` at a time."""
+    for start in range(0, len(buffer), scan_bytes):
+        # Through a memoryview, so the chunk is copied once rather than twice
+        yield start // stride, bytes(memoryview(buffer)[start:start + scan_bytes])
+
+
+def _make_unique_exact(buffer: bytearray, stride: int, draw: Callable[[int], bytes], scan_bytes: int) -> int:
+    seen: Set[bytes] = set()
+    collisions = 0
+    for first, data in _scan(buffer, stride, scan_bytes):
+        for offset in range(0, len(data), stride):
+            item = data[offset:offset + stride]
+            if item in seen:
+                position = (first + offset // stride) * stride
+                while item in seen:
+                    collisions += 1
+                    item = bytes(draw(1))
+                buffer[position:position + stride] = item
+            seen.add(item)
+    return collisions
+
+
+def _make_unique_bloom(
+    buffer: bytearray,
+    stride: int,
+    draw: Callable[[int], bytes],
+    bloom: BlockedBloomFilter,
+    scan_bytes: int,
+    check_budget: int,
+) -> int:
+    # Any value that occurs twice has its later occurrence flagged by the
+    # filter, so values never flagged are unique and only the (few) flagged
+    # values need an exact check. Flagged items are kept as indices.
+    suspects = array(_index_typecode(len(buffer) // stride))
+    for first, data in _scan(buffer, stride, scan_bytes):
+        for offset in range(0, len(data), stride):
+            if bloom.add(data[offset:offset + stride]):
+                suspects.append(first + offset // stride)
+
+    collisions = 0
+    while suspects:
+        suspects, replaced = _replace_duplicates(buffer, stride, draw, bloom, suspects, scan_bytes,
+                                                 check_budget)
+        collisions += replaced
+    return collisions
+
+
+def _replace_duplicates(
+    buffer: bytearray,
+    stride: int,
+    draw: Callable[[int], bytes],
+    bloom: BlockedBloomFilter,
+    suspects: "array[int]",
+    scan_bytes: int,
+    check_budget: int,
+) -> Tuple["array[int]", int]:
+    """Replace repeats of the suspect values, returning the replacements to re-check and their number."""
+    duplicates = _find_duplicates(buffer, stride, suspects, scan_bytes, check_budget)
+
+    # Replacements may themselves collide; flag them for the next round.
+    # They are drawn at most a scan chunk at a time.
+    flagged = array(suspects.typecode)
+    per_draw = scan_bytes // stride
+    for start in range(0, len(duplicates), per_draw):
+        batch = duplicates[start:start + per_draw]
+        fresh = bytes(draw(len(batch)))
+        for i, index in enumerate(batch):
+            item = fresh[i * stride:(i + 1) * stride]
+            buffer[index * stride:(index + 1) * stride] = item
+            if bloom.add(item):
+                flagged.append(index)
+    return flagged, len(duplicates)
+
+
+def _find_duplicates(buffer: bytearray, stride: int, suspects: "array[int]", scan_bytes: int,
+                     check_budget: int) -> "array[int]":
+    """Return the indices of every repeated occurrence of a suspect value.
+
+    The suspect values are checked in as many hash partitions as it takes
+    for each partition's exact set to fit the budget left over by the
+    suspect and duplicate index arrays; every partition rescans the buffer.
+    """
+    # Halved to absorb uneven partitions and the index arrays growing
+    budget = (check_budget - 2 * suspects.itemsize * len(suspects)) // 2
+    if budget < stride + _DICT_ENTRY_OVERHEAD:
+        raise ValueError("Memory budget is too small for the number of duplicates in the batch")
+    partitions = -(-len(suspects) * (stride + _DICT_ENTRY_OVERHEAD) // budget)
+
+    duplicates = array(suspects.typecode)
+    for partition in range(partitions):
+        # Maps each suspect value to whether the scan has passed it yet
+        seen: Dict[bytes, bool] = {}
+        for index in suspects:
+            item = bytes(memoryview(buffer)[index * stride:(index + 1) * stride])
+            if hash(item) % partitions == partition:
+                seen[item] = False
+        for first, data in _scan(buffer, stride, scan_bytes):
+            for offset in range(0, len(data), stride):
+                item = data[offset:offset + stride]
+                if item in seen:
+                    if seen[item]:
+                        duplicates.append(first + offset // stride)
+                    else:
+                        seen[item] = True
+    return duplicates
+
+
+def _index_typecode(count: int) -> str:
+    return "I" if count <= 0xFFFFFFFF else "Q"
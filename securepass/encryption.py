@@ -0,0 +1,284 @@
+"""
+Streaming Encrypted Output
+
+Encrypts generated output in fixed-size, individually authenticated chunks
+so that large batches are never written to disk in plaintext and never have
+to be held in memory whole. The key is derived from a passphrase with scrypt.
+
+Chunks are sealed with AES-256-GCM when the optional ``cryptography`` package
+is installed. Without it, a stdlib-only construction is used: a SHAKE256
+keystream (keyed XOF in counter mode) for confidentiality and keyed BLAKE2b
+over the ciphertext for integrity (encrypt-then-MAC).
+
+Every chunk's associated data binds the file header, the chunk index and a
+final-chunk flag, so reordered, dropped, truncated or appended chunks are
+detected.
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+from typing import BinaryIO, Iterator, Optional
+
+CIPHER_AES_GCM = "aes-256-gcm"
+CIPHER_SHAKE_BLAKE2 = "shake256-blake2b"
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# scrypt cost for passphrase key derivation: N = 2**DEFAULT_WORK_FACTOR
+DEFAULT_WORK_FACTOR = 15
+
+# Accepted scrypt parameters. hashlib.scrypt's memory limit must stay below
+# 2**31 bytes, which caps log2(N) at 19 for the block size r = 8 written here.
+_MIN_WORK_FACTOR = 10
+_MAX_WORK_FACTOR = 19
+_SCRYPT_R = 8
+_MAX_SCRYPT_P = 4
+
+_MAGIC = b"SPENC"
+_VERSION = 1
+_CIPHER_IDS = {CIPHER_AES_GCM: 1, CIPHER_SHAKE_BLAKE2: 2}
+_TAG_SIZES = {CIPHER_AES_GCM: 16, CIPHER_SHAKE_BLAKE2: 32}
+
+# magic, version, cipher id, scrypt log2(N), r, p, salt, nonce prefix, chunk size
+_HEADER = struct.Struct(">5sBBBBB16s4sI")
+# final flag, sealed length
+_RECORD = struct.Struct(">BI")
+
+
+class DecryptionError(ValueError):
+    """Raised when an encrypted file is malformed, truncated or fails authentication."""
+
+
+def _import_aesgcm():
+    """Return the AESGCM class, or None if ``cryptography`` is not installed."""
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        return AESGCM
+    except ImportError:
+        return None
+
+
+def default_cipher() -> str:
+    """Return AES-256-GCM if ``cryptography`` is installed, else the stdlib cipher."""
+    return CIPHER_AES_GCM if _import_aesgcm() is not None else CIPHER_SHAKE_BLAKE2
+
+
+def _derive_key(passphrase: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        passphrase.encode("utf-8"), salt=salt, n=2 ** log_n, r=r, p=p, dklen=64,
+        maxmem=256 * r * (2 ** log_n + p + 1),
+    )
+
+
+def _xor(data: bytes, keystream: bytes) -> bytes:
+    mixed = int.from_bytes(data, "little") ^ int.from_bytes(keystream, "little")
+    return mixed.to_bytes(len(data), "little")
+
+
+class _ChunkCipher:
+    """Seals and opens single chunks under one file key."""
+
+    def __init__(self, cipher: str, key: bytes):
+        self.cipher = cipher
+        self.tag_size = _TAG_SIZES[cipher]
+        if cipher == CIPHER_AES_GCM:
+            aesgcm = _import_aesgcm()
+            if aesgcm is None:
+                raise ImportError("cryptography not installed: required for AES-256-GCM files")
+            self._aead = aesgcm(key[:32])
+        else:
+            self._enc_key = key[:32]
+            self._mac_key = key[32:]
+
+    def _keystream(self, nonce: bytes, size: int) -> bytes:
+        return hashlib.shake_256(self._enc_key + nonce).digest(size)
+
+    def _tag(self, aad: bytes, sealed: bytes) -> bytes:
+        return hashlib.blake2b(aad + sealed, key=self._mac_key, digest_size=self.tag_size).digest()
+
+    def seal(self, nonce: bytes, data: bytes, aad: bytes) -> bytes:
+        if self.cipher == CIPHER_AES_GCM:
+            return self._aead.encrypt(nonce, data, aad)
+        ciphertext = _xor(data, self._keystream(nonce, len(data))) if data else b""
+        return ciphertext + self._tag(aad, ciphertext)
+
+    def open(self, nonce: bytes, sealed: bytes, aad: bytes) -> bytes:
+        if self.cipher == CIPHER_AES_GCM:
+            try:
+                return self._aead.decrypt(nonce, sealed, aad)
+            except Exception:
+                raise DecryptionError("Authentication failed: wrong passphrase or corrupted file")
+        ciphertext, tag = sealed[:-self.tag_size], sealed[-self.tag_size:]
+        if not hmac.compare_digest(tag, self._tag(aad, ciphertext)):
+            raise DecryptionError("Authentication failed: wrong passphrase or corrupted file")
+        return _xor(ciphertext, self._keystream(nonce, len(ciphertext))) if ciphertext else b""
+
+
+def _chunk_aad(header: bytes, index: int, final: bool) -> bytes:
+    return header + struct.pack(">QB", index, final)
+
+
+class EncryptedWriter:
+    """File-like writer that encrypts everything written to it.
+
+    Example::
+
+        with open("passwords.enc", "wb") as f, EncryptedWriter(f, passphrase) as out:
+            out.write(batch.to_bytes())
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        passphrase: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cipher: Optional[str] = None,
+        work_factor: int = DEFAULT_WORK_FACTOR,
+    ):
+        """Write the file header and derive the key.
+
+        Args:
+            fileobj: Binary file to write the encrypted stream to
+            passphrase: Passphrase the key is derived from
+            chunk_size: Plaintext bytes per authenticated chunk
+            cipher: ``"aes-256-gcm"`` or ``"shake256-blake2b"``; defaults to
+                :func:`default_cipher`
+            work_factor: scrypt cost, log2(N), from 10 to 19
+
+        Raises:
+            ValueError: If the passphrase is empty or a parameter is invalid
+            ImportError: If AES-256-GCM is requested without ``cryptography``
+        """
+        if not passphrase:
+            raise ValueError("Passphrase must not be empty")
+        if not 0 < chunk_size < 2 ** 31:
+            raise ValueError(f"Invalid chunk size: {chunk_size}")
+        cipher = cipher or default_cipher()
+        if cipher not in _CIPHER_IDS:
+            raise ValueError(f"Invalid cipher: {cipher}")
+        if not _MIN_WORK_FACTOR <= work_factor <= _MAX_WORK_FACTOR:
+            raise ValueError(f"Invalid work factor: {work_factor}")
+
+        salt = os.urandom(16)
+        self._nonce_prefix = os.urandom(4)
+        r, p = _SCRYPT_R, 1
+        self._header = _HEADER.pack(
+            _MAGIC, _VERSION, _CIPHER_IDS[cipher], work_factor, r, p, salt,
+            self._nonce_prefix, chunk_size,
+        )
+        self._cipher = _ChunkCipher(cipher, _derive_key(passphrase, salt, work_factor, r, p))
+        self._file = fileobj
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._index = 0
+        self.closed = False
+        fileobj.write(self._header)
+
+    def __enter__(self) -> "EncryptedWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the stream without a final chunk so it reads as truncated
+            self.closed = True
+            self._buffer = bytearray()
+
+    def _emit(self, data: bytes, final: bool) -> None:
+        nonce = self._nonce_prefix + struct.pack(">Q", self._index)
+        sealed = self._cipher.seal(nonce, data, _chunk_aad(self._header, self._index, final))
+        self._file.write(_RECORD.pack(final, len(sealed)))
+        self._file.write(sealed)
+        self._index += 1
+
+    def write(self, data: bytes) -> int:
+        """Buffer ``data`` and encrypt every chunk that is complete."""
+        if self.closed:
+            raise ValueError("write to closed EncryptedWriter")
+        self._buffer += data
+        size = self._chunk_size
+        # Always keep at least one byte back: the last chunk is sealed as final on close
+        if len(self._buffer) > size:
+            view = memoryview(self._buffer)
+            end = (len(self._buffer) - 1) // size * size
+            for offset in range(0, end, size):
+                self._emit(bytes(view[offset:offset + size]), False)
+            view.release()
+            del self._buffer[:end]
+        return len(data)
+
+    def close(self) -> None:
+        """Encrypt the remaining data as the final chunk.
+
+        The underlying file is flushed but not closed.
+        """
+        if self.closed:
+            return
+        self._emit(bytes(self._buffer), True)
+        self._buffer = bytearray()
+        self.closed = True
+        self._file.flush()
+
+
+def _read_exact(fileobj: BinaryIO, size: int) -> bytes:
+    data = fileobj.read(size)
+    while len(data) < size:
+        more = fileobj.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def decrypt_stream(fileobj: BinaryIO, passphrase: str) -> Iterator[bytes]:
+    """Yield the plaintext of an encrypted file chunk by chunk.
+
+    Each chunk is authenticated before it is yielded; a chunk that fails
+    authentication, a missing final chunk or trailing data raises
+    DecryptionError at the point it is reached.
+
+    Raises:
+        DecryptionError: If the file is malformed, truncated or tampered with,
+            or the passphrase is wrong
+        ImportError: If the file uses AES-256-GCM and ``cryptography`` is missing
+    """
+    header = _read_exact(fileobj, _HEADER.size)
+    if len(header) < _HEADER.size:
+        raise DecryptionError("Not a securepass encrypted file")
+    magic, version, cipher_id, log_n, r, p, salt, nonce_prefix, chunk_size = _HEADER.unpack(header)
+    if magic != _MAGIC:
+        raise DecryptionError("Not a securepass encrypted file")
+    if version != _VERSION:
+        raise DecryptionError(f"Unsupported encrypted file version: {version}")
+    ciphers = {value: name for name, value in _CIPHER_IDS.items()}
+    if (cipher_id not in ciphers or not _MIN_WORK_FACTOR <= log_n <= _MAX_WORK_FACTOR
+            or not 1 <= r <= _SCRYPT_R or not 1 <= p <= _MAX_SCRYPT_P):
+        raise DecryptionError("Unsupported encryption parameters")
+
+    try:
+        key = _derive_key(passphrase, salt, log_n, r, p)
+    except ValueError as e:
+        raise DecryptionError(f"Unsupported encryption parameters: {e}")
+    chunk_cipher = _ChunkCipher(ciphers[cipher_id], key)
+    max_sealed = chunk_size + chunk_cipher.tag_size
+    index = 0
+    while True:
+        record = _read_exact(fileobj, _RECORD.size)
+        if len(record) < _RECORD.size:
+            raise DecryptionError("Encrypted file is truncated")
+        final, size = _RECORD.unpack(record)
+        if final > 1 or not chunk_cipher.tag_size <= size <= max_sealed:
+            raise DecryptionError("Encrypted file is corrupted")
+        sealed = _read_exact(fileobj, size)
+        if len(sealed) < size:
+            raise DecryptionError("Encrypted file is truncated")
+        nonce = nonce_prefix + struct.pack(">Q", index)
+        yield chunk_cipher.open(nonce, sealed, _chunk_aad(header, index, bool(final)))
+        if final:
+            break
+        index += 1
+    if fileobj.read(1):
+        raise DecryptionError("Unexpected data after the final chunk")
@@ -0,0 +1,224 @@
+"""
+Buffered Randomness with Continuous Health Tests
+
+Reads operating system randomness in large refill blocks and runs the NIST
+SP 800-90B continuous health tests (repetition count test and adaptive
+proportion test) over every block before any byte of it is used, in full
+on the first bytes of each period and on sampled bytes elsewhere. A failed
+test raises EntropyHealthError and permanently stops the pool.
+"""
+
+import math
+import os
+import threading
+import weakref
+from time import perf_counter
+from typing import Callable, Optional, Tuple
+
+from securepass import stats as _stats
+
+# Default refill size; a multiple of the adaptive proportion test window
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+# Health test sampling: the first 16 KiB of every 8 MiB are tested in full,
+# the rest every 256th byte, keeping the tests under 2% of batch generation
+DEFAULT_FULL_BYTES = 1 << 14
+DEFAULT_PERIOD = 1 << 23
+DEFAULT_STRIDE = 256
+
+
+class EntropyHealthError(RuntimeError):
+    """Raised when a continuous health test detects a failing entropy source."""
+
+
+def _binomial_critical(n: int, p: float, alpha: float) -> int:
+    """Return the smallest k such that P(X > k) <= alpha for X ~ Binomial(n, p)."""
+    pmf = [math.comb(n, k) * p ** k * (1 - p) ** (n - k) for k in range(n + 1)]
+    tail = 0.0
+    for k in range(n, -1, -1):
+        if tail + pmf[k] > alpha:
+            return k
+        tail += pmf[k]
+    return 0
+
+
+class HealthTests:
+    """SP 800-90B section 4.4 continuous health tests over byte samples.
+
+    Testing every sample in pure Python costs several times what it takes
+    to read the bytes, so the tests are sampled: of every ``period`` bytes
+    the first ``full_bytes`` are tested sample by sample, and the rest
+    through every ``stride``-th sample. A stuck or heavily biased source is
+    still caught in the block where it appears, and the start of a stream
+    (including every small read) is always tested in full. With ``period``
+    equal to ``full_bytes`` every sample is tested.
+
+    Both tests are stateful across blocks, so a run or window that straddles
+    two refills is still evaluated.
+
+    Attributes:
+        rct_cutoff: Identical consecutive samples that fail the repetition count test
+        apt_cutoff: Occurrences of a window's first sample that fail the
+            adaptive proportion test
+        window: Adaptive proportion test window size in samples
+    """
+
+    def __init__(self, min_entropy: float = 8.0, alpha_exponent: int = 40, window: int = 512,
+                 full_bytes: int = DEFAULT_FULL_BYTES, period: int = DEFAULT_PERIOD,
+                 stride: int = DEFAULT_STRIDE):
+        """Derive test cutoffs from the claimed entropy per byte.
+
+        Args:
+            min_entropy: Assessed min-entropy per byte sample (bits, 0 < H <= 8)
+            alpha_exponent: False positive probability per sample is 2**-alpha_exponent
+            window: Adaptive proportion test window size
+            full_bytes: Bytes tested sample by sample at the start of every period
+            period: Length in bytes of one full-then-strided testing cycle
+            stride: Distance between tested samples in the rest of a period
+        """
+        if not 0 < min_entropy <= 8:
+            raise ValueError(f"Invalid min-entropy per byte: {min_entropy}")
+        if not 0 < full_bytes <= period or stride < 1:
+            raise ValueError(f"Invalid sampling: {full_bytes} of {period} bytes, stride {stride}")
+        alpha = 2.0 ** -alpha_exponent
+        self.rct_cutoff = 1 + math.ceil(alpha_exponent / min_entropy)
+        self.apt_cutoff = 1 + _binomial_critical(window, 2.0 ** -min_entropy, alpha)
+        self.window = window
+        self.full_bytes = full_bytes
+        self.period = period
+        self.stride = stride
+        self.failed = False
+        self._zero_run = b"\0" * (self.rct_cutoff - 1)
+        self._position = 0
+        # (RCT tail, APT pending window) of the full and the strided sample streams
+        self._full = (b"", b"")
+        self._sampled = (b"", b"")
+
+    def check(self, block: bytes) -> None:
+        """Run both tests over the next block of samples.
+
+        Raises:
+            EntropyHealthError: If either test fails, now or previously
+        """
+        if self.failed:
+            raise EntropyHealthError("Entropy source previously failed a health test")
+        start = 0
+        while start < len(block):
+            offset = (self._position + start) % self.period
+            if offset < self.full_bytes:
+                end = min(len(block), start + self.full_bytes - offset)
+                self._full = self._test(block[start:end], *self._full)
+            else:
+                end = min(len(block), start + self.period - offset)
+                # Every stride-th byte of the stream, wherever block boundaries fall
+                first = start + (-(self._position + start)) % self.stride
+                self._sampled = self._test(block[first:end:self.stride], *self._sampled)
+                # The next fully tested bytes do not continue these ones
+                self._full = (b"", b"")
+            start = end
+        self._position += len(block)
+
+    def _test(self, block: bytes, tail: bytes, pending: bytes) -> Tuple[bytes, bytes]:
+        """Test the next samples of a stream, returning its new (tail, pending) state."""
+        if not block:
+            return tail, pending
+
+        # Repetition count test. Byte i of x ^ (x >> 8) is zero exactly when
+        # samples i and i + 1 are equal, so a run of rct_cutoff identical
+        # samples shows up as rct_cutoff - 1 consecutive zero bytes.
+        data = tail + block
+        x = int.from_bytes(data, "little")
+        diffs = (x ^ (x >> 8)).to_bytes(len(data), "little")
+        if self._zero_run in diffs[:-1]:
+            self._fail("repetition count test")
+        tail = data[-(self.rct_cutoff - 1):]
+
+        # Adaptive proportion test over consecutive, non-overlapping windows
+        data = pending + block if pending else block
+        window = self.window
+        end = len(data) - len(data) % window
+        if end:
+            starts = range(0, end, window)
+            worst = max(map(data.count, data[0:end:window], starts, range(window, end + 1, window)))
+            if worst >= self.apt_cutoff:
+                self._fail("adaptive proportion test")
+        return tail, data[end:]
+
+    def _fail(self, test: str) -> None:
+        self.failed = True
+        raise EntropyHealthError(f"Entropy source failed the {test}")
+
+
+# Live pools, emptied in forked children by _discard_pools_after_fork
+_POOLS: "weakref.WeakSet[EntropyPool]" = weakref.WeakSet()
+
+
+def _discard_pools_after_fork() -> None:
+    for pool in list(_POOLS):
+        pool._discard()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_discard_pools_after_fork)
+
+
+class EntropyPool:
+    """Block-buffered randomness whose every byte passes the health tests.
+
+    The buffer is discarded in forked children so that parent and child never
+    hand out the same bytes.
+    """
+
+    def __init__(
+        self,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        source: Callable[[int], bytes] = os.urandom,
+        health: Optional[HealthTests] = None,
+    ):
+        self.block_size = block_size
+        self.health = health if health is not None else HealthTests()
+        self._source = source
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+        _POOLS.add(self)
+
+    def _discard(self) -> None:
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _fetch(self, count: int) -> bytes:
+        """Read ``count`` bytes from the source and health-test them."""
+        if self.health.failed:
+            raise EntropyHealthError("Entropy source previously failed a health test")
+        collector = _stats._state.active
+        if collector is None:
+            block = self._source(count)
+            self.health.check(block)
+            return block
+        start = perf_counter()
+        block = self._source(count)
+        tested = perf_counter()
+        self.health.check(block)
+        collector.add(read_seconds=tested - start, health_seconds=perf_counter() - tested)
+        return block
+
+    def read(self, count: int) -> bytes:
+        """Return ``count`` health-tested random bytes.
+
+        Raises:
+            EntropyHealthError: If the source has failed a health test
+        """
+        with self._lock:
+            if count > self.block_size:
+                return self._fetch(count)
+            end = self._offset + count
+            if end > len(self._buffer):
+                # Keep the unused tail; every byte is handed out exactly once
+                self._buffer = self._buffer[self._offset:] + self._fetch(self.block_size)
+                self._offset = 0
+                end = count
+            data = self._buffer[self._offset:end]
+            self._offset = end
+            return data
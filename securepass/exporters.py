@@ -0,0 +1,266 @@
+"""
+Password Manager Exporters
+
+Streaming writers for the import formats of common password managers:
+Bitwarden CSV and JSON, KeePass 2 XML and 1Password CSV. Each takes an
+iterator of ``(name, username, password)`` entries and writes it out in
+chunks, so exporting a whole department of 100k+ entries runs in constant
+memory with one ``write`` call per chunk.
+
+Escaping is done per column per chunk rather than per field: a column's
+values are joined into one string, checked with a single regular-expression
+search, escaped with a few ``str.replace`` passes and split back apart.
+Columns without special characters, such as usernames, are passed through
+untouched.
+"""
+
+import base64
+import json
+import os
+import re
+import uuid
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from securepass.generator import PasswordGenerator
+
+# Entries formatted and written per chunk
+DEFAULT_CHUNK_SIZE = 4096
+
+Entry = Tuple[str, str, str]
+
+# Joins a column's values; never valid inside a value (XML 1.0 forbids it outright)
+_SEP = "\0"
+_CSV_SPECIAL = re.compile('[",\r\n]')
+_XML_SPECIAL = re.compile("[&<>]")
+# Characters XML 1.0 cannot represent, apart from the separator
+_XML_INVALID = re.compile("[\x01-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _joined(values: List[str]) -> str:
+    text = _SEP.join(values)
+    if text.count(_SEP) != len(values) - 1:
+        raise ValueError("Entries cannot contain NUL characters")
+    return text
+
+
+def _csv_column(values: List[str]) -> List[str]:
+    """CSV-escape a column, quoting every value if any value needs it."""
+    text = _joined(values)
+    if not _CSV_SPECIAL.search(text):
+        return values
+    return ('"' + text.replace('"', '""').replace(_SEP, f'"{_SEP}"') + '"').split(_SEP)
+
+
+def _xml_column(values: List[str]) -> List[str]:
+    """XML-escape a column for use as element content."""
+    text = _joined(values)
+    if _XML_INVALID.search(text):
+        raise ValueError("Entries contain control characters that XML cannot represent")
+    if not _XML_SPECIAL.search(text):
+        return values
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").split(_SEP)
+
+
+class Exporter:
+    """Base class of the streaming exporters.
+
+    Example::
+
+        with open("vault.csv", "w", encoding="utf-8") as f:
+            with BitwardenCSVExporter(f) as exporter:
+                exporter.write(entries)
+    """
+
+    def __init__(self, out: TextIO, folder: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Prepare an export to ``out``.
+
+        Args:
+            out: Text stream to write to
+            folder: Folder (group, for KeePass) to put every entry in
+            chunk_size: Entries formatted and written at a time
+
+        Raises:
+            ValueError: If the chunk size is invalid
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size: {chunk_size}")
+        self.out = out
+        self.folder = folder
+        self.chunk_size = chunk_size
+        self.written = 0
+        self._started = False
+
+    def __enter__(self) -> "Exporter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        # A failed export is left unterminated rather than made to look complete
+        if exc_type is None:
+            self.close()
+
+    def write(self, entries: Iterable[Entry]) -> int:
+        """Write ``(name, username, password)`` entries, consumed a chunk at a time.
+
+        Returns:
+            Number of entries written by this call
+
+        Raises:
+            ValueError: If a value contains characters the format cannot hold
+        """
+        if not self._started:
+            self.out.write(self._header())
+            self._started = True
+        entries = iter(entries)
+        written = 0
+        while True:
+            chunk = list(islice(entries, self.chunk_size))
+            if not chunk:
+                return written
+            names, usernames, passwords = (list(column) for column in zip(*chunk))
+            self.out.write(self._format(names, usernames, passwords))
+            self.written += len(chunk)
+            written += len(chunk)
+
+    def close(self) -> None:
+        """Finish the document and flush the stream."""
+        if not self._started:
+            self.out.write(self._header())
+            self._started = True
+        self.out.write(self._footer())
+        self.out.flush()
+
+    def _header(self) -> str:
+        return ""
+
+    def _footer(self) -> str:
+        return ""
+
+    def _format(self, names: List[str], usernames: List[str], passwords: List[str]) -> str:
+        raise NotImplementedError
+
+
+class BitwardenCSVExporter(Exporter):
+    """Bitwarden's CSV import format (individual vault)."""
+
+    def _header(self) -> str:
+        return ("folder,favorite,type,name,notes,fields,reprompt,"
+                "login_uri,login_username,login_password,login_totp\n")
+
+    def _format(self, names: List[str], usernames: List[str], passwords: List[str]) -> str:
+        folder = _csv_column([self.folder or ""])[0]
+        return "".join(
+            f"{folder},,login,{name},,,0,,{username},{password},\n"
+            for name, username, password in zip(_csv_column(names), _csv_column(usernames),
+                                                _csv_column(passwords))
+        )
+
+
+class BitwardenJSONExporter(Exporter):
+    """Bitwarden's unencrypted JSON export format."""
+
+    def __init__(self, out: TextIO, folder: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(out, folder, chunk_size)
+        self._folder_id = str(uuid.uuid4()) if folder else None
+
+    def _header(self) -> str:
+        folders = [{"id": self._folder_id, "name": self.folder}] if self.folder else []
+        return f'{{"encrypted": false, "folders": {json.dumps(folders)}, "items": ['
+
+    def _footer(self) -> str:
+        return "]}\n"
+
+    def _format(self, names: List[str], usernames: List[str], passwords: List[str]) -> str:
+        items = [
+            {"type": 1, "name": name, "folderId": self._folder_id, "favorite": False, "reprompt": 0,
+             "notes": None, "login": {"username": username, "password": password, "uris": [], "totp": None}}
+            for name, username, password in zip(names, usernames, passwords)
+        ]
+        # One encoder call per chunk; the list brackets become the separating comma
+        text = json.dumps(items, ensure_ascii=False)[1:-1]
+        return text if self.written == 0 else "," + text
+
+
+class KeePassXMLExporter(Exporter):
+    """KeePass 2 XML, importable by KeePass, KeePassXC and compatible managers."""
+
+    def _header(self) -> str:
+        group = _xml_column([self.folder or "Imported"])[0]
+        return (f'<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+                f"<KeePassFile>\n<Root>\n<Group>\n<UUID>{_uuids(1)[0]}</UUID>\n<Name>{group}</Name>\n")
+
+    def _footer(self) -> str:
+        return "</Group>\n</Root>\n</KeePassFile>\n"
+
+    def _format(self, names: List[str], usernames: List[str], passwords: List[str]) -> str:
+        return "".join(
+            f"<Entry><UUID>{entry_id}</UUID>"
+            f"<String><Key>Title</Key><Value>{name}</Value></String>"
+            f"<String><Key>UserName</Key><Value>{username}</Value></String>"
+            f'<String><Key>Password</Key><Value ProtectInMemory="True">{password}</Value></String>'
+            f"</Entry>\n"
+            for entry_id, name, username, password in zip(_uuids(len(names)), _xml_column(names),
+                                                          _xml_column(usernames), _xml_column(passwords))
+        )
+
+
+class OnePasswordCSVExporter(Exporter):
+    """1Password's CSV import format for logins."""
+
+    def __init__(self, out: TextIO, folder: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if folder:
+            raise ValueError("1Password CSV has no folders; import into a vault instead")
+        super().__init__(out, folder, chunk_size)
+
+    def _header(self) -> str:
+        return "Title,Website,Username,Password,Notes\n"
+
+    def _format(self, names: List[str], usernames: List[str], passwords: List[str]) -> str:
+        return "".join(
+            f"{name},,{username},{password},\n"
+            for name, username, password in zip(_csv_column(names), _csv_column(usernames),
+                                                _csv_column(passwords))
+        )
+
+
+def _uuids(count: int) -> List[str]:
+    """Random KeePass UUIDs (base64 of 16 bytes) from one ``os.urandom`` call."""
+    raw = os.urandom(16 * count)
+    return [base64.b64encode(raw[i:i + 16]).decode("ascii") for i in range(0, len(raw), 16)]
+
+
+EXPORTERS = {
+    "bitwarden-csv": BitwardenCSVExporter,
+    "bitwarden-json": BitwardenJSONExporter,
+    "keepass-xml": KeePassXMLExporter,
+    "1password-csv": OnePasswordCSVExporter,
+}
+FORMATS = tuple(EXPORTERS)
+
+
+def open_exporter(fmt: str, out: TextIO, folder: Optional[str] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Exporter:
+    """Create the exporter for format ``fmt`` (one of :data:`FORMATS`).
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(FORMATS)})")
+    return EXPORTERS[fmt](out, folder, chunk_size)
+
+
+def with_passwords(accounts: Iterable[Tuple[str, str]], length: int = 20, charset: str = "full",
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Entry]:
+    """Add a generated password to each ``(name, username)`` pair.
+
+    Passwords are drawn one batch per chunk of accounts.
+    """
+    accounts = iter(accounts)
+    while True:
+        chunk = list(islice(accounts, chunk_size))
+        if not chunk:
+            return
+        passwords = PasswordGenerator.generate_passwords(len(chunk), length, charset).tolist()
+        for (name, username), password in zip(chunk, passwords):
+            yield name, username, password
@@ -1,6 +1,188 @@
-import random
 import string
-from typing import Literal
+import threading
+from functools import lru_cache
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, ContextManager, List, Literal, Optional, Union
+
+from securepass import stats as _stats
+from securepass.batch import PasswordBatch
+from securepass.dedup import make_unique
+from securepass.entropy import EntropyPool
+from securepass.stats import GeneratorStats
+
+if TYPE_CHECKING:
+    from securepass.rules import PasswordPolicy
+
+
+# One buffered, health-tested entropy pool per thread, so concurrent
+# generation never contends on a shared lock
+_local = threading.local()
+
+# Default memory the duplicate check of a unique batch may use
+DEFAULT_DEDUP_MEMORY = 256 * 1024 * 1024
+
+# Consecutive candidates a ``reject`` predicate may turn down before giving up
+MAX_REJECTED_DRAWS = 1000
+
+# Whole-password redraws when required positions leave max-consecutive unsatisfiable
+MAX_POLICY_DRAWS = 100
+
+# Characters mapped per batch fill step, bounding transient randomness buffers
+_FILL_CHUNK = 1 << 20
+
+# Characters 0..127, each its own index: sampling the first n draws positions below n
+_POSITIONS = "".join(map(chr, range(128)))
+
+# Maps each "full" character to its class: 0 upper, 1 lower, 2 digit, 3 punctuation
+_CHARACTER_CLASS_IDS = bytes(
+    1 if chr(b) in string.ascii_lowercase
+    else 2 if chr(b) in string.digits
+    else 3 if chr(b) in string.punctuation
+    else 0
+    for b in range(256)
+)
+
+
+class _CharsetTable:
+    """Compiled, immutable byte-translation table for one alphabet.
+
+    Random bytes are mapped onto the alphabet with ``bytes.translate``; bytes
+    that would introduce modulo bias are deleted in the same call, so the
+    whole rejection-sampling step runs in C.
+    """
+
+    __slots__ = ("alphabet", "_table", "_reject", "_ratio")
+
+    def __init__(self, alphabet: str):
+        encoded = alphabet.encode("ascii")
+        if not encoded or len(encoded) > 256:
+            raise ValueError("Charset must contain between 1 and 256 ASCII characters")
+
+        size = len(encoded)
+        limit = 256 - 256 % size
+        self.alphabet = alphabet
+        self._table = bytes(encoded[b % size] for b in range(256))
+        self._reject = bytes(range(limit, 256))
+        self._ratio = limit / 256
+
+    def sample(self, count: int) -> bytes:
+        """Return ``count`` characters drawn uniformly from the alphabet."""
+        collector = _stats._state.active
+        out = b""
+        reads = 0
+        while len(out) < count:
+            needed = count - len(out)
+            raw = _read_random(int(needed / self._ratio) + 16)
+            if collector is None:
+                out += raw.translate(self._table, self._reject)
+            else:
+                start = perf_counter()
+                out += raw.translate(self._table, self._reject)
+                collector.add(map_seconds=perf_counter() - start)
+            reads += 1
+        if collector is not None and reads > 1:
+            collector.add(retries=reads - 1)
+        return out[:count]
+
+
+def _thread_pool() -> EntropyPool:
+    """Return the calling thread's entropy pool, creating it on first use."""
+    try:
+        return _local.pool
+    except AttributeError:
+        pool = _local.pool = EntropyPool()
+        return pool
+
+
+def _read_random(count: int) -> bytes:
+    """Read ``count`` health-tested bytes from the calling thread's pool."""
+    collector = _stats._state.active
+    if collector is not None:
+        collector.add(random_bytes=count)
+    return _thread_pool().read(count)
+
+
+@lru_cache(maxsize=256)
+def _charset_table(alphabet: str) -> _CharsetTable:
+    """Return the cached compiled table for ``alphabet``."""
+    return _CharsetTable(alphabet)
+
+
+def sample_chars(alphabet: str, count: int) -> bytes:
+    """Draw ``count`` characters uniformly from an ASCII alphabet.
+
+    Args:
+        alphabet: Characters to draw from (ASCII only)
+        count: Number of characters to draw
+
+    Returns:
+        The drawn characters as ASCII bytes
+    """
+    return _charset_table(alphabet).sample(count)
+
+
+def _fill_passwords(
+    table: _CharsetTable,
+    full: bool,
+    count: int,
+    length: int,
+    reject: Optional[Callable[[str], bool]] = None,
+) -> bytearray:
+    """Draw ``count`` packed passwords; ``full`` enforces all four character classes.
+
+    Passwords for which ``reject`` returns True are redrawn.
+    """
+    buffer = bytearray(count * length)
+    step = max(1, _FILL_CHUNK // length) * length
+    for offset in range(0, len(buffer), step):
+        end = min(offset + step, len(buffer))
+        buffer[offset:end] = table.sample(end - offset)
+
+    if full or reject is not None:
+        for offset in range(0, len(buffer), length):
+            end = offset + length
+            password = buffer[offset:end]
+            accepted = _accepted(table, full, length, reject, password)
+            if accepted is not password:
+                buffer[offset:end] = accepted
+    return buffer
+
+
+def _accepted(
+    table: _CharsetTable,
+    full: bool,
+    length: int,
+    reject: Optional[Callable[[str], bool]],
+    password: bytes,
+) -> bytes:
+    """Redraw ``password`` until it has every class (if ``full``) and passes ``reject``.
+
+    Raises:
+        RuntimeError: If ``reject`` turns down MAX_REJECTED_DRAWS candidates in a row
+    """
+    rejected = 0
+    while True:
+        if full and len(set(password.translate(_CHARACTER_CLASS_IDS))) < 4:
+            password = table.sample(length)
+            continue
+        if reject is not None and reject(password.decode("ascii")):
+            rejected += 1
+            if rejected >= MAX_REJECTED_DRAWS:
+                raise RuntimeError(f"{rejected} consecutive candidates were rejected")
+            password = table.sample(length)
+            continue
+        return password
+
+
+def _randbelow(n: int) -> int:
+    """Return a uniform random integer in ``[0, n)``."""
+    bits = n.bit_length()
+    nbytes = (bits + 7) // 8
+    mask = (1 << bits) - 1
+    while True:
+        value = int.from_bytes(_read_random(nbytes), "big") & mask
+        if value < n:
+            return value
 
 
 class PasswordGenerator:
@@ -16,16 +198,158 @@ class PasswordGenerator:
     def generate_password(
         length: int = 20,
         charset: Literal["full", "alnum", "letters", "digits"] = "full",
+        reject: Optional[Callable[[str], bool]] = None,
     ) -> str:
         """Generate a secure random password.
         
         Args:
             length: Length of the password (8-128 characters)
             charset: Character set to use
+            reject: Optional predicate; candidates for which it returns True
+                (e.g. ``BreachCorpus.contains``) are redrawn
             
         Returns:
             Generated password string
             
+        Raises:
+            ValueError: If invalid charset is provided or length is out of range
+        """
+        characters = PasswordGenerator._validated_charset(length, charset)
+
+        try:
+            table = _charset_table(characters)
+            password = table.sample(length)
+
+            # For "full" charset, ensure at least one of each character type by
+            # redrawing passwords that miss one (uniform over valid passwords);
+            # candidates turned down by ``reject`` are redrawn the same way
+            if charset == "full" or reject is not None:
+                password = _accepted(table, charset == "full", length, reject, password)
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate password: {str(e)}")
+
+        collector = _stats._state.active
+        if collector is None:
+            return password.decode("ascii")
+        start = perf_counter()
+        result = password.decode("ascii")
+        collector.add(passwords=1, join_seconds=perf_counter() - start)
+        return result
+
+    @staticmethod
+    def generate_passwords(
+        count: int,
+        length: int = 20,
+        charset: Literal["full", "alnum", "letters", "digits"] = "full",
+        unique: bool = False,
+        memory_budget: int = DEFAULT_DEDUP_MEMORY,
+        reject: Optional[Callable[[str], bool]] = None,
+    ) -> PasswordBatch:
+        """Generate many passwords at once into a packed PasswordBatch.
+
+        Randomness is read and mapped in large blocks straight into one
+        ``bytearray``; passwords are only decoded to ``str`` when accessed.
+        For the "full" charset every password contains an uppercase letter,
+        a lowercase letter, a digit and a punctuation character; passwords
+        missing a class are redrawn, which keeps the result uniform over all
+        qualifying passwords.
+
+        With ``unique=True`` duplicates are replaced by fresh draws until all
+        passwords differ (see :mod:`securepass.dedup`); the number replaced
+        is available as ``batch.collisions``.
+
+        Args:
+            count: Number of passwords to generate
+            length: Length of each password (8-128 characters)
+            charset: Character set to use
+            unique: Guarantee that no password occurs twice in the batch
+            memory_budget: Bytes the duplicate check may use
+            reject: Optional predicate; passwords for which it returns True
+                are redrawn, including replacements for duplicates
+
+        Returns:
+            PasswordBatch holding ``count`` passwords
+
+        Raises:
+            ValueError: If count is negative, the charset is invalid, the
+                length is out of range or a unique batch cannot be produced
+        """
+        if count < 0:
+            raise ValueError(f"Invalid password count: {count}")
+        characters = PasswordGenerator._validated_charset(length, charset)
+        if unique and count > len(characters) ** length:
+            raise ValueError(f"Cannot generate {count} unique passwords of length {length}")
+
+        full = charset == "full"
+        try:
+            table = _charset_table(characters)
+            buffer = _fill_passwords(table, full, count, length, reject)
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate passwords: {str(e)}")
+
+        collisions = 0
+        if unique:
+            collisions = make_unique(
+                buffer, length, lambda n: _fill_passwords(table, full, n, length, reject), memory_budget
+            )
+
+        collector = _stats._state.active
+        if collector is not None:
+            collector.add(passwords=count, collisions=collisions)
+        batch = PasswordBatch(buffer, length)
+        batch.collisions = collisions
+        return batch
+
+    @staticmethod
+    def generate_token(prefix: str = "sp_live_", length: int = 30) -> str:
+        """Generate a checksummed API token such as ``sp_live_<random><checksum>``.
+
+        Args:
+            prefix: Token prefix ending in ``_``
+            length: Random ``alnum`` characters (16-128); a 6-character
+                base62 CRC-32 checksum is appended
+
+        Returns:
+            Generated token; see :func:`securepass.tokens.validate_many`
+
+        Raises:
+            ValueError: If the prefix or length is invalid
+        """
+        return PasswordGenerator.generate_tokens(1, prefix, length)[0]
+
+    @staticmethod
+    def generate_tokens(count: int, prefix: str = "sp_live_", length: int = 30) -> PasswordBatch:
+        """Generate ``count`` checksummed API tokens as a batch; see :meth:`generate_token`."""
+        from securepass.tokens import generate_tokens
+
+        return generate_tokens(count, prefix, length)
+
+    @staticmethod
+    def generate_pin(length: int = 6) -> str:
+        """Generate a numeric PIN that is not a repeat, sequence, date or common PIN.
+
+        Args:
+            length: Number of digits (4-12)
+
+        Returns:
+            Generated PIN; see :class:`securepass.pins.PinGenerator`
+
+        Raises:
+            ValueError: If the length is out of range
+        """
+        return PasswordGenerator.generate_pins(1, length)[0]
+
+    @staticmethod
+    def generate_pins(count: int, length: int = 6) -> PasswordBatch:
+        """Generate ``count`` PINs as a batch; see :meth:`generate_pin`."""
+        from securepass.pins import PinGenerator
+
+        return PinGenerator(length).generate(count)
+
+    @staticmethod
+    def _validated_charset(length: int, charset: str) -> str:
+        """Validate a length/charset pair and return the charset characters.
+
         Raises:
             ValueError: If invalid charset is provided or length is out of range
         """
@@ -37,32 +361,195 @@ class PasswordGenerator:
             raise ValueError(f"Invalid charset: {charset}")
 
         characters = PasswordGenerator.charsets[charset]
-        
+
         if not characters:
             raise ValueError("Selected charset is empty")
+        return characters
 
-        try:
-            secure_random = random.SystemRandom()
-            
-            # For "full" charset, ensure at least one of each character type if length is sufficient
-            if charset == "full" and length >= 4:
-                # Generate base password with guaranteed character types
-                password = [
-                    secure_random.choice(string.ascii_uppercase),  # One uppercase
-                    secure_random.choice(string.ascii_lowercase),  # One lowercase
-                    secure_random.choice(string.digits),          # One digit
-                    secure_random.choice(string.punctuation)      # One special char
-                ]
-                
-                # Fill the rest randomly
-                password.extend(secure_random.choice(characters) for _ in range(length - 4))
-                
-                # Shuffle to avoid predictable pattern
-                secure_random.shuffle(password)
-                return ''.join(password)
-            else:
-                # Standard random generation for other charsets
-                return "".join(secure_random.choice(characters) for _ in range(length))
-                
-        except Exception as e:
-            raise RuntimeError(f"Failed to generate password: {str(e)}")
\ No newline at end of file
+    @staticmethod
+    def generate_from_rules(
+        rules: Union[str, "PasswordPolicy"],
+        length: Optional[int] = None,
+        reject: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Generate a password satisfying a ``passwordrules`` requirement string.
+
+        The rules are compiled once (see :func:`securepass.rules.parse_rules`)
+        and every requirement is met by construction, so no generated
+        password has to be validated and thrown away.
+
+        Args:
+            rules: Rule string such as ``"required: upper; minlength: 12"``
+                or an already compiled policy
+            length: Password length; defaults to 20 clamped to the policy range
+            reject: Optional predicate; candidates for which it returns True
+                (e.g. ``PasswordHistory.too_similar``) are redrawn
+
+        Returns:
+            Generated password string
+
+        Raises:
+            ValueError: If the rules are invalid or the length is out of range
+            RuntimeError: If ``reject`` turns down MAX_REJECTED_DRAWS candidates in a row
+        """
+        from securepass.rules import PasswordPolicy, parse_rules
+
+        policy = rules if isinstance(rules, PasswordPolicy) else parse_rules(rules)
+        length = policy.resolve_length(length)
+
+        chars = PasswordGenerator._draw_from_policy(policy, length)
+        rejected = 0
+        while reject is not None and reject(chars.decode("ascii")):
+            rejected += 1
+            if rejected >= MAX_REJECTED_DRAWS:
+                raise RuntimeError(f"{rejected} consecutive candidates were rejected")
+            chars = PasswordGenerator._draw_from_policy(policy, length)
+
+        collector = _stats._state.active
+        if collector is None:
+            return chars.decode("ascii")
+        start = perf_counter()
+        password = chars.decode("ascii")
+        collector.add(passwords=1, join_seconds=perf_counter() - start)
+        return password
+
+    @staticmethod
+    def generate_from_rules_many(
+        rules: Union[str, "PasswordPolicy"],
+        length: Optional[int],
+        count: int,
+        reject: Optional[Callable[[str], bool]] = None,
+    ) -> PasswordBatch:
+        """Generate ``count`` passwords satisfying ``rules`` into a packed PasswordBatch.
+
+        The batch counterpart of :meth:`generate_from_rules`: the characters of
+        every password, the required characters and their positions are each
+        drawn in one block. Only passwords whose runs cannot be broken, or
+        that ``reject`` turns down, are redrawn one at a time.
+
+        Args:
+            rules: Rule string or an already compiled policy
+            length: Password length; None for 20 clamped to the policy range
+            count: Number of passwords to generate
+            reject: Optional predicate; passwords for which it returns True
+                are redrawn
+
+        Returns:
+            PasswordBatch holding ``count`` passwords
+
+        Raises:
+            ValueError: If count is negative, the rules are invalid or the
+                length is out of range
+            RuntimeError: If ``reject`` turns down MAX_REJECTED_DRAWS candidates in a row
+        """
+        from securepass.rules import PasswordPolicy, parse_rules
+
+        if count < 0:
+            raise ValueError(f"Invalid password count: {count}")
+        policy = rules if isinstance(rules, PasswordPolicy) else parse_rules(rules)
+        length = policy.resolve_length(length)
+
+        buffer = _fill_passwords(_charset_table(policy.alphabet), False, count, length)
+        picks = [sample_chars(required, count) for required in policy.required]
+        slots = [sample_chars(_POSITIONS[:length - i], count) for i in range(len(policy.required))]
+        for n, offset in enumerate(range(0, len(buffer), length)):
+            chars = buffer[offset:offset + length]
+            fixed = _place_required(chars, [slot[n] for slot in slots], [pick[n] for pick in picks])
+            if policy.max_consecutive is not None and not _break_runs(chars, policy, fixed):
+                chars = PasswordGenerator._draw_from_policy(policy, length)
+            rejected = 0
+            while reject is not None and reject(chars.decode("ascii")):
+                rejected += 1
+                if rejected >= MAX_REJECTED_DRAWS:
+                    raise RuntimeError(f"{rejected} consecutive candidates were rejected")
+                chars = PasswordGenerator._draw_from_policy(policy, length)
+            buffer[offset:offset + length] = chars
+
+        collector = _stats._state.active
+        if collector is not None:
+            collector.add(passwords=count)
+        return PasswordBatch(buffer, length)
+
+    @staticmethod
+    def _draw_from_policy(policy: "PasswordPolicy", length: int) -> bytearray:
+        """Draw one password meeting every requirement of ``policy`` by construction.
+
+        Raises:
+            ValueError: If max-consecutive could not be met in MAX_POLICY_DRAWS draws
+        """
+        for _ in range(MAX_POLICY_DRAWS):
+            chars = bytearray(sample_chars(policy.alphabet, length))
+            fixed = _place_required(
+                chars,
+                [_randbelow(length - i) for i in range(len(policy.required))],
+                [sample_chars(required, 1)[0] for required in policy.required],
+            )
+
+            # Required positions can rule out every valid arrangement; draw afresh
+            if policy.max_consecutive is None or _break_runs(chars, policy, fixed):
+                return chars
+        raise ValueError("Password rules cannot be satisfied: max-consecutive is too strict")
+
+    @staticmethod
+    def stats() -> ContextManager[GeneratorStats]:
+        """Collect the calling thread's generation statistics for a ``with`` block.
+
+        Example::
+
+            with PasswordGenerator.stats() as stats:
+                PasswordGenerator.generate_from_rules("required: digit")
+            print(stats.as_dict())
+
+        Returns:
+            Context manager yielding the active GeneratorStats collector
+        """
+        return _stats.collect()
+
+
+def _place_required(chars: bytearray, slots: List[int], picks: List[int]) -> set:
+    """Write one character of every required class at distinct random positions.
+
+    ``slots[i]`` is uniform below ``len(chars) - i`` and picks the i-th
+    position by a partial Fisher-Yates shuffle; ``picks[i]`` is the character
+    placed there.
+
+    Returns:
+        The positions written
+    """
+    positions = list(range(len(chars)))
+    for i, (slot, pick) in enumerate(zip(slots, picks)):
+        j = i + slot
+        positions[i], positions[j] = positions[j], positions[i]
+        chars[positions[i]] = pick
+    return set(positions[:len(slots)])
+
+
+def _break_runs(chars: bytearray, policy: "PasswordPolicy", fixed: set) -> bool:
+    """Redraw characters in place until no run exceeds ``policy.max_consecutive``.
+
+    Returns:
+        False if the runs could not be broken within a bounded number of redraws
+
+    Raises:
+        ValueError: If the alphabet has a single character
+    """
+    limit = policy.max_consecutive
+    if len(policy.alphabet) == 1 and len(chars) > limit:
+        raise ValueError("Password rules cannot be satisfied: max-consecutive is too strict")
+    redraws = 0
+    i = limit
+    while i < len(chars):
+        if chars.count(chars[i], i - limit, i + 1) <= limit:
+            i += 1
+            continue
+
+        # Redraw the right-most free position of the offending run
+        j = next((k for k in range(i, i - limit - 1, -1) if k not in fixed), None)
+        redraws += 1
+        if j is None or redraws > 4 * len(chars):
+            return False
+        old = chars[j]
+        while chars[j] == old:
+            chars[j] = sample_chars(policy.alphabet, 1)[0]
+        i = max(j, limit)
+    return True
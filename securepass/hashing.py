@@ -0,0 +1,342 @@
+"""
+Password Hashing for Provisioning
+
+Hashes generated passwords for storage with scrypt, PBKDF2-SHA256, bcrypt or
+argon2id. Key derivation is orders of magnitude slower than generation, so
+:func:`hash_passwords` spreads the work over a process pool whose size is
+bounded both by the CPU count and by how many concurrent derivations of the
+chosen KDF fit in memory. Results are streamed back in input order.
+
+bcrypt and argon2 need the optional ``bcrypt`` and ``argon2-cffi`` packages;
+scrypt and PBKDF2 use :mod:`hashlib`.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from collections import deque
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMES = ("scrypt", "pbkdf2", "bcrypt", "argon2")
+FORMATS = ("jsonl", "htpasswd", "shadow")
+
+# Schemes the consumer of each format can verify: Apache htpasswd and crypt(3)
+# understand bcrypt but none of scrypt, PBKDF2 or argon2
+FORMAT_SCHEMES: Dict[str, Tuple[str, ...]] = {
+    "jsonl": SCHEMES,
+    "htpasswd": ("bcrypt",),
+    "shadow": ("bcrypt",),
+}
+
+# Formats holding the hash alone, without the plaintext
+HASH_ONLY_FORMATS = ("htpasswd", "shadow")
+
+# Default cost parameters per scheme (OWASP password storage recommendations)
+DEFAULT_PARAMS: Dict[str, Dict[str, int]] = {
+    "scrypt": {"ln": 15, "r": 8, "p": 1},
+    "pbkdf2": {"rounds": 600_000},
+    "bcrypt": {"rounds": 12},
+    "argon2": {"time_cost": 3, "memory_cost": 65536, "parallelism": 4},
+}
+
+# Memory assumed per worker process on top of the KDF itself
+_WORKER_OVERHEAD = 32 * 1024 * 1024
+
+# Passwords sent to a worker per task
+DEFAULT_CHUNK_SIZE = 4
+
+_SALT_BYTES = 16
+
+
+def _b64(data: bytes) -> str:
+    """Unpadded base64, as used in modular crypt strings."""
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _import_bcrypt():
+    """Safely import bcrypt."""
+    try:
+        import bcrypt
+        return bcrypt
+    except ImportError as e:
+        raise ImportError(f"bcrypt not installed: {str(e)}")
+
+
+def _import_argon2():
+    """Safely import argon2-cffi."""
+    try:
+        import argon2
+        return argon2
+    except ImportError as e:
+        raise ImportError(f"argon2-cffi not installed: {str(e)}")
+
+
+def resolve_params(scheme: str, params: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Return the cost parameters for ``scheme`` with ``params`` applied on top.
+
+    Raises:
+        ValueError: If the scheme or a parameter name is unknown
+    """
+    if scheme not in DEFAULT_PARAMS:
+        raise ValueError(f"Invalid hash scheme: {scheme}")
+    resolved = dict(DEFAULT_PARAMS[scheme])
+    for name, value in (params or {}).items():
+        if name not in resolved:
+            raise ValueError(f"Invalid parameter for {scheme}: {name}")
+        resolved[name] = int(value)
+    return resolved
+
+
+def memory_cost(scheme: str, params: Optional[Dict[str, int]] = None) -> int:
+    """Return the bytes one derivation of ``scheme`` needs."""
+    p = resolve_params(scheme, params)
+    if scheme == "scrypt":
+        return 128 * p["r"] * (2 ** p["ln"] + p["p"] + 1)
+    if scheme == "argon2":
+        return p["memory_cost"] * 1024
+    if scheme == "bcrypt":
+        return 4 * 1024
+    return 1024
+
+
+def _available_memory() -> int:
+    """Return the physical memory currently available, or 0 if unknown."""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+def plan_workers(
+    scheme: str,
+    params: Optional[Dict[str, int]] = None,
+    workers: Optional[int] = None,
+    memory_limit: Optional[int] = None,
+) -> int:
+    """Choose how many hashing processes to run.
+
+    At most one process per CPU (or ``workers``), and no more than fit in
+    ``memory_limit`` given each process's KDF memory plus interpreter
+    overhead. Memory-hard settings therefore run fewer processes at once
+    instead of pushing the machine into swap.
+
+    Args:
+        scheme: Hash scheme
+        params: Cost parameter overrides
+        workers: Upper bound on processes; defaults to the CPU count
+        memory_limit: Bytes all processes may use together; defaults to half
+            of the currently available memory
+
+    Returns:
+        Number of processes, at least 1
+    """
+    limit = workers if workers is not None else (os.cpu_count() or 1)
+    if memory_limit is None:
+        memory_limit = _available_memory() // 2
+    if memory_limit > 0:
+        per_worker = memory_cost(scheme, params) + _WORKER_OVERHEAD
+        limit = min(limit, memory_limit // per_worker)
+    return max(1, limit)
+
+
+def hash_password(password: str, scheme: str = "scrypt", params: Optional[Dict[str, int]] = None) -> str:
+    """Hash one password into a modular crypt string.
+
+    Args:
+        password: Password to hash
+        scheme: One of ``scrypt``, ``pbkdf2``, ``bcrypt`` or ``argon2``
+        params: Cost parameter overrides (see ``DEFAULT_PARAMS``)
+
+    Returns:
+        ``$scrypt$...``, ``$pbkdf2-sha256$...``, ``$2b$...`` or ``$argon2id$...``
+
+    Raises:
+        ValueError: If the scheme or a parameter is invalid
+        ImportError: If the optional package for bcrypt or argon2 is missing
+    """
+    p = resolve_params(scheme, params)
+    secret = password.encode("utf-8")
+    if scheme == "scrypt":
+        salt = secrets.token_bytes(_SALT_BYTES)
+        n = 2 ** p["ln"]
+        key = hashlib.scrypt(
+            secret, salt=salt, n=n, r=p["r"], p=p["p"], dklen=32,
+            maxmem=2 * memory_cost(scheme, p),
+        )
+        return f"$scrypt$ln={p['ln']},r={p['r']},p={p['p']}${_b64(salt)}${_b64(key)}"
+    if scheme == "pbkdf2":
+        salt = secrets.token_bytes(_SALT_BYTES)
+        key = hashlib.pbkdf2_hmac("sha256", secret, salt, p["rounds"])
+        return f"$pbkdf2-sha256${p['rounds']}${_b64(salt)}${_b64(key)}"
+    if scheme == "bcrypt":
+        bcrypt = _import_bcrypt()
+        return bcrypt.hashpw(secret, bcrypt.gensalt(p["rounds"])).decode("ascii")
+    argon2 = _import_argon2()
+    hasher = argon2.PasswordHasher(
+        time_cost=p["time_cost"], memory_cost=p["memory_cost"], parallelism=p["parallelism"]
+    )
+    return hasher.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Check ``password`` against a hash produced by :func:`hash_password`."""
+    secret = password.encode("utf-8")
+    if hashed.startswith("$scrypt$"):
+        _, _, settings, salt, key = hashed.split("$")
+        p = {k: int(v) for k, v in (item.split("=") for item in settings.split(","))}
+        expected = _unb64(key)
+        actual = hashlib.scrypt(
+            secret, salt=_unb64(salt), n=2 ** p["ln"], r=p["r"], p=p["p"], dklen=len(expected),
+            maxmem=2 * memory_cost("scrypt", p),
+        )
+        return hmac.compare_digest(actual, expected)
+    if hashed.startswith("$pbkdf2-sha256$"):
+        _, _, rounds, salt, key = hashed.split("$")
+        expected = _unb64(key)
+        actual = hashlib.pbkdf2_hmac("sha256", secret, _unb64(salt), int(rounds), len(expected))
+        return hmac.compare_digest(actual, expected)
+    if hashed.startswith("$2"):
+        return _import_bcrypt().checkpw(secret, hashed.encode("ascii"))
+    if hashed.startswith("$argon2"):
+        argon2 = _import_argon2()
+        try:
+            return argon2.PasswordHasher().verify(hashed, password)
+        except argon2.exceptions.VerifyMismatchError:
+            return False
+    raise ValueError("Unrecognized hash format")
+
+
+def _hash_chunk(passwords: List[str], scheme: str, params: Dict[str, int]) -> List[str]:
+    """Worker task: hash a list of passwords."""
+    return [hash_password(password, scheme, params) for password in passwords]
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def hash_passwords(
+    passwords: Iterable[str],
+    scheme: str = "scrypt",
+    params: Optional[Dict[str, int]] = None,
+    workers: Optional[int] = None,
+    memory_limit: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, str]]:
+    """Hash passwords in parallel, yielding ``(password, hash)`` in input order.
+
+    ``passwords`` is consumed lazily and at most two chunks per process are
+    in flight, so arbitrarily long streams are hashed in constant memory.
+
+    Args:
+        passwords: Passwords to hash (any iterable, e.g. a PasswordBatch)
+        scheme: Hash scheme
+        params: Cost parameter overrides
+        workers: Upper bound on processes (see :func:`plan_workers`)
+        memory_limit: Bytes all processes may use together
+        chunk_size: Passwords per worker task
+
+    Raises:
+        ValueError: If the scheme, a parameter or the chunk size is invalid
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size: {chunk_size}")
+    resolved = resolve_params(scheme, params)
+    processes = plan_workers(scheme, resolved, workers, memory_limit)
+    return _hash_stream(passwords, scheme, resolved, processes, chunk_size)
+
+
+def _hash_stream(
+    passwords: Iterable[str],
+    scheme: str,
+    params: Dict[str, int],
+    processes: int,
+    chunk_size: int,
+) -> Iterator[Tuple[str, str]]:
+    if processes == 1:
+        for chunk in _chunks(passwords, chunk_size):
+            yield from zip(chunk, _hash_chunk(chunk, scheme, params))
+        return
+
+    # Imported here: multiprocessing is costly to load and only needed for a pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending: "deque[Tuple[List[str], Any]]" = deque()
+        for chunk in _chunks(passwords, chunk_size):
+            pending.append((chunk, pool.submit(_hash_chunk, chunk, scheme, params)))
+            if len(pending) >= 2 * processes:
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+        while pending:
+            done, future = pending.popleft()
+            yield from zip(done, future.result())
+
+
+def _format_jsonl(user: str, password: str, hashed: str) -> str:
+    return json.dumps({"user": user, "password": password, "hash": hashed})
+
+
+def _format_htpasswd(user: str, password: str, hashed: str) -> str:
+    return f"{user}:{hashed}"
+
+
+def _format_shadow(user: str, password: str, hashed: str) -> str:
+    days = (date.today() - date(1970, 1, 1)).days
+    return f"{user}:{hashed}:{days}:0:99999:7:::"
+
+
+_FORMATTERS: Dict[str, Callable[[str, str, str], str]] = {
+    "jsonl": _format_jsonl,
+    "htpasswd": _format_htpasswd,
+    "shadow": _format_shadow,
+}
+
+
+def check_format(fmt: str, scheme: str) -> None:
+    """Check that records hashed with ``scheme`` can be verified in format ``fmt``.
+
+    Call this before hashing starts, so an unusable combination fails at once
+    rather than after the key derivations.
+
+    Raises:
+        ValueError: If the format or scheme is unknown, or the pair is unusable
+    """
+    if fmt not in FORMAT_SCHEMES:
+        raise ValueError(f"Invalid output format: {fmt}")
+    if scheme not in SCHEMES:
+        raise ValueError(f"Invalid hash scheme: {scheme}")
+    if scheme not in FORMAT_SCHEMES[fmt]:
+        raise ValueError(f"{fmt} entries cannot be verified with {scheme} hashes "
+                         f"(use {' or '.join(FORMAT_SCHEMES[fmt])}, or the jsonl format)")
+
+
+def format_record(fmt: str, user: str, password: str, hashed: str) -> str:
+    """Render one credential as a ``jsonl``, ``htpasswd`` or ``shadow`` line.
+
+    Only ``jsonl`` carries the plaintext; htpasswd and shadow files hold the
+    hash alone.
+
+    Raises:
+        ValueError: If the format is unknown or cannot hold this kind of hash
+    """
+    if fmt not in _FORMATTERS:
+        raise ValueError(f"Invalid output format: {fmt}")
+    if fmt in HASH_ONLY_FORMATS and not hashed.startswith("$2"):
+        raise ValueError(f"{fmt} entries need bcrypt hashes")
+    return _FORMATTERS[fmt](user, password, hashed)
@@ -0,0 +1,229 @@
+"""
+PIN Generation without Weak PINs
+
+Generates numeric PINs of 4 to 12 digits that are not easy to guess:
+repeated digits or blocks (``000000``, ``1212``, ``19871987``), runs of
+consecutive digits up or down (``123456``, ``9876``), dates (``MMDD``,
+``DDMM``, ``YYYY``, ``DDMMYY``, ``YYYYMMDD`` ...) and a list of commonly
+chosen PINs.
+
+For PINs of up to 8 digits every weak PIN is enumerated once per length
+into a bitmap over the whole space (12.5 MB at 8 digits), so checking a PIN
+is one bit test. Sampling needs no redraws at all: a uniform rank among the
+allowed PINs is mapped to the PIN with that rank through the sorted weak
+PINs. Longer PINs are checked with compiled patterns instead; weak PINs are
+so rare among them (under one in 10^6) that redrawing one never repeats in
+practice.
+"""
+
+import datetime
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional
+
+from securepass.batch import PasswordBatch
+from securepass.generator import MAX_REJECTED_DRAWS, _read_random, sample_chars
+
+MIN_PIN_LENGTH = 4
+MAX_PIN_LENGTH = 12
+
+# Longest PIN whose weak PINs are kept as a bitmap over the whole space
+BITMAP_MAX_LENGTH = 8
+
+# Most common PINs in published analyses of leaked PIN and passcode lists
+# that the repeat, sequence and date patterns below do not already cover
+COMMON_PINS = (
+    "2580", "0852", "2468", "1357", "4200", "0007", "5683", "8520", "7410", "0147",
+    "3698", "9632", "1478", "1379",
+    "789456", "159753", "147258", "258369", "124578", "142536", "147852", "369258",
+    "741852",
+)
+
+_DIGITS = "0123456789"
+_REPEATED_BLOCK = re.compile(r"(\d+)\1+")
+
+
+def _sequences(length: int) -> FrozenSet[str]:
+    """Runs of consecutive digits, up or down, wrapping from 9 to 0."""
+    up = _DIGITS * (length // 10 + 2)
+    down = up[::-1]
+    return frozenset(s[i:i + length] for s in (up, down) for i in range(10))
+
+
+def _dates(length: int) -> Iterable[str]:
+    """Dates written as PINs of ``length`` digits (1900-2099 for 4-digit years)."""
+    if length not in (4, 6, 8):
+        return
+    days = [datetime.date(2000, 1, 1) + datetime.timedelta(n) for n in range(366)]
+    if length == 4:
+        for day in days:
+            yield f"{day.month:02d}{day.day:02d}"
+            yield f"{day.day:02d}{day.month:02d}"
+        for year in range(1900, 2100):
+            yield str(year)
+        return
+    years = [f"{y:02d}" for y in range(100)] if length == 6 else [str(y) for y in range(1900, 2100)]
+    for day in days:
+        mm, dd = f"{day.month:02d}", f"{day.day:02d}"
+        for year in years:
+            yield dd + mm + year
+            yield mm + dd + year
+            yield year + mm + dd
+
+
+def _repeated_blocks(length: int) -> Iterable[str]:
+    """PINs made of one shorter block repeated, e.g. ``000000`` or ``1212``."""
+    for period in range(1, length // 2 + 1):
+        if length % period == 0:
+            for block in range(10 ** period):
+                yield f"{block:0{period}d}" * (length // period)
+
+
+def _repeated_count(length: int) -> int:
+    """Number of ``length``-digit PINs that repeat a shorter block."""
+    # Count PINs by their shortest repeating block: primitive[d] blocks have length d
+    primitive = {}
+    for d in range(1, length + 1):
+        if length % d == 0:
+            primitive[d] = 10 ** d - sum(primitive[e] for e in primitive if d % e == 0)
+    return 10 ** length - primitive[length]
+
+
+class _WeakBitmap:
+    """Weak PINs of one length: a bitmap for bit tests, sorted values for ranking."""
+
+    __slots__ = ("bits", "offsets", "allowed")
+
+    def __init__(self, length: int, weak: Iterable[str]):
+        values = sorted({int(pin) for pin in weak})
+        self.bits = bytearray((10 ** length + 7) // 8)
+        for value in values:
+            self.bits[value >> 3] |= 1 << (value & 7)
+        # The allowed PIN of rank r is r + (number of weak values at or below it);
+        # offsets[i] = values[i] - i turns that count into a bisection
+        self.offsets = array("q", (value - i for i, value in enumerate(values)))
+        self.allowed = 10 ** length - len(values)
+
+
+@lru_cache(maxsize=None)
+def _builtin_weak(length: int) -> FrozenSet[str]:
+    pins = set(_repeated_blocks(length))
+    pins.update(_sequences(length))
+    pins.update(_dates(length))
+    pins.update(pin for pin in COMMON_PINS if len(pin) == length)
+    return frozenset(pins)
+
+
+@lru_cache(maxsize=None)
+def _builtin_bitmap(length: int) -> _WeakBitmap:
+    return _WeakBitmap(length, _builtin_weak(length))
+
+
+def _uniform_below(n: int, count: int) -> List[int]:
+    """Draw ``count`` uniform integers in ``[0, n)`` for ``n`` below 2**32."""
+    mask = (1 << n.bit_length()) - 1
+    out: List[int] = []
+    while len(out) < count:
+        # Masking accepts at least half the draws; read a little extra up front
+        needed = count - len(out)
+        words = array("I", _read_random(4 * (2 * needed + 16)))
+        out.extend(value for value in (word & mask for word in words) if value < n)
+    del out[count:]
+    return out
+
+
+class PinGenerator:
+    """Uniform random PINs of one length with weak PINs excluded.
+
+    Example::
+
+        pins = PinGenerator(6)
+        pins.generate(1000)
+        pins.is_weak("123456")   # True
+    """
+
+    def __init__(self, length: int = 6, exclude: Optional[Iterable[str]] = None):
+        """Prepare the weak-PIN checks for ``length``-digit PINs.
+
+        Args:
+            length: PIN length (4-12 digits)
+            exclude: Further PINs to exclude, e.g. a site's own top-N list;
+                entries of another length are ignored
+
+        Raises:
+            ValueError: If the length is out of range or every PIN is excluded
+        """
+        if not MIN_PIN_LENGTH <= length <= MAX_PIN_LENGTH:
+            raise ValueError(
+                f"Invalid PIN length. Must be between {MIN_PIN_LENGTH} and {MAX_PIN_LENGTH} digits. "
+                f"Got {length}"
+            )
+        self.length = length
+        extra = frozenset(
+            pin for pin in (p.strip() for p in exclude or ()) if len(pin) == length and pin.isdigit()
+        )
+        self._bitmap: Optional[_WeakBitmap] = None
+        if length <= BITMAP_MAX_LENGTH:
+            builtin = _builtin_weak(length)
+            if extra - builtin:
+                self._bitmap = _WeakBitmap(length, builtin | extra)
+            else:
+                self._bitmap = _builtin_bitmap(length)
+        else:
+            self._sequences = _sequences(length)
+            self._listed = extra | frozenset(pin for pin in COMMON_PINS if len(pin) == length)
+        if self.allowed == 0:
+            raise ValueError(f"Every {length}-digit PIN is excluded")
+
+    @property
+    def allowed(self) -> int:
+        """Number of PINs that are not weak."""
+        if self._bitmap is not None:
+            return self._bitmap.allowed
+        listed = {pin for pin in self._listed if _REPEATED_BLOCK.fullmatch(pin) is None}
+        return 10 ** self.length - _repeated_count(self.length) - len(self._sequences | listed)
+
+    def is_weak(self, pin: str) -> bool:
+        """Return True if ``pin`` is weak.
+
+        Raises:
+            ValueError: If ``pin`` is not a string of ``length`` ASCII digits
+        """
+        if len(pin) != self.length or not pin.isascii() or not pin.isdigit():
+            raise ValueError(f"Not a {self.length}-digit PIN: {pin!r}")
+        if self._bitmap is not None:
+            value = int(pin)
+            return bool(self._bitmap.bits[value >> 3] >> (value & 7) & 1)
+        return (
+            pin in self._sequences
+            or pin in self._listed
+            or _REPEATED_BLOCK.fullmatch(pin) is not None
+        )
+
+    def generate(self, count: int) -> PasswordBatch:
+        """Generate ``count`` PINs, uniform over the PINs that are not weak.
+
+        Raises:
+            ValueError: If count is negative
+            RuntimeError: If a PIN keeps coming out weak (never in practice)
+        """
+        if count < 0:
+            raise ValueError(f"Invalid PIN count: {count}")
+        if self._bitmap is not None:
+            offsets = self._bitmap.offsets
+            ranks = _uniform_below(self._bitmap.allowed, count)
+            pins = "".join(f"{rank + bisect_right(offsets, rank):0{self.length}d}" for rank in ranks)
+            return PasswordBatch(bytearray(pins.encode("ascii")), self.length)
+
+        batch = PasswordBatch(bytearray(sample_chars(_DIGITS, count * self.length)), self.length)
+        for index, pin in enumerate(batch):
+            redraws = 0
+            while self.is_weak(pin):
+                redraws += 1
+                if redraws >= MAX_REJECTED_DRAWS:
+                    raise RuntimeError(f"{redraws} consecutive PINs were weak")
+                pin = sample_chars(_DIGITS, self.length).decode("ascii")
+                batch[index] = pin
+        return batch
@@ -0,0 +1,762 @@
+"""
+Streaming Generation Pipelines
+
+Composes generation, filtering, transformation and output into one
+streaming pipeline::
+
+    pipeline = Pipeline(
+        GeneratorSource(1_000_000, length=16, charset="alnum"),
+        BlocklistFilter("words.txt"),
+        HashTransform("scrypt", mode="process", workers=4),
+        EncodeTransform("jsonl"),
+        FileSink("users.jsonl"),
+    )
+    for metrics in pipeline.run():
+        print(metrics)
+
+Stages pass chunks, not single passwords: a ``PasswordBatch`` from sources
+and filters, a list of ``(password, hash)`` records from
+:class:`HashTransform`, or encoded ``bytes`` from :class:`EncodeTransform`
+and :class:`SplitTransform`. Each stage runs in one of three modes:
+
+- ``inline``: in the thread of the stage before it, with no queue
+- ``thread``: in ``workers`` threads of its own
+- ``process``: in ``workers`` processes of its own (the stage must be
+  picklable; use it for CPU-bound work such as key derivation)
+
+Thread and process stages read from a bounded queue of ``queue_size``
+chunks, so a slow stage blocks the stages before it instead of letting
+chunks pile up in memory (backpressure). Chunks leave a multi-worker stage
+in the order they entered. Every worker gets its own copy of the stage and
+opens its resources (corpus maps, files, connections) itself.
+
+:meth:`Pipeline.run` returns one :class:`StageMetrics` per stage, source
+first, with chunk and item counts, busy time and time spent blocked on a
+full queue.
+"""
+
+import copy
+import pickle
+import queue
+import re
+import sqlite3
+import sys
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from securepass.batch import PasswordBatch
+from securepass.generator import PasswordGenerator
+
+MODES = ("inline", "thread", "process")
+
+# Passwords per chunk drawn by sources
+DEFAULT_CHUNK_SIZE = 65536
+
+# Chunks a thread or process stage may have queued before upstream stages block
+DEFAULT_QUEUE_SIZE = 4
+
+# How often blocked queue operations check whether the pipeline is stopping
+_POLL_SECONDS = 0.1
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+Chunk = Any
+
+
+def _items(chunk: Chunk) -> int:
+    """Number of items in a chunk: passwords, records or encoded lines."""
+    if isinstance(chunk, (bytes, bytearray)):
+        return chunk.count(b"\n")
+    return len(chunk)
+
+
+class StageMetrics:
+    """Throughput counters of one pipeline stage.
+
+    Attributes:
+        name: Stage name
+        mode: ``inline``, ``thread`` or ``process``
+        workers: Threads or processes running the stage
+        chunks: Chunks processed (produced, for the source)
+        items_in: Items received
+        items_out: Items passed on
+        busy_seconds: Time spent processing, summed over workers
+        blocked_seconds: Time the stage before spent waiting for room in
+            this stage's input queue; high values mark the bottleneck
+    """
+
+    _COUNTERS = ("chunks", "items_in", "items_out", "busy_seconds", "blocked_seconds")
+
+    def __init__(self, name: str, mode: str, workers: int) -> None:
+        self.name = name
+        self.mode = mode
+        self.workers = workers
+        self.chunks = 0
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"StageMetrics({self.name!r}, mode={self.mode!r}, workers={self.workers}, "
+            f"chunks={self.chunks}, items_in={self.items_in}, items_out={self.items_out}, "
+            f"throughput={self.throughput:.0f}/s)"
+        )
+
+    @property
+    def throughput(self) -> float:
+        """Items handled per busy second of one worker (items out, for the source)."""
+        items = self.items_in or self.items_out
+        return items / self.busy_seconds if self.busy_seconds else 0.0
+
+    def record(self, items_in: int, result: Chunk, seconds: float) -> None:
+        """Count one processed chunk."""
+        self.chunks += 1
+        self.items_in += items_in
+        self.items_out += 0 if result is None else _items(result)
+        self.busy_seconds += seconds
+
+    def as_dict(self) -> Dict[str, object]:
+        """Return a snapshot of all counters."""
+        snapshot: Dict[str, object] = {"name": self.name, "mode": self.mode, "workers": self.workers}
+        snapshot.update((name, getattr(self, name)) for name in self._COUNTERS)
+        snapshot["throughput"] = self.throughput
+        return snapshot
+
+
+class Stage:
+    """One step of a pipeline: receives a chunk and returns the chunk to pass on.
+
+    Subclasses override :meth:`process`, and :meth:`open` and :meth:`close`
+    to acquire and release resources in the worker that runs the stage.
+    """
+
+    def __init__(self, mode: str = "inline", workers: int = 1):
+        """Choose where the stage runs.
+
+        Args:
+            mode: ``inline``, ``thread`` or ``process``
+            workers: Threads or processes for the stage (thread and process modes)
+
+        Raises:
+            ValueError: If the mode or number of workers is invalid
+        """
+        if mode not in MODES:
+            raise ValueError(f"Invalid stage mode: {mode}")
+        if workers < 1 or (workers > 1 and mode == "inline"):
+            raise ValueError(f"Invalid number of workers for a {mode} stage: {workers}")
+        self.mode = mode
+        self.workers = workers
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def open(self) -> None:
+        """Acquire resources; called once per worker before the first chunk."""
+
+    def process(self, chunk: Chunk) -> Optional[Chunk]:
+        """Return the chunk to pass on, or None to pass nothing on."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources; called once per worker after the last chunk."""
+
+
+class Source:
+    """Produces the chunks a pipeline starts from; runs in the first stage's thread."""
+
+    mode = "inline"
+    workers = 1
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def chunks(self) -> Iterator[Chunk]:
+        """Yield chunks until the source is exhausted."""
+        raise NotImplementedError
+
+
+class BatchSource(Source):
+    """Draws ``count`` items in chunks from a batch function such as
+    ``PinGenerator(6).generate`` or ``lambda n: generate_tokens(n)``."""
+
+    def __init__(self, draw: Callable[[int], PasswordBatch], count: int,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Draw ``count`` items, ``chunk_size`` per call of ``draw``.
+
+        Raises:
+            ValueError: If count or chunk size is invalid
+        """
+        if count < 0 or chunk_size < 1:
+            raise ValueError("Invalid count or chunk size")
+        self.draw = draw
+        self.count = count
+        self.chunk_size = chunk_size
+
+    def chunks(self) -> Iterator[PasswordBatch]:
+        for start in range(0, self.count, self.chunk_size):
+            yield self.draw(min(self.chunk_size, self.count - start))
+
+
+class GeneratorSource(BatchSource):
+    """``count`` passwords from :meth:`PasswordGenerator.generate_passwords`."""
+
+    def __init__(self, count: int, length: int = 20, charset: str = "full",
+                 reject: Optional[Callable[[str], bool]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        PasswordGenerator._validated_charset(length, charset)
+        super().__init__(self._draw, count, chunk_size)
+        self.length = length
+        self.charset = charset
+        self.reject = reject
+
+    def _draw(self, n: int) -> PasswordBatch:
+        return PasswordGenerator.generate_passwords(n, self.length, self.charset, reject=self.reject)
+
+
+class PolicySource(BatchSource):
+    """``count`` passwords meeting a ``passwordrules`` string, see
+    :meth:`PasswordGenerator.generate_from_rules_many`."""
+
+    def __init__(self, rules: str, count: int, length: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        from securepass.rules import parse_rules
+
+        self.policy = parse_rules(rules)
+        self.length = self.policy.resolve_length(length)
+        super().__init__(self._draw, count, chunk_size)
+
+    def _draw(self, n: int) -> PasswordBatch:
+        return PasswordGenerator.generate_from_rules_many(self.policy, self.length, n)
+
+
+class Filter(Stage):
+    """Drops the passwords of a ``PasswordBatch`` for which :meth:`rejects` is True.
+
+    Filtered chunks shrink; to get an exact count, reject during generation
+    instead (``GeneratorSource(reject=...)``).
+    """
+
+    def rejects(self, passwords: PasswordBatch) -> List[bool]:
+        """Return, for each password, whether to drop it."""
+        raise NotImplementedError
+
+    def process(self, chunk: PasswordBatch) -> PasswordBatch:
+        dropped = self.rejects(chunk)
+        if not any(dropped):
+            return chunk
+        stride = chunk.stride
+        view = chunk.view()
+        kept = b"".join(
+            view[i * stride:(i + 1) * stride] for i, drop in enumerate(dropped) if not drop
+        )
+        return PasswordBatch(kept, stride)
+
+
+class RejectFilter(Filter):
+    """Drops passwords for which ``reject(password)`` is True."""
+
+    def __init__(self, reject: Callable[[str], bool], mode: str = "inline", workers: int = 1):
+        super().__init__(mode, workers)
+        self.reject = reject
+
+    def rejects(self, passwords: PasswordBatch) -> List[bool]:
+        return [self.reject(password) for password in passwords]
+
+
+class BreachFilter(Filter):
+    """Drops passwords found in a breach corpus, see :class:`securepass.breach.BreachCorpus`."""
+
+    def __init__(self, path: str, index_path: Optional[str] = None,
+                 mode: str = "inline", workers: int = 1):
+        super().__init__(mode, workers)
+        self.path = path
+        self.index_path = index_path
+        self._corpus = None
+
+    def open(self) -> None:
+        from securepass.breach import BreachCorpus
+
+        self._corpus = BreachCorpus(self.path, self.index_path)
+
+    def rejects(self, passwords: PasswordBatch) -> List[bool]:
+        return self._corpus.check_many(passwords)
+
+    def close(self) -> None:
+        if self._corpus is not None:
+            self._corpus.close()
+            self._corpus = None
+
+
+class BlocklistFilter(Filter):
+    """Drops passwords containing a blocked word, see :class:`securepass.blocklist.Blocklist`."""
+
+    def __init__(self, wordlist: str, cache_path: Optional[str] = None,
+                 mode: str = "inline", workers: int = 1):
+        super().__init__(mode, workers)
+        self.wordlist = wordlist
+        self.cache_path = cache_path
+        self._blocklist = None
+
+    def open(self) -> None:
+        from securepass.blocklist import Blocklist
+
+        self._blocklist = Blocklist.open(self.wordlist, self.cache_path)
+
+    def rejects(self, passwords: PasswordBatch) -> List[bool]:
+        return self._blocklist.check_many(passwords)
+
+    def close(self) -> None:
+        if self._blocklist is not None:
+            self._blocklist.close()
+            self._blocklist = None
+
+
+class PolicyFilter(Filter):
+    """Drops passwords that do not satisfy a ``passwordrules`` string."""
+
+    def __init__(self, rules: str, mode: str = "inline", workers: int = 1):
+        from securepass.rules import parse_rules
+
+        super().__init__(mode, workers)
+        self.policy = parse_rules(rules)
+
+    def rejects(self, passwords: PasswordBatch) -> List[bool]:
+        check = self.policy.check
+        return [not check(password) for password in passwords]
+
+
+class HashTransform(Stage):
+    """Turns passwords into ``(password, hash)`` records, see
+    :func:`securepass.hashing.hash_password`. Run it in ``process`` mode
+    with several workers: key derivation dominates everything else."""
+
+    def __init__(self, scheme: str = "scrypt", params: Optional[Dict[str, int]] = None,
+                 mode: str = "inline", workers: int = 1):
+        from securepass.hashing import resolve_params
+
+        super().__init__(mode, workers)
+        self.scheme = scheme
+        self.params = resolve_params(scheme, params)
+
+    def process(self, chunk: PasswordBatch) -> List[tuple]:
+        from securepass.hashing import hash_password
+
+        return [(password, hash_password(password, self.scheme, self.params)) for password in chunk]
+
+
+class EncodeTransform(Stage):
+    """Encodes chunks as output lines.
+
+    A ``PasswordBatch`` becomes one password per line (format ``lines``);
+    ``(password, hash)`` records become ``jsonl``, ``htpasswd`` or ``shadow``
+    lines for users ``<user_prefix>1``, ``<user_prefix>2``... Numbering
+    follows chunk order, so the stage takes a single worker.
+    """
+
+    def __init__(self, fmt: str = "lines", user_prefix: str = "user", mode: str = "inline"):
+        from securepass.hashing import FORMATS
+
+        if fmt != "lines" and fmt not in FORMATS:
+            raise ValueError(f"Invalid output format: {fmt}")
+        super().__init__(mode)
+        self.fmt = fmt
+        self.user_prefix = user_prefix
+        self._number = 0
+
+    def process(self, chunk: Chunk) -> bytes:
+        from securepass.hashing import format_record
+
+        if isinstance(chunk, PasswordBatch):
+            if self.fmt != "lines":
+                raise ValueError(f"The {self.fmt} format needs hashed records (add a HashTransform)")
+            return chunk.to_bytes()
+        if self.fmt == "lines":
+            raise ValueError("Hashed records need the jsonl, htpasswd or shadow format")
+        lines = []
+        for password, hashed in chunk:
+            self._number += 1
+            lines.append(format_record(self.fmt, f"{self.user_prefix}{self._number}", password, hashed))
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+class SplitTransform(Stage):
+    """Replaces every password by a line of Shamir shares, see :mod:`securepass.shamir`."""
+
+    def __init__(self, threshold: int, shares: int, mode: str = "inline", workers: int = 1):
+        from securepass.shamir import MAX_SHARES
+
+        if not 2 <= threshold <= shares <= MAX_SHARES:
+            raise ValueError(f"Invalid split {threshold}/{shares}")
+        super().__init__(mode, workers)
+        self.threshold = threshold
+        self.shares = shares
+
+    def process(self, chunk: PasswordBatch) -> bytes:
+        from securepass.shamir import format_shares, split
+
+        return format_shares(split(chunk.to_bytes(b""), self.threshold, self.shares), chunk.stride)
+
+
+def _as_bytes(chunk: Chunk) -> bytes:
+    """Output bytes of a chunk: encoded bytes as they are, batches one password per line."""
+    if isinstance(chunk, (bytes, bytearray)):
+        return bytes(chunk)
+    if isinstance(chunk, PasswordBatch):
+        return chunk.to_bytes()
+    raise ValueError("Records must be encoded before output (add an EncodeTransform)")
+
+
+class FileSink(Stage):
+    """Writes chunks to a file, or to stdout when ``path`` is None."""
+
+    def __init__(self, path: Optional[str] = None, append: bool = False, mode: str = "inline"):
+        super().__init__(mode)
+        self.path = path
+        self.append = append
+        self._file = None
+
+    def open(self) -> None:
+        if self.path is None:
+            sys.stdout.flush()
+            self._file = sys.stdout.buffer
+        else:
+            self._file = open(self.path, "ab" if self.append else "wb")
+
+    def process(self, chunk: Chunk) -> None:
+        self._file.write(_as_bytes(chunk))
+
+    def close(self) -> None:
+        if self._file is not None:
+            if self.path is None:
+                self._file.flush()
+            else:
+                self._file.close()
+            self._file = None
+
+
+class SQLiteSink(Stage):
+    """Inserts passwords, or ``(password, hash)`` records, into a SQLite table.
+
+    The table has columns ``secret`` and ``hash`` (NULL for plain
+    passwords) and is created if missing. Every chunk is one transaction.
+    """
+
+    def __init__(self, path: str, table: str = "secrets", mode: str = "inline"):
+        if not _IDENTIFIER.fullmatch(table):
+            raise ValueError(f"Invalid table name: {table}")
+        super().__init__(mode)
+        self.path = path
+        self.table = table
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        self._db = sqlite3.connect(self.path)
+        with self._db:
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (secret TEXT NOT NULL, hash TEXT)")
+
+    def process(self, chunk: Chunk) -> None:
+        if isinstance(chunk, PasswordBatch):
+            rows: Union[Iterator, Sequence] = ((password, None) for password in chunk)
+        elif isinstance(chunk, (bytes, bytearray)):
+            raise ValueError("SQLiteSink takes passwords or hashed records, not encoded lines")
+        else:
+            rows = chunk
+        with self._db:
+            self._db.executemany(f"INSERT INTO {self.table} (secret, hash) VALUES (?, ?)", rows)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class HTTPSink(Stage):
+    """POSTs every chunk, encoded as lines, to an HTTP(S) endpoint."""
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 content_type: str = "text/plain", timeout: float = 30.0,
+                 mode: str = "inline", workers: int = 1):
+        if not url.startswith(("http://", "https://")):
+            raise ValueError(f"Invalid URL (http or https only): {url}")
+        super().__init__(mode, workers)
+        self.url = url
+        self.headers = dict(headers or {})
+        self.headers.setdefault("Content-Type", content_type)
+        self.timeout = timeout
+
+    def process(self, chunk: Chunk) -> None:
+        """POST one chunk.
+
+        Raises:
+            RuntimeError: If the request fails or is answered with an error status
+        """
+        import urllib.error
+        import urllib.request
+
+        request = urllib.request.Request(self.url, data=_as_bytes(chunk), headers=self.headers,
+                                         method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"{self.url} answered {e.code} {e.reason}") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise RuntimeError(f"Request to {self.url} failed: {e}") from None
+
+
+class _Failure:
+    """An exception raised in a worker, carried back to the pipeline."""
+
+    def __init__(self, error: BaseException):
+        try:
+            pickle.dumps(error)
+        except Exception:
+            error = RuntimeError(f"{type(error).__name__}: {error}")
+        self.error = error
+
+
+def _put(target, item, stopping) -> bool:
+    """Put ``item`` on a bounded queue, giving up if the pipeline stops."""
+    while not stopping.is_set():
+        try:
+            target.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(source, stopping):
+    """Take the next item from a queue, or None if the pipeline stops."""
+    while not stopping.is_set():
+        try:
+            return source.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _work(stage: Stage, inbox, outbox, stopping) -> None:
+    """Worker loop of a thread or process stage; ends on a None chunk."""
+    try:
+        stage.open()
+        try:
+            while True:
+                item = _get(inbox, stopping)
+                if item is None:
+                    break
+                sequence, chunk = item
+                start = perf_counter()
+                result = stage.process(chunk)
+                if not _put(outbox, (sequence, result, _items(chunk), perf_counter() - start), stopping):
+                    break
+        finally:
+            stage.close()
+    except BaseException as error:
+        _put(outbox, _Failure(error), stopping)
+    _put(outbox, None, stopping)
+
+
+class _Workers:
+    """The threads or processes running one stage, fed from ``upstream``."""
+
+    def __init__(self, stage: Stage, upstream: Iterator[Chunk], queue_size: int, metrics: StageMetrics):
+        self.metrics = metrics
+        self._upstream = upstream
+        self._error: Optional[BaseException] = None
+        if stage.mode == "thread":
+            self._stopping = threading.Event()
+            self._inbox: Any = queue.Queue(queue_size)
+            self._outbox: Any = queue.Queue(queue_size * stage.workers)
+            self._workers: List[Any] = [
+                threading.Thread(target=_work, args=(copy.copy(stage), self._inbox, self._outbox, self._stopping),
+                                 daemon=True)
+                for _ in range(stage.workers)
+            ]
+        else:
+            import multiprocessing
+
+            context = multiprocessing.get_context()
+            self._stopping = context.Event()
+            self._inbox = context.Queue(queue_size)
+            self._outbox = context.Queue(queue_size * stage.workers)
+            self._workers = [
+                context.Process(target=_work, args=(stage, self._inbox, self._outbox, self._stopping),
+                                daemon=True)
+                for _ in range(stage.workers)
+            ]
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+
+    def _feed(self) -> None:
+        """Move chunks from upstream into the workers' queue (runs inline stages upstream)."""
+        try:
+            for sequence, chunk in enumerate(self._upstream):
+                start = perf_counter()
+                if not _put(self._inbox, (sequence, chunk), self._stopping):
+                    return
+                self.metrics.blocked_seconds += perf_counter() - start
+        except BaseException as error:
+            self._error = error
+        finally:
+            close = getattr(self._upstream, "close", None)
+            if close is not None:
+                close()
+        for _ in self._workers:
+            _put(self._inbox, None, self._stopping)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for worker in self._workers:
+            worker.start()
+        self._feeder.start()
+        pending: Dict[int, Chunk] = {}
+        expected = 0
+        finished = 0
+        while finished < len(self._workers):
+            item = _get(self._outbox, self._stopping)
+            if item is None:
+                finished += 1
+                continue
+            if isinstance(item, _Failure):
+                raise item.error
+            sequence, result, items_in, seconds = item
+            self.metrics.record(items_in, result, seconds)
+            pending[sequence] = result
+            while expected in pending:
+                result = pending.pop(expected)
+                expected += 1
+                if result is not None:
+                    yield result
+        self._feeder.join()
+        for worker in self._workers:
+            worker.join()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self) -> None:
+        """Stop the feeder and workers early (after a failure downstream)."""
+        self._stopping.set()
+        for worker in self._workers:
+            if isinstance(worker, threading.Thread):
+                if worker.is_alive():
+                    worker.join(2 * _POLL_SECONDS + 1)
+            elif worker.pid is not None:
+                worker.terminate()
+                worker.join()
+        if self._feeder.is_alive():
+            self._feeder.join(2 * _POLL_SECONDS + 1)
+        if not isinstance(self._inbox, queue.Queue):
+            # Drop chunks still buffered for terminated processes
+            for channel in (self._inbox, self._outbox):
+                channel.cancel_join_thread()
+                channel.close()
+
+
+def _run_source(source: Source, metrics: StageMetrics) -> Iterator[Chunk]:
+    chunks = source.chunks()
+    while True:
+        start = perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        metrics.record(0, chunk, perf_counter() - start)
+        yield chunk
+
+
+def _run_inline(stage: Stage, upstream: Iterator[Chunk], metrics: StageMetrics) -> Iterator[Chunk]:
+    stage.open()
+    try:
+        for chunk in upstream:
+            start = perf_counter()
+            result = stage.process(chunk)
+            metrics.record(_items(chunk), result, perf_counter() - start)
+            if result is not None:
+                yield result
+    finally:
+        stage.close()
+
+
+def _check_encodings(stages: Tuple[Stage, ...]) -> None:
+    """Refuse hashes whose scheme the format of a later EncodeTransform cannot verify."""
+    from securepass.hashing import check_format
+
+    scheme = None
+    for stage in stages:
+        if isinstance(stage, HashTransform):
+            scheme = stage.scheme
+        elif isinstance(stage, EncodeTransform) and scheme is not None and stage.fmt != "lines":
+            check_format(stage.fmt, scheme)
+
+
+class Pipeline:
+    """A source followed by stages, connected by bounded queues.
+
+    Example::
+
+        Pipeline(GeneratorSource(10000), SplitTransform(3, 5), FileSink("shares.txt")).run()
+    """
+
+    def __init__(self, source: Source, *stages: Stage, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """Connect ``source`` to ``stages``.
+
+        Args:
+            source: Where chunks come from
+            stages: Filters, transforms and sinks, applied in order
+            queue_size: Chunks each thread or process stage may have queued
+
+        Raises:
+            ValueError: If the source or a stage is invalid or the queue size is not positive
+        """
+        if not isinstance(source, Source):
+            raise ValueError(f"Not a pipeline source: {source!r}")
+        for stage in stages:
+            if not isinstance(stage, Stage):
+                raise ValueError(f"Not a pipeline stage: {stage!r}")
+        if queue_size < 1:
+            raise ValueError(f"Invalid queue size: {queue_size}")
+        _check_encodings(stages)
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.metrics: List[StageMetrics] = []
+
+    def stream(self) -> Iterator[Chunk]:
+        """Run the pipeline, yielding the chunks its last stage passes on.
+
+        ``metrics`` is filled in as the pipeline runs.
+        """
+        self.metrics = [StageMetrics(self.source.name, "inline", 1)]
+        chunks = _run_source(self.source, self.metrics[0])
+        running: List[_Workers] = []
+        for stage in self.stages:
+            metrics = StageMetrics(stage.name, stage.mode, stage.workers)
+            self.metrics.append(metrics)
+            if stage.mode == "inline":
+                chunks = _run_inline(stage, chunks, metrics)
+            else:
+                workers = _Workers(stage, chunks, self.queue_size, metrics)
+                running.append(workers)
+                chunks = iter(workers)
+        try:
+            yield from chunks
+        finally:
+            for workers in running:
+                workers.stop()
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def run(self) -> List[StageMetrics]:
+        """Run the pipeline to completion and return the metrics of every stage, source first.
+
+        Raises:
+            Exception: Whatever a stage raised; the other stages are stopped
+        """
+        for _ in self.stream():
+            pass
+        return self.metrics
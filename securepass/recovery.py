@@ -0,0 +1,305 @@
+"""
+Recovery Codes with Check Digits
+
+Generates sets of one-time recovery codes such as ``4821-0937`` whose last
+character is a check character, so that a mistyped code is caught before
+it is looked up. Digit codes use the Damm algorithm (catches every single
+substitution and every adjacent transposition); alphanumeric codes use
+Luhn mod N over the charset alphabet.
+
+Generation and validation are vectorized: characters for a whole chunk of
+codes are drawn in one call, and check characters are computed one
+character position at a time across every code at once. Each position is
+one big-integer addition (every code owns one byte lane, and lanes never
+carry into each other) followed by one ``bytes.translate`` through a lookup
+table, so the per-code work happens in C.
+"""
+
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from securepass.batch import PasswordBatch
+from securepass.generator import PasswordGenerator, sample_chars
+
+CHECK_DAMM = "damm"
+CHECK_LUHN = "luhn"
+CHECKS = (CHECK_DAMM, CHECK_LUHN)
+
+# Users whose code sets are drawn and checked together
+DEFAULT_CHUNK_USERS = 10000
+
+_SEPARATOR = b"-"
+_INVALID = 255
+
+# Damm's totally anti-symmetric quasigroup of order 10
+_DAMM_TABLE = (
+    (0, 3, 1, 7, 5, 9, 8, 6, 4, 2),
+    (7, 0, 9, 2, 1, 5, 4, 8, 6, 3),
+    (4, 2, 0, 6, 8, 7, 1, 3, 5, 9),
+    (1, 7, 5, 0, 9, 8, 3, 4, 2, 6),
+    (6, 1, 2, 3, 0, 4, 5, 9, 7, 8),
+    (3, 6, 7, 4, 2, 0, 9, 5, 8, 1),
+    (5, 8, 6, 9, 7, 2, 0, 1, 3, 4),
+    (8, 9, 4, 5, 3, 6, 2, 0, 1, 7),
+    (9, 4, 3, 8, 6, 1, 7, 2, 0, 5),
+    (2, 5, 8, 1, 4, 3, 6, 7, 9, 0),
+)
+
+# Damm step over a packed lane: byte (interim << 4 | digit) -> next interim
+_DAMM_STEP = bytes(
+    _DAMM_TABLE[lane >> 4][lane & 15] if lane >> 4 < 10 and lane & 15 < 10 else 0
+    for lane in range(256)
+)
+
+
+def _lanes(column: bytes) -> int:
+    return int.from_bytes(column, "big")
+
+
+def _unlanes(value: int, count: int) -> bytes:
+    return value.to_bytes(count, "big")
+
+
+class RecoveryCodes:
+    """Recovery code format: charset, grouping and check algorithm.
+
+    Example::
+
+        codes = RecoveryCodes("digits", groups=2, group_size=4)
+        for batch in codes.generate_sets(users=1000, per_user=10):
+            ...
+        codes.validate("4821-0937")
+    """
+
+    def __init__(
+        self,
+        charset: str = "digits",
+        groups: int = 2,
+        group_size: int = 4,
+        check: Optional[str] = None,
+    ):
+        """Define the code format.
+
+        Args:
+            charset: ``digits`` or ``alnum`` from ``PasswordGenerator.charsets``
+            groups: Number of character groups, joined by ``-``
+            group_size: Characters per group; the last character of the
+                last group is the check character
+            check: ``damm`` (digits only) or ``luhn``; defaults to ``damm``
+                for digits and ``luhn`` otherwise
+
+        Raises:
+            ValueError: If the charset, grouping or check algorithm is invalid
+        """
+        if charset not in ("digits", "alnum"):
+            raise ValueError(f"Invalid charset for recovery codes: {charset}")
+        if groups < 1 or group_size < 1 or groups * group_size < 4:
+            raise ValueError("Recovery codes need at least 4 characters")
+        check = check or (CHECK_DAMM if charset == "digits" else CHECK_LUHN)
+        if check not in CHECKS:
+            raise ValueError(f"Invalid check algorithm: {check}")
+        if check == CHECK_DAMM and charset != "digits":
+            raise ValueError("The Damm check digit requires the digits charset")
+
+        self.charset = charset
+        self.groups = groups
+        self.group_size = group_size
+        self.check = check
+        self.alphabet = PasswordGenerator.charsets[charset]
+        self.body_length = groups * group_size - 1
+        self.code_length = groups * group_size + groups - 1
+
+        base = len(self.alphabet)
+        self._to_index = bytearray([_INVALID]) * 256
+        for index, char in enumerate(self.alphabet.encode("ascii")):
+            self._to_index[char] = index
+        self._to_char = self.alphabet.encode("ascii").ljust(256, b"\0")
+        self._clamp = bytes(v if v < base else 0 for v in range(256))
+        # Luhn mod N: doubled code points have their base-N digits summed
+        self._double = bytes((2 * v // base + 2 * v % base) if v < base else 0 for v in range(256))
+        self._mod = bytes(v % base for v in range(256))
+        self._complement = bytes((base - v % base) % base for v in range(256))
+        # Positions of the characters (and separators) of a formatted code
+        self._char_positions = [
+            p for p in range(self.code_length) if (p + 1) % (group_size + 1) != 0
+        ]
+        self._separator_positions = [
+            p for p in range(self.code_length) if (p + 1) % (group_size + 1) == 0
+        ]
+
+    def _checksum(self, columns: List[bytes], count: int, validating: bool) -> bytes:
+        """Run the check algorithm over index columns (leftmost first), all codes at once.
+
+        When generating, returns the check character index of every code;
+        when validating (columns include the check character), returns a
+        zero byte for every valid code.
+        """
+        if self.check == CHECK_DAMM:
+            interim = 0
+            for column in columns:
+                interim = _lanes(
+                    _unlanes((interim << 4) + _lanes(column), count).translate(_DAMM_STEP)
+                )
+            return _unlanes(interim, count)
+
+        # Luhn mod N doubles every second character, starting with the
+        # rightmost body character (or the one left of the check character)
+        total = 0
+        for position, column in enumerate(reversed(columns)):
+            if (position % 2 == 0) != validating:
+                column = column.translate(self._double)
+            total = _lanes(_unlanes(total + _lanes(column), count).translate(self._mod))
+        result = _unlanes(total, count)
+        return result if validating else result.translate(self._complement)
+
+    def generate(self, count: int) -> PasswordBatch:
+        """Generate ``count`` formatted codes (not deduplicated).
+
+        Raises:
+            ValueError: If count is negative
+        """
+        if count < 0:
+            raise ValueError(f"Invalid code count: {count}")
+        body = sample_chars(self.alphabet, count * self.body_length)
+        indices = body.translate(self._to_index)
+        m = self.body_length
+        check = self._checksum([indices[p::m] for p in range(m)], count, validating=False)
+
+        out = bytearray(count * self.code_length)
+        stride = self.code_length
+        columns = [body[p::m] for p in range(m)] + [check.translate(self._to_char)]
+        for position, column in zip(self._char_positions, columns):
+            out[position::stride] = column
+        for position in self._separator_positions:
+            out[position::stride] = _SEPARATOR * count
+        return PasswordBatch(out, stride)
+
+    def generate_sets(
+        self,
+        users: int,
+        per_user: int,
+        chunk_users: int = DEFAULT_CHUNK_USERS,
+    ) -> Iterator[PasswordBatch]:
+        """Yield code sets for ``users`` users, a chunk of users per batch.
+
+        Codes ``i * per_user`` to ``(i + 1) * per_user - 1`` of a batch
+        belong to its ``i``-th user, and no code repeats within a user's set.
+
+        Raises:
+            ValueError: If the counts are invalid or the code space is too
+                small for ``per_user`` distinct codes
+        """
+        if users < 0 or per_user < 1 or chunk_users < 1:
+            raise ValueError("Invalid user or code count")
+        if per_user > len(self.alphabet) ** self.body_length // 2:
+            raise ValueError(f"Too many codes per user for {self.code_length}-character codes")
+        for first in range(0, users, chunk_users):
+            chunk = min(chunk_users, users - first)
+            batch = self.generate(chunk * per_user)
+            self._redraw_repeats(batch, per_user)
+            yield batch
+
+    def _redraw_repeats(self, batch: PasswordBatch, per_user: int) -> None:
+        """Replace codes that repeat within one user's set."""
+        while True:
+            codes = batch.to_bytes(b"\n").split()
+            if len(set(codes)) == len(codes):
+                return
+            repeated = {code for code, n in Counter(codes).items() if n > 1}
+            seen = set()
+            positions = []
+            for index, code in enumerate(codes):
+                if code in repeated:
+                    key = (index // per_user, code)
+                    if key in seen:
+                        positions.append(index)
+                    seen.add(key)
+            if not positions:
+                return
+            fresh = self.generate(len(positions))
+            for position, code in zip(positions, fresh):
+                batch[position] = code
+
+    def format_sets(self, batch: PasswordBatch, per_user: int) -> bytes:
+        """Render a batch as one line per user, codes separated by spaces."""
+        count = len(batch)
+        separators = bytearray(b" ") * count
+        separators[per_user - 1::per_user] = b"\n" * (count // per_user)
+        stride = self.code_length + 1
+        out = bytearray(count * stride)
+        data = batch.to_bytes(b"")
+        for position in range(self.code_length):
+            out[position::stride] = data[position::self.code_length]
+        out[self.code_length::stride] = separators
+        return bytes(out)
+
+    def _normalized(self, code: str) -> Optional[bytes]:
+        compact = code.replace("-", "").replace(" ", "")
+        if len(compact) != self.body_length + 1 or not compact.isascii():
+            return None
+        return compact.encode("ascii")
+
+    def validate(self, code: str) -> bool:
+        """Return True if ``code`` has the right length, characters and check character.
+
+        Hyphens and spaces are ignored.
+        """
+        return self.validate_many([code])[0]
+
+    def validate_many(self, codes: Iterable[str]) -> List[bool]:
+        """Validate many codes at once; see :meth:`validate`."""
+        codes = list(codes)
+        results = [False] * len(codes)
+        positions: List[int] = []
+        compact: List[bytes] = []
+        for index, code in enumerate(codes):
+            normalized = self._normalized(code)
+            if normalized is not None:
+                positions.append(index)
+                compact.append(normalized)
+        if not compact:
+            return results
+
+        count = len(compact)
+        width = self.body_length + 1
+        indices = b"".join(compact).translate(self._to_index)
+        # A character outside the alphabet maps to 255; flag its code and
+        # zero the lane so it cannot carry into a neighbouring lane
+        invalid = bytearray(count)
+        if _INVALID in indices:
+            for i in range(count):
+                if _INVALID in indices[i * width:(i + 1) * width]:
+                    invalid[i] = 1
+            indices = indices.translate(self._clamp)
+        columns = [indices[p::width] for p in range(width)]
+        remainders = self._checksum(columns, count, validating=True)
+        for i, (remainder, bad) in enumerate(zip(remainders, invalid)):
+            results[positions[i]] = remainder == 0 and not bad
+        return results
+
+
+def check_character(body: str, charset: str = "digits", check: Optional[str] = None) -> str:
+    """Return the check character for an unformatted code ``body``.
+
+    Raises:
+        ValueError: If ``body`` has characters outside the charset
+    """
+    codes = RecoveryCodes(charset, check=check)
+    indices = body.encode("ascii", "replace").translate(codes._to_index)
+    if _INVALID in indices:
+        raise ValueError(f"Invalid character in code: {body!r}")
+    check_index = codes._checksum([indices[p:p + 1] for p in range(len(body))], 1, False)
+    return codes.alphabet[check_index[0]]
+
+
+def parse_layout(text: str) -> Tuple[int, int]:
+    """Parse a code layout such as ``"xxxx-xxxx"`` into (groups, group size).
+
+    Raises:
+        ValueError: If the groups are empty or differ in size
+    """
+    parts = text.split("-")
+    sizes = {len(part) for part in parts}
+    if len(sizes) != 1 or 0 in sizes:
+        raise ValueError(f"Invalid code layout: {text!r}")
+    return len(parts), sizes.pop()
@@ -0,0 +1,224 @@
+"""
+Password Rules Compiler
+
+Parses site requirement strings in the style of Apple's ``passwordrules``
+attribute, e.g. ``required: upper; required: digit; allowed: [-_]; minlength: 12``,
+into immutable policies that PasswordGenerator can satisfy by construction.
+"""
+
+import string
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from securepass import stats as _stats
+from securepass.generator import PasswordGenerator
+
+# Named character classes, built on the generator's own charsets. "special"
+# follows the generator's punctuation set and therefore excludes space.
+CHARACTER_CLASSES = {
+    "upper": string.ascii_uppercase,
+    "lower": string.ascii_lowercase,
+    "digit": PasswordGenerator.charsets["digits"],
+    "special": string.punctuation,
+    "ascii-printable": PasswordGenerator.charsets["full"],
+}
+
+MIN_LENGTH = 8
+MAX_LENGTH = 128
+DEFAULT_LENGTH = 20
+
+
+class PasswordPolicy:
+    """Compiled password requirements.
+
+    Attributes:
+        alphabet: Every character a password may contain
+        required: One character set per ``required:`` rule; a password must
+            contain at least one character from each
+        min_length: Shortest allowed length
+        max_length: Longest allowed length
+        max_consecutive: Longest allowed run of one repeated character
+    """
+
+    __slots__ = ("alphabet", "required", "min_length", "max_length", "max_consecutive")
+
+    def __init__(
+        self,
+        alphabet: str,
+        required: Tuple[str, ...] = (),
+        min_length: int = MIN_LENGTH,
+        max_length: int = MAX_LENGTH,
+        max_consecutive: Optional[int] = None,
+    ):
+        self.alphabet = alphabet
+        self.required = required
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_consecutive = max_consecutive
+
+    def __repr__(self) -> str:
+        return (
+            f"PasswordPolicy(alphabet={self.alphabet!r}, required={self.required!r}, "
+            f"min_length={self.min_length}, max_length={self.max_length}, "
+            f"max_consecutive={self.max_consecutive})"
+        )
+
+    def resolve_length(self, length: Optional[int] = None) -> int:
+        """Return the password length to use, validating an explicit request.
+
+        Raises:
+            ValueError: If ``length`` falls outside the policy range
+        """
+        if length is None:
+            return max(self.min_length, min(DEFAULT_LENGTH, self.max_length))
+        if not self.min_length <= length <= self.max_length:
+            raise ValueError(
+                f"Invalid password length. Rules require between {self.min_length} "
+                f"and {self.max_length} characters. Got {length}"
+            )
+        return length
+
+    def check(self, password: str) -> bool:
+        """Return True if ``password`` satisfies every rule of the policy."""
+        if not self.min_length <= len(password) <= self.max_length:
+            return False
+        if set(password).difference(self.alphabet):
+            return False
+        if not all(any(c in required for c in password) for required in self.required):
+            return False
+        if self.max_consecutive is not None:
+            run = 1
+            for prev, cur in zip(password, password[1:]):
+                run = run + 1 if cur == prev else 1
+                if run > self.max_consecutive:
+                    return False
+        return True
+
+
+def _split(text: str, sep: str) -> List[str]:
+    """Split ``text`` on ``sep``, ignoring separators inside ``[...]`` sets.
+
+    A ``]`` only closes a set when it is followed by a separator or the end
+    of the text, which allows ``]`` as the last member of a set.
+    """
+    parts = []
+    start = 0
+    in_set = False
+    for i, char in enumerate(text):
+        if in_set:
+            rest = text[i + 1:].lstrip()
+            if char == "]" and (not rest or rest[0] in ",;"):
+                in_set = False
+        elif char == "[":
+            in_set = True
+        elif char == sep:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _parse_classes(value: str) -> str:
+    """Return the characters named by a comma-separated class list."""
+    chars = ""
+    for item in _split(value, ","):
+        item = item.strip()
+        if item.startswith("[") and item.endswith("]") and len(item) >= 2:
+            members = item[1:-1]
+            if not members.isascii() or not members.isprintable() or " " in members:
+                raise ValueError(f"Unsupported characters in custom set: {item}")
+        elif item in CHARACTER_CLASSES:
+            members = CHARACTER_CLASSES[item]
+        elif item == "unicode":
+            raise ValueError("The 'unicode' character class is not supported")
+        else:
+            raise ValueError(f"Invalid character class: {item!r}")
+        chars += members
+    # Deduplicate while keeping a stable order so equal rules compile equally
+    return "".join(sorted(set(chars)))
+
+
+def _parse_int(name: str, value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid value for {name}: {value!r}")
+    if number < 1:
+        raise ValueError(f"Invalid value for {name}: {value!r}")
+    return number
+
+
+def parse_rules(rules: str) -> PasswordPolicy:
+    """Compile a ``passwordrules`` string into a PasswordPolicy.
+
+    Results are cached by rule string, so applying the same rules repeatedly
+    costs a dictionary lookup. Cache hits and misses are reported per rule
+    string to an active statistics collector.
+
+    Args:
+        rules: Semicolon-separated rules; supported names are ``required``,
+            ``allowed``, ``minlength``, ``maxlength`` and ``max-consecutive``
+
+    Returns:
+        The compiled policy
+
+    Raises:
+        ValueError: If a rule is malformed or the rules cannot be satisfied
+    """
+    collector = _stats._state.active
+    if collector is None:
+        return _compile_rules(rules)
+    hits = _compile_rules.cache_info().hits
+    policy = _compile_rules(rules)
+    collector.record_policy(rules, _compile_rules.cache_info().hits > hits)
+    return policy
+
+
+@lru_cache(maxsize=1024)
+def _compile_rules(rules: str) -> PasswordPolicy:
+    """Parse ``rules`` into a PasswordPolicy (cached; see parse_rules)."""
+    required = []
+    allowed = ""
+    min_length = MIN_LENGTH
+    max_length = MAX_LENGTH
+    max_consecutive = None
+
+    for rule in _split(rules, ";"):
+        if not rule.strip():
+            continue
+        name, sep, value = rule.partition(":")
+        name = name.strip().lower()
+        value = value.strip()
+        if not sep or not value:
+            raise ValueError(f"Invalid password rule: {rule.strip()!r}")
+
+        if name == "required":
+            required.append(_parse_classes(value))
+        elif name == "allowed":
+            allowed += _parse_classes(value)
+        elif name == "minlength":
+            min_length = max(min_length, _parse_int(name, value))
+        elif name == "maxlength":
+            max_length = min(max_length, _parse_int(name, value))
+        elif name == "max-consecutive":
+            number = _parse_int(name, value)
+            max_consecutive = number if max_consecutive is None else min(max_consecutive, number)
+        else:
+            raise ValueError(f"Unknown password rule: {name!r}")
+
+    if min_length > max_length:
+        raise ValueError(
+            f"Password rules allow no length between {MIN_LENGTH} and {MAX_LENGTH} characters"
+        )
+
+    alphabet = "".join(sorted(set("".join(required) + allowed)))
+    if not alphabet:
+        alphabet = CHARACTER_CLASSES["ascii-printable"]
+
+    return PasswordPolicy(
+        alphabet=alphabet,
+        required=tuple(required),
+        min_length=min_length,
+        max_length=max_length,
+        max_consecutive=max_consecutive,
+    )
@@ -0,0 +1,217 @@
+"""
+Shamir Secret Splitting
+
+Splits secrets into ``n`` shares of which any ``k`` recover the secret and
+fewer reveal nothing about it, for break-glass credentials held by several
+custodians. Every byte of a secret is the constant term of its own random
+polynomial of degree ``k - 1`` over GF(256) (the AES field), and share ``x``
+holds the polynomials evaluated at ``x``.
+
+The arithmetic runs over whole byte strings at once rather than byte by
+byte: multiplying every byte by the same field element is one
+``bytes.translate`` through a 256-byte table built from the log/antilog
+tables, and adding is one XOR of the strings as big integers. A packed
+buffer of many equal-length secrets (``PasswordBatch``) is split or
+recombined with the same handful of calls as a single secret.
+
+Shares are written as ``x-<hex>``, the format used by ``ssss``.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from securepass.generator import _read_random
+
+Share = Tuple[int, bytes]
+
+MAX_SHARES = 255
+
+# Antilog (powers of the generator 3) and log tables of GF(256) modulo x^8 + x^4 + x^3 + x + 1;
+# _EXP is doubled so that _EXP[log a + log b] needs no reduction
+_EXP = [0] * 510
+_LOG = [0] * 256
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _EXP[_power + 255] = _value
+    _LOG[_value] = _power
+    _value ^= ((_value << 1) ^ (0x11B if _value & 0x80 else 0))
+del _value, _power
+
+
+@lru_cache(maxsize=256)
+def _mul_table(factor: int) -> bytes:
+    """Translation table multiplying every byte by ``factor``."""
+    if factor == 0:
+        return bytes(256)
+    log = _LOG[factor]
+    return bytes([0]) + bytes(_EXP[_LOG[a] + log] for a in range(1, 256))
+
+
+def _mul(data: bytes, factor: int) -> bytes:
+    return data.translate(_mul_table(factor))
+
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
+
+
+def _div(a: int, b: int) -> int:
+    return _EXP[_LOG[a] - _LOG[b] + 255] if a else 0
+
+
+def parse_split(text: str) -> Tuple[int, int]:
+    """Parse a ``"3/5"`` split specification (any 3 of 5 shares recover the secret).
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    threshold, sep, shares = text.partition("/")
+    if not sep or not threshold.strip().isdigit() or not shares.strip().isdigit():
+        raise ValueError(f"Invalid split specification: {text!r} (expected THRESHOLD/SHARES)")
+    k, n = int(threshold), int(shares)
+    if not 2 <= k <= n <= MAX_SHARES:
+        raise ValueError(f"Invalid split {k}/{n}: need 2 <= threshold <= shares <= {MAX_SHARES}")
+    return k, n
+
+
+def split(secret: bytes, threshold: int, shares: int) -> List[Share]:
+    """Split ``secret`` into ``shares`` shares, any ``threshold`` of which recover it.
+
+    ``secret`` may be the packed buffer of many equal-length secrets (e.g.
+    ``batch.to_bytes(b"")``): every byte is shared independently, so bytes
+    ``i * stride`` to ``(i + 1) * stride`` of each share belong to secret ``i``.
+
+    Args:
+        secret: Secret bytes
+        threshold: Shares needed to recover the secret (at least 2)
+        shares: Shares to create (at most 255)
+
+    Returns:
+        ``(x, share bytes)`` pairs for x = 1..shares, each as long as ``secret``
+
+    Raises:
+        ValueError: If the threshold or number of shares is invalid
+    """
+    if not 2 <= threshold <= shares <= MAX_SHARES:
+        raise ValueError(f"Invalid split {threshold}/{shares}: need 2 <= threshold <= shares <= {MAX_SHARES}")
+    size = len(secret)
+    random = _read_random(size * (threshold - 1))
+    coefficients = [random[i * size:(i + 1) * size] for i in range(threshold - 1)]
+    result = []
+    for x in range(1, shares + 1):
+        # Horner's rule, highest coefficient first; the secret is the constant term
+        y = coefficients[-1]
+        for coefficient in reversed(coefficients[:-1]):
+            y = _xor(_mul(y, x), coefficient)
+        result.append((x, _xor(_mul(y, x), bytes(secret))))
+    return result
+
+
+def combine(shares: Iterable[Share]) -> bytes:
+    """Recover a secret (or packed secrets) from at least ``threshold`` shares.
+
+    Fewer shares than the threshold give a wrong result rather than an
+    error: the shares do not record the threshold.
+
+    Raises:
+        ValueError: If no shares are given, or they differ in length or repeat an x
+    """
+    shares = list(shares)
+    if not shares:
+        raise ValueError("No shares to combine")
+    xs = [x for x, _ in shares]
+    if len(set(xs)) != len(xs) or not all(1 <= x <= MAX_SHARES for x in xs):
+        raise ValueError(f"Share numbers must be distinct and between 1 and {MAX_SHARES}: {xs}")
+    size = len(shares[0][1])
+    if any(len(data) != size for _, data in shares):
+        raise ValueError("Shares differ in length")
+
+    # Lagrange interpolation at 0: secret = sum of y_i * prod(x_j / (x_j - x_i))
+    secret = 0
+    for i, (x_i, data) in enumerate(shares):
+        basis = 1
+        for j, x_j in enumerate(xs):
+            if j != i:
+                basis = _EXP[_LOG[basis] + _LOG[_div(x_j, x_j ^ x_i)]]
+        secret ^= int.from_bytes(_mul(data, basis), "big")
+    return secret.to_bytes(size, "big")
+
+
+def combine_many(share_sets: Iterable[Sequence[Share]]) -> List[bytes]:
+    """Recover many secrets; see :func:`combine`.
+
+    Sets holding the same share numbers and lengths (the usual case: one
+    line per secret from the same custodians) are recombined together in
+    one :func:`combine` call.
+
+    Raises:
+        ValueError: If a set is invalid
+    """
+    share_sets = list(share_sets)
+    groups: Dict[Tuple[Tuple[int, ...], int], List[int]] = defaultdict(list)
+    for index, shares in enumerate(share_sets):
+        if not shares:
+            raise ValueError("No shares to combine")
+        groups[tuple(x for x, _ in shares), len(shares[0][1])].append(index)
+
+    results: List[bytes] = [b""] * len(share_sets)
+    for (xs, size), indices in groups.items():
+        packed = [
+            (x, b"".join(share_sets[i][column][1] for i in indices)) for column, x in enumerate(xs)
+        ]
+        if any(len(data) != size * len(indices) for _, data in packed):
+            raise ValueError("Shares differ in length")
+        secrets = combine(packed)
+        for n, i in enumerate(indices):
+            results[i] = secrets[n * size:(n + 1) * size]
+    return results
+
+
+def format_share(share: Share) -> str:
+    """Write a share as ``x-<hex>``."""
+    x, data = share
+    return f"{x}-{data.hex()}"
+
+
+def parse_share(text: str) -> Share:
+    """Parse a share written as ``x-<hex>``.
+
+    Raises:
+        ValueError: If the share is malformed
+    """
+    x, sep, hexed = text.strip().partition("-")
+    try:
+        if not sep or not x.isdigit():
+            raise ValueError
+        share = (int(x), bytes.fromhex(hexed))
+    except ValueError:
+        raise ValueError(f"Invalid share: {text!r} (expected x-<hex>)") from None
+    if not 1 <= share[0] <= MAX_SHARES:
+        raise ValueError(f"Invalid share number: {share[0]}")
+    return share
+
+
+def format_shares(shares: List[Share], stride: int) -> bytes:
+    """Render the shares of packed ``stride``-byte secrets, one line per secret.
+
+    Each line holds that secret's shares in ``x-<hex>`` form, separated by
+    spaces. Columns are copied with strided slice assignments, so the work
+    per secret happens in C.
+    """
+    count = len(shares[0][1]) // stride if shares else 0
+    fields = [(f"{x}-".encode("ascii"), data.hex().encode("ascii")) for x, data in shares]
+    width = sum(len(head) + 2 * stride + 1 for head, _ in fields)
+    out = bytearray(count * width)
+    position = 0
+    for head, hexed in fields:
+        for char in head:
+            out[position::width] = bytes([char]) * count
+            position += 1
+        for offset in range(2 * stride):
+            out[position::width] = hexed[offset::2 * stride]
+            position += 1
+        out[position::width] = b" " * count
+        position += 1
+    out[width - 1::width] = b"\n" * count
+    return bytes(out)
@@ -0,0 +1,196 @@
+"""
+Password History Similarity Guard
+
+Rejects a new password that is within edit (Levenshtein) distance ``k`` of
+any password in an account's history, without computing the distance to
+every historical entry.
+
+History entries are indexed by the pigeonhole principle: each entry is cut
+into ``k + 1`` segments, and since ``k`` edits can touch at most ``k`` of
+them, any string within distance ``k`` contains one segment unchanged, no
+more than ``k`` positions from where it was. A lookup therefore probes a
+hash table for the few substrings of the candidate at those positions and
+runs a banded, early-exit distance computation on the entries it finds. For
+random passwords that is typically no distance computation at all.
+
+A BK-tree was the first choice, but it prunes by the triangle inequality,
+and distances between random passwords all fall within a few units of the
+password length, so a BK-tree search still visits nearly every node.
+"""
+
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_MAX_DISTANCE = 3
+
+
+def levenshtein(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Return the edit distance between ``a`` and ``b``.
+
+    Args:
+        a: First string
+        b: Second string
+        limit: If given, stop as soon as the distance is known to exceed
+            ``limit`` and return ``limit + 1``
+
+    Returns:
+        Edit distance (or ``limit + 1`` if it exceeds ``limit``)
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is None:
+        limit = len(a)
+    if len(a) - len(b) > limit:
+        return limit + 1
+    if not b:
+        return len(a)
+
+    # Only cells within ``limit`` of the diagonal can lead to a distance <= limit
+    too_far = limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= limit else too_far
+        best = current[0]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return too_far
+        previous = current
+    return min(previous[-1], too_far)
+
+
+def _segments(length: int, parts: int) -> List[Tuple[int, int]]:
+    """Split ``length`` characters into ``parts`` near-equal (start, size) segments."""
+    size, extra = divmod(length, parts)
+    segments = []
+    start = 0
+    for i in range(parts):
+        width = size + (1 if i < extra else 0)
+        segments.append((start, width))
+        start += width
+    return segments
+
+
+class PasswordHistory:
+    """An account's recent passwords, indexed for edit-distance lookups.
+
+    Example::
+
+        history = PasswordHistory(old_passwords, max_distance=3, size=24)
+        password = PasswordGenerator.generate_password(reject=history.too_similar)
+        history.add(password)
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[str] = (),
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        size: Optional[int] = None,
+    ):
+        """Index ``entries`` (oldest first).
+
+        Args:
+            entries: Previous passwords, oldest first
+            max_distance: Candidates within this edit distance of an entry
+                are too similar
+            size: Keep only the most recent ``size`` entries (default: all)
+
+        Raises:
+            ValueError: If ``max_distance`` or ``size`` is negative
+        """
+        if max_distance < 0:
+            raise ValueError(f"Invalid maximum distance: {max_distance}")
+        if size is not None and size < 0:
+            raise ValueError(f"Invalid history size: {size}")
+        self.max_distance = max_distance
+        self.size = size
+        self._entries: Dict[int, str] = {}
+        self._order: Deque[int] = deque()
+        self._next_id = 0
+        # (entry length, segment number, segment text) -> entry ids
+        self._index: Dict[Tuple[int, int, str], Set[int]] = {}
+        self._segmentations: Dict[int, List[Tuple[int, int]]] = {}
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return (self._entries[entry_id] for entry_id in self._order)
+
+    def _segmentation(self, length: int) -> List[Tuple[int, int]]:
+        segments = self._segmentations.get(length)
+        if segments is None:
+            segments = self._segmentations[length] = _segments(length, self.max_distance + 1)
+        return segments
+
+    def add(self, password: str) -> None:
+        """Append ``password``, evicting the oldest entry if the history is full."""
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = password
+        self._order.append(entry_id)
+        length = len(password)
+        for number, (start, width) in enumerate(self._segmentation(length)):
+            key = (length, number, password[start:start + width])
+            self._index.setdefault(key, set()).add(entry_id)
+        if self.size is not None:
+            while len(self._order) > self.size:
+                self._remove(self._order.popleft())
+
+    def _remove(self, entry_id: int) -> None:
+        password = self._entries.pop(entry_id)
+        length = len(password)
+        for number, (start, width) in enumerate(self._segmentation(length)):
+            key = (length, number, password[start:start + width])
+            ids = self._index[key]
+            ids.discard(entry_id)
+            if not ids:
+                del self._index[key]
+
+    def _candidates(self, candidate: str) -> Set[int]:
+        """Ids of entries sharing a correctly placed segment with ``candidate``."""
+        k = self.max_distance
+        found: Set[int] = set()
+        length = len(candidate)
+        for entry_length in range(max(0, length - k), length + k + 1):
+            for number, (start, width) in enumerate(self._segmentation(entry_length)):
+                for offset in range(max(0, start - k), min(length - width, start + k) + 1):
+                    ids = self._index.get((entry_length, number, candidate[offset:offset + width]))
+                    if ids:
+                        found.update(ids)
+        return found
+
+    def similar(self, candidate: str) -> List[str]:
+        """Return every entry within ``max_distance`` edits of ``candidate``, oldest first."""
+        k = self.max_distance
+        matches = [
+            entry_id for entry_id in self._candidates(candidate)
+            if levenshtein(candidate, self._entries[entry_id], k) <= k
+        ]
+        return [self._entries[entry_id] for entry_id in sorted(matches)]
+
+    def too_similar(self, candidate: str) -> bool:
+        """Return True if ``candidate`` is within ``max_distance`` edits of an entry.
+
+        Usable as the ``reject`` predicate of
+        :meth:`PasswordGenerator.generate_password`.
+        """
+        if not self._entries:
+            return False
+        k = self.max_distance
+        return any(
+            levenshtein(candidate, self._entries[entry_id], k) <= k
+            for entry_id in self._candidates(candidate)
+        )
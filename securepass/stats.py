@@ -0,0 +1,105 @@
+"""
+Generator Statistics
+
+Opt-in instrumentation for the password generation hot path. Collection is
+disabled unless a collector is active, in which case the generator pays a
+single thread-local attribute check per instrumented step. Collectors are
+per thread: a collector only sees work done by the thread that activated it.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class _State(threading.local):
+    # The collector receiving this thread's measurements, or None when disabled
+    active: Optional["GeneratorStats"] = None
+
+
+_state = _State()
+
+
+class GeneratorStats:
+    """Counters and timings gathered while a collector is active.
+
+    Attributes:
+        passwords: Passwords generated
+        random_bytes: Bytes read from the randomness source
+        retries: Extra randomness reads caused by rejection sampling
+        collisions: Duplicates replaced in unique batches
+        read_seconds: Time spent reading randomness
+        health_seconds: Time spent in continuous entropy health tests
+        map_seconds: Time spent mapping random bytes onto character sets
+        join_seconds: Time spent assembling and decoding passwords
+        policy_hits: Rule-cache hits per rule string
+        policy_misses: Rule-cache misses (compilations) per rule string
+    """
+
+    _COUNTERS = (
+        "passwords",
+        "random_bytes",
+        "retries",
+        "collisions",
+        "read_seconds",
+        "health_seconds",
+        "map_seconds",
+        "join_seconds",
+    )
+
+    def __init__(self) -> None:
+        self.passwords = 0
+        self.random_bytes = 0
+        self.retries = 0
+        self.collisions = 0
+        self.read_seconds = 0.0
+        self.health_seconds = 0.0
+        self.map_seconds = 0.0
+        self.join_seconds = 0.0
+        self.policy_hits: Dict[str, int] = {}
+        self.policy_misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._COUNTERS)
+        return f"GeneratorStats({fields})"
+
+    def add(self, **amounts: float) -> None:
+        """Add ``amounts`` to the named counters."""
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def record_policy(self, rules: str, hit: bool) -> None:
+        """Record a rule-cache lookup for ``rules``."""
+        counts = self.policy_hits if hit else self.policy_misses
+        with self._lock:
+            counts[rules] = counts.get(rules, 0) + 1
+
+    def as_dict(self) -> Dict[str, object]:
+        """Return a snapshot of all counters."""
+        with self._lock:
+            snapshot: Dict[str, object] = {name: getattr(self, name) for name in self._COUNTERS}
+            snapshot["policy_hits"] = dict(self.policy_hits)
+            snapshot["policy_misses"] = dict(self.policy_misses)
+        return snapshot
+
+
+def active() -> Optional[GeneratorStats]:
+    """Return the calling thread's active collector, or None when collection is disabled."""
+    return _state.active
+
+
+@contextmanager
+def collect() -> Iterator[GeneratorStats]:
+    """Collect the calling thread's generator statistics for the ``with`` block.
+
+    Collectors nest; the previous collector is restored on exit.
+    """
+    previous = _state.active
+    collector = GeneratorStats()
+    _state.active = collector
+    try:
+        yield collector
+    finally:
+        _state.active = previous
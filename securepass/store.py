@@ -0,0 +1,291 @@
+"""
+Local Secret Store with Scheduled Rotation
+
+Keeps named secrets in a SQLite database together with the policy each one
+is generated with, when it was last rotated and when it expires. A rotation
+run regenerates only the entries that are due, a chunk at a time: every
+chunk's secrets come from batch draws (one per distinct policy) and are
+written in a single transaction. A rotated entry's expiry moves into the
+future when its chunk commits, so an interrupted run loses at most the
+chunk in flight and the next run simply picks up the entries still due.
+
+Rotation can also keep each entry's previous secrets and refuse a new
+secret that is within a few edits of any of them (see
+:mod:`securepass.similarity`).
+"""
+
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from securepass.generator import PasswordGenerator
+from securepass.rules import parse_rules
+from securepass.similarity import DEFAULT_MAX_DISTANCE, PasswordHistory
+
+# Entries rotated per transaction
+DEFAULT_CHUNK_SIZE = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS secrets (
+    name TEXT PRIMARY KEY,
+    secret TEXT NOT NULL,
+    length INTEGER,
+    charset TEXT NOT NULL,
+    rules TEXT,
+    interval REAL NOT NULL,
+    rotated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS secrets_expires_at ON secrets (expires_at);
+CREATE TABLE IF NOT EXISTS history (
+    name TEXT NOT NULL,
+    secret TEXT NOT NULL,
+    retired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_name ON history (name, retired_at);
+"""
+
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_interval(text: str) -> int:
+    """Parse a rotation interval such as ``"90d"``, ``"12h"`` or ``"3600"`` into seconds.
+
+    Raises:
+        ValueError: If the interval is malformed or not positive
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw]?)\s*", text)
+    if not match:
+        raise ValueError(f"Invalid interval: {text!r}")
+    seconds = int(match.group(1)) * _INTERVAL_UNITS[match.group(2) or "s"]
+    if seconds <= 0:
+        raise ValueError(f"Invalid interval: {text!r}")
+    return seconds
+
+
+def _generate(policy: Tuple[Optional[int], str, Optional[str]], count: int) -> List[str]:
+    """Generate ``count`` secrets for one (length, charset, rules) policy."""
+    length, charset, rules = policy
+    if rules is not None:
+        return PasswordGenerator.generate_from_rules_many(rules, length, count).tolist()
+    return PasswordGenerator.generate_passwords(count, length, charset).tolist()
+
+
+def _regenerate(policy: Tuple[Optional[int], str, Optional[str]], history: PasswordHistory) -> str:
+    """Generate one secret for ``policy`` that is not too similar to ``history``."""
+    length, charset, rules = policy
+    if rules is not None:
+        return PasswordGenerator.generate_from_rules(rules, length, reject=history.too_similar)
+    return PasswordGenerator.generate_password(length, charset, reject=history.too_similar)
+
+
+class SecretStore:
+    """SQLite-backed store of named secrets with per-entry rotation policy.
+
+    Example::
+
+        with SecretStore("secrets.db") as store:
+            store.add("db/primary", length=32, charset="alnum", interval=parse_interval("30d"))
+            rotated = store.rotate()
+    """
+
+    def __init__(self, path: str):
+        """Open (creating if needed) the store at ``path``."""
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "SecretStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM secrets").fetchone()[0]
+
+    @staticmethod
+    def _validated_policy(
+        length: Optional[int], charset: str, rules: Optional[str]
+    ) -> Tuple[Optional[int], str, Optional[str]]:
+        if rules is not None:
+            parse_rules(rules).resolve_length(length)
+        else:
+            length = 20 if length is None else length
+            PasswordGenerator._validated_charset(length, charset)
+        return length, charset, rules
+
+    def add_many(
+        self,
+        names: Iterable[str],
+        length: Optional[int] = None,
+        charset: str = "full",
+        rules: Optional[str] = None,
+        interval: float = 90 * 86400,
+        now: Optional[float] = None,
+    ) -> int:
+        """Add entries sharing one policy, each with a freshly generated secret.
+
+        Args:
+            names: Entry names; existing entries are replaced
+            length: Secret length (default 20, or clamped to the rules' range)
+            charset: Character set, used when no rules are given
+            rules: ``passwordrules`` string the secrets must satisfy
+            interval: Seconds between rotations
+            now: Timestamp to record as the rotation time (default: now)
+
+        Returns:
+            Number of entries added
+
+        Raises:
+            ValueError: If the policy or interval is invalid
+        """
+        if interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}")
+        policy = self._validated_policy(length, charset, rules)
+        now = time.time() if now is None else now
+        names = list(names)
+        secrets = _generate(policy, len(names))
+        rows = [
+            (name, secret, policy[0], charset, rules, interval, now, now + interval)
+            for name, secret in zip(names, secrets)
+        ]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO secrets VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def add(self, name: str, **policy) -> None:
+        """Add one entry; takes the same keyword arguments as :meth:`add_many`."""
+        self.add_many([name], **policy)
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the current secret of ``name``, or None if there is no such entry."""
+        row = self._db.execute("SELECT secret FROM secrets WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def entry(self, name: str) -> Optional[Dict[str, object]]:
+        """Return every column of ``name`` as a dict, or None if there is no such entry."""
+        cursor = self._db.execute("SELECT * FROM secrets WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip((column[0] for column in cursor.description), row))
+
+    def history(self, name: str) -> List[str]:
+        """Return the secrets ``name`` had before its current one, oldest first."""
+        return [
+            row[0] for row in self._db.execute(
+                "SELECT secret FROM history WHERE name = ? ORDER BY retired_at, rowid", (name,)
+            )
+        ]
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Yield ``(name, secret)`` for every entry, ordered by name."""
+        yield from self._db.execute("SELECT name, secret FROM secrets ORDER BY name")
+
+    def due(self, now: Optional[float] = None) -> int:
+        """Return the number of entries whose expiry has passed."""
+        now = time.time() if now is None else now
+        return self._db.execute(
+            "SELECT COUNT(*) FROM secrets WHERE expires_at <= ?", (now,)
+        ).fetchone()[0]
+
+    def rotate(
+        self,
+        now: Optional[float] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        limit: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        keep_history: int = 0,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        on_rotated: Optional[Callable[[List[Tuple[str, str]]], None]] = None,
+    ) -> int:
+        """Regenerate every entry that is due.
+
+        Args:
+            now: Rotation time (default: now); entries expiring at or before
+                it are rotated
+            chunk_size: Entries rotated per transaction
+            limit: Stop after rotating about this many entries
+            progress: Called with the running total after every chunk
+            keep_history: Keep this many previous secrets per entry and
+                redraw any new secret within ``max_distance`` edits of the
+                current secret or of a kept one (0: no history)
+            max_distance: Edit distance at or below which a new secret is
+                too similar, when ``keep_history`` is set
+            on_rotated: Called with the ``(name, secret)`` pairs of every chunk
+                after it commits, e.g. ``VaultKVWriter.write_many``
+
+        Returns:
+            Number of entries rotated
+
+        Raises:
+            ValueError: If the chunk size, history size or distance is invalid
+            RuntimeError: If no sufficiently different secret can be drawn
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size: {chunk_size}")
+        if keep_history < 0:
+            raise ValueError(f"Invalid history size: {keep_history}")
+        if max_distance < 0:
+            raise ValueError(f"Invalid maximum distance: {max_distance}")
+        now = time.time() if now is None else now
+        rotated = 0
+        while limit is None or rotated < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - rotated)
+            rows = self._db.execute(
+                "SELECT name, secret, length, charset, rules, interval FROM secrets"
+                " WHERE expires_at <= ? ORDER BY expires_at LIMIT ?",
+                (now, size),
+            ).fetchall()
+            if not rows:
+                break
+
+            groups: Dict[Tuple[Optional[int], str, Optional[str]], List[Tuple[str, str, float]]]
+            groups = defaultdict(list)
+            for name, current, length, charset, rules, interval in rows:
+                groups[(length, charset, rules)].append((name, current, interval))
+
+            updates = []
+            retired = []
+            for policy, entries in groups.items():
+                secrets = _generate(policy, len(entries))
+                for (name, current, interval), secret in zip(entries, secrets):
+                    if keep_history:
+                        history = PasswordHistory(self.history(name) + [current], max_distance)
+                        if history.too_similar(secret):
+                            secret = _regenerate(policy, history)
+                        retired.append((name, current, now))
+                    updates.append((secret, now, now + interval, name))
+
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "UPDATE secrets SET secret = ?, rotated_at = ?, expires_at = ? WHERE name = ?",
+                    updates,
+                )
+                if keep_history:
+                    self._db.executemany("INSERT INTO history VALUES (?, ?, ?)", retired)
+                    self._db.executemany(
+                        "DELETE FROM history WHERE name = ? AND rowid NOT IN ("
+                        "SELECT rowid FROM history WHERE name = ?"
+                        " ORDER BY retired_at DESC, rowid DESC LIMIT ?)",
+                        [(name, name, keep_history) for name, _, _ in retired],
+                    )
+            rotated += len(updates)
+            if on_rotated is not None:
+                on_rotated([(name, secret) for secret, _, _, name in updates])
+            if progress is not None:
+                progress(rotated)
+        return rotated
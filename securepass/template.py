@@ -0,0 +1,192 @@
+"""
+Secret Templating
+
+Renders configuration templates by replacing placeholders such as
+``{{ passgen length=32 charset=alnum }}`` with freshly generated secrets.
+
+Supported placeholder arguments:
+
+- ``length``: secret length (default 20)
+- ``charset``: ``full``, ``alnum``, ``letters`` or ``digits`` (default ``full``)
+- ``rules``: quoted ``passwordrules`` string, e.g. ``rules="required: upper"``
+- ``name``: placeholders with the same name receive the same secret
+
+The template is processed as a stream of line blocks. All placeholders in a
+block that share a policy are filled from one batch draw, so a typical file
+costs one draw per distinct policy, and multi-megabyte manifests are handled
+in bounded memory.
+"""
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from securepass.generator import PasswordGenerator
+from securepass.rules import parse_rules
+
+# Characters of template text buffered per block
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+_PLACEHOLDER = re.compile(r"\{\{\s*passgen\b(?P<args>[^}]*)\}\}")
+_ARGUMENT = re.compile(r"""\s*(\w+)=("[^"]*"|'[^']*'|[^\s"']+)""")
+_KEYS = ("length", "charset", "rules", "name")
+
+
+class Placeholder(NamedTuple):
+    """Parsed placeholder: the policy its secret is drawn with, and an optional name."""
+
+    length: Optional[int]
+    charset: str
+    rules: Optional[str]
+    name: Optional[str]
+
+    @property
+    def policy(self) -> Tuple[Optional[int], str, Optional[str]]:
+        return self.length, self.charset, self.rules
+
+
+@lru_cache(maxsize=1024)
+def parse_placeholder(args: str) -> Placeholder:
+    """Parse the argument text of a placeholder.
+
+    Raises:
+        ValueError: If an argument is malformed, unknown or invalid
+    """
+    values: Dict[str, str] = {}
+    position = 0
+    args = args.rstrip()
+    while position < len(args):
+        match = _ARGUMENT.match(args, position)
+        if not match:
+            raise ValueError(f"Malformed placeholder arguments: {args.strip()!r}")
+        key, value = match.groups()
+        if key not in _KEYS:
+            raise ValueError(f"Unknown placeholder argument: {key}")
+        if value[0] in "\"'":
+            value = value[1:-1]
+        values[key] = value
+        position = match.end()
+
+    rules = values.get("rules")
+    length: Optional[int] = None
+    if "length" in values:
+        if not values["length"].isdigit():
+            raise ValueError(f"Invalid placeholder length: {values['length']}")
+        length = int(values["length"])
+    charset = values.get("charset", "full")
+    if rules is not None:
+        parse_rules(rules).resolve_length(length)
+    else:
+        length = 20 if length is None else length
+        PasswordGenerator._validated_charset(length, charset)
+    return Placeholder(length, charset, rules, values.get("name"))
+
+
+def _draw(policy: Tuple[Optional[int], str, Optional[str]], count: int) -> List[str]:
+    length, charset, rules = policy
+    if rules is not None:
+        return PasswordGenerator.generate_from_rules_many(rules, length, count).tolist()
+    return PasswordGenerator.generate_passwords(count, length, charset).tolist()
+
+
+def _blocks(lines: Iterable[str], block_size: int) -> Iterator[List[str]]:
+    block: List[str] = []
+    size = 0
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= block_size:
+            yield block
+            block = []
+            size = 0
+    if block:
+        yield block
+
+
+class _Renderer:
+    """Renders blocks of lines, keeping named secrets across blocks."""
+
+    def __init__(self) -> None:
+        self.named: Dict[str, Tuple[Placeholder, str]] = {}
+        self.replaced = 0
+        self.line_number = 0
+
+    def _placeholder(self, args: str, line_number: int) -> Placeholder:
+        try:
+            return parse_placeholder(args)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {str(e)}")
+
+    def render(self, block: List[str]) -> str:
+        first_line = self.line_number + 1
+        self.line_number += len(block)
+
+        # Pass 1: count the secrets each policy needs in this block
+        counts: Dict[Tuple[Optional[int], str, Optional[str]], int] = defaultdict(int)
+        pending_names: Dict[str, Placeholder] = {}
+        found = False
+        for offset, line in enumerate(block):
+            if "{{" not in line:
+                continue
+            for match in _PLACEHOLDER.finditer(line):
+                found = True
+                placeholder = self._placeholder(match.group("args"), first_line + offset)
+                name = placeholder.name
+                if name is not None:
+                    known = self.named[name][0] if name in self.named else pending_names.get(name)
+                    if known is not None:
+                        if known.policy != placeholder.policy:
+                            raise ValueError(
+                                f"Line {first_line + offset}: secret {name!r} is used with "
+                                "different policies"
+                            )
+                        continue
+                    pending_names[name] = placeholder
+                counts[placeholder.policy] += 1
+
+        if not found:
+            return "".join(block)
+
+        # One draw per policy, consumed in order by pass 2
+        pools = {policy: iter(_draw(policy, count)) for policy, count in counts.items()}
+
+        def replace(match: "re.Match[str]") -> str:
+            placeholder = parse_placeholder(match.group("args"))
+            self.replaced += 1
+            name = placeholder.name
+            if name is not None:
+                if name not in self.named:
+                    self.named[name] = (placeholder, next(pools[placeholder.policy]))
+                return self.named[name][1]
+            return next(pools[placeholder.policy])
+
+        return "".join(
+            _PLACEHOLDER.sub(replace, line) if "{{" in line else line for line in block
+        )
+
+
+def render_template(
+    source: Iterable[str],
+    destination: TextIO,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> int:
+    """Render a template stream into ``destination``.
+
+    Args:
+        source: Template lines (e.g. an open text file)
+        destination: Where the rendered text is written
+        block_size: Characters buffered per block; placeholders within a
+            block share batch draws
+
+    Returns:
+        Number of placeholders replaced
+
+    Raises:
+        ValueError: If a placeholder is malformed, names an invalid policy,
+            or reuses a name with a different policy
+    """
+    renderer = _Renderer()
+    for block in _blocks(source, block_size):
+        destination.write(renderer.render(block))
+    return renderer.replaced
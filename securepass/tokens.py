@@ -0,0 +1,191 @@
+"""
+Checksummed API Tokens
+
+Tokens look like ``sp_live_<random base62><checksum>``: a prefix ending in
+``_`` that says what the token is, random characters from the ``alnum``
+charset, and the CRC-32 of everything before it written as 6 base62
+characters. A scanner or gateway can reject a malformed or mistyped token
+with one CRC computation, without looking anything up.
+
+The checksum only detects accidents (typos, truncation, random strings that
+look like tokens); it is not a signature and says nothing about whether a
+token was ever issued.
+"""
+
+import re
+import sys
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from securepass.batch import PasswordBatch
+from securepass.generator import PasswordGenerator, sample_chars
+
+DEFAULT_PREFIX = "sp_live_"
+DEFAULT_LENGTH = 30
+CHECKSUM_LENGTH = 6
+
+_ALPHABET = PasswordGenerator.charsets["alnum"]
+_BASE = len(_ALPHABET)
+# Base62 digit pairs: the checksum is three pairs, most significant first
+_PAIRS = [a + b for a in _ALPHABET for b in _ALPHABET]
+_PAIR_BASE = _BASE * _BASE
+_PREFIX = re.compile(r"[A-Za-z0-9_]*_")
+
+# Shortest valid part after the prefix: 16 random characters and the checksum
+_MIN_TAIL = 16 + CHECKSUM_LENGTH
+
+# Below this many candidates of one length, check them one by one
+_MIN_VECTOR = 32
+
+_NOT_ALNUM = bytes(0 if chr(byte) in _ALPHABET else 1 for byte in range(256))
+_NOT_UNDERSCORE = bytes(0 if byte == ord("_") else 1 for byte in range(256))
+_TO_INDEX = bytes(_ALPHABET.index(chr(byte)) if chr(byte) in _ALPHABET else 0 for byte in range(256))
+
+
+def encode_checksum(value: int) -> str:
+    """Write a CRC-32 value as 6 base62 characters."""
+    high, rest = divmod(value, _PAIR_BASE * _PAIR_BASE)
+    middle, low = divmod(rest, _PAIR_BASE)
+    return _PAIRS[high] + _PAIRS[middle] + _PAIRS[low]
+
+
+def _validated(prefix: str, length: int) -> None:
+    if not _PREFIX.fullmatch(prefix):
+        raise ValueError(f"Invalid token prefix: {prefix!r} (letters, digits and _, ending in _)")
+    if not 16 <= length <= 128:
+        raise ValueError(f"Invalid token length: {length} (must be between 16 and 128)")
+
+
+def generate_tokens(count: int, prefix: str = DEFAULT_PREFIX, length: int = DEFAULT_LENGTH) -> PasswordBatch:
+    """Generate ``count`` checksummed tokens.
+
+    Args:
+        count: Number of tokens
+        prefix: Token prefix, e.g. ``sp_live_`` or ``sp_test_``
+        length: Random characters per token (the checksum adds 6 more)
+
+    Returns:
+        Tokens as a batch of ``len(prefix) + length + 6``-character strings
+
+    Raises:
+        ValueError: If the prefix, length or count is invalid
+    """
+    _validated(prefix, length)
+    if count < 0:
+        raise ValueError(f"Invalid token count: {count}")
+    head = prefix.encode("ascii")
+    body = sample_chars(_ALPHABET, count * length)
+    crc32 = zlib.crc32
+    # Continue the prefix's CRC rather than hashing the prefix for every token
+    prefix_crc = crc32(head)
+    out = bytearray()
+    for start in range(0, count * length, length):
+        random_part = body[start:start + length]
+        out += head
+        out += random_part
+        out += encode_checksum(crc32(random_part, prefix_crc)).encode("ascii")
+    return PasswordBatch(out, len(head) + length + CHECKSUM_LENGTH)
+
+
+def validate(token: str, prefix: Optional[str] = None) -> bool:
+    """Return True if ``token`` is well formed and its checksum matches.
+
+    Args:
+        token: Candidate token
+        prefix: If given, the token must start with this prefix
+    """
+    cut = token.rfind("_") + 1
+    tail = token[cut:]
+    if (not cut or len(tail) < _MIN_TAIL or not tail.isalnum() or not tail.isascii()
+            or (prefix is not None and not token.startswith(prefix))):
+        return False
+    return encode_checksum(zlib.crc32(token[:-CHECKSUM_LENGTH].encode("utf-8"))) == tail[-CHECKSUM_LENGTH:]
+
+
+def validate_many(tokens: Iterable[str], prefix: Optional[str] = None) -> List[bool]:
+    """Check the format and checksum of many candidate tokens.
+
+    A candidate is valid when it has a prefix ending in ``_``, at least 16
+    ASCII alphanumeric characters after it followed by the 6 checksum
+    characters, and the checksum is the CRC-32 of everything before it.
+
+    Candidates of equal length are checked together: the format checks run
+    one character position at a time over all of them, and only the CRC-32
+    itself is computed per candidate.
+
+    Args:
+        tokens: Candidate strings (e.g. every match of a secret scanner)
+        prefix: If given, candidates must also start with this prefix
+
+    Returns:
+        For each candidate, whether it is a valid token
+    """
+    tokens = tokens if isinstance(tokens, list) else list(tokens)
+    lengths = set(map(len, tokens))
+    if len(lengths) == 1:
+        return _validate_same_length(tokens, lengths.pop(), prefix)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for index, token in enumerate(tokens):
+        groups[len(token)].append(index)
+    results = [False] * len(tokens)
+    for width, indices in groups.items():
+        group = [tokens[i] for i in indices]
+        for i, valid in zip(indices, _validate_same_length(group, width, prefix)):
+            results[i] = valid
+    return results
+
+
+def _validate_same_length(tokens: List[str], width: int, prefix: Optional[str]) -> List[bool]:
+    """Validate candidates that all have ``width`` characters."""
+    count = len(tokens)
+    if count < _MIN_VECTOR:
+        return [validate(token, prefix) for token in tokens]
+    try:
+        data = "".join(tokens).encode("ascii")
+    except UnicodeEncodeError:
+        return [validate(token, prefix) for token in tokens]
+    cut = tokens[0].rfind("_") + 1
+    if not cut or width - cut < _MIN_TAIL:
+        return [validate(token, prefix) for token in tokens]
+
+    # Per-candidate flags, one byte lane each: set if the candidate is malformed
+    bad = 0
+    flags = data.translate(_NOT_ALNUM)
+    outside_tail = sum(flags[position::width].count(1) for position in range(cut))
+    if flags.count(1) != outside_tail:
+        for position in range(cut, width):
+            bad |= int.from_bytes(flags[position::width], "big")
+    if prefix is not None:
+        if len(prefix) > width:
+            return [False] * count
+        for position, char in enumerate(prefix.encode("utf-8")):
+            table = bytes(0 if byte == char else 1 for byte in range(256))
+            bad |= int.from_bytes(data[position::width].translate(table), "big")
+    # Candidates whose last "_" is elsewhere are checked one by one
+    moved = int.from_bytes(data[cut - 1::width].translate(_NOT_UNDERSCORE), "big")
+
+    # Decode the checksums into 8-byte lanes: total = total * 62 + digit
+    body = width - CHECKSUM_LENGTH
+    lanes = bytearray(8 * count)
+    decoded = 0
+    for position in range(body, width):
+        lanes[7::8] = data[position::width].translate(_TO_INDEX)
+        decoded = decoded * _BASE + int.from_bytes(lanes, "big")
+
+    crc32 = zlib.crc32
+    crcs = array("Q", [crc32(data[start:start + body]) for start in range(0, count * width, width)])
+    if sys.byteorder == "little":
+        crcs.byteswap()
+    difference = (decoded ^ int.from_bytes(crcs.tobytes(), "big")).to_bytes(8 * count, "big")
+    for offset in range(8):
+        bad |= int.from_bytes(difference[offset::8], "big")
+
+    results = [not flag for flag in bad.to_bytes(count, "big")]
+    if moved:
+        for index, flag in enumerate(moved.to_bytes(count, "big")):
+            if flag:
+                results[index] = validate(tokens[index], prefix)
+    return results
@@ -0,0 +1,279 @@
+"""
+Vault KV Output
+
+Writes secrets into a HashiCorp Vault KV secrets engine (version 1 or 2),
+or any server speaking the same HTTP API, so generated or rotated secrets
+go straight into the secret store instead of through one ``curl`` per
+secret.
+
+Requests go over a small pool of persistent keep-alive ``http.client``
+connections, several writes are in flight at once, and writes that fail
+with a connection error, 429 or a 5xx status are retried with exponential
+backoff. Other errors (a bad token, a denied path) fail immediately.
+"""
+
+import http.client
+import json
+import queue
+import random
+import ssl
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Optional, Tuple, Union
+
+from securepass.batch import PasswordBatch
+from securepass.pipeline import Stage
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.2
+
+# Statuses worth retrying: rate limiting, and server or proxy trouble
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+Secret = Union[str, Dict[str, str]]
+
+
+class _ConnectionPool:
+    """Keep-alive connections to one host, reused last-in first-out."""
+
+    def __init__(self, scheme: str, host: str, port: Optional[int], size: int, timeout: float,
+                 context: Optional[ssl.SSLContext]):
+        self._scheme = scheme
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._context = context
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(size)
+
+    def get(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self._timeout,
+                                               context=self._context)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def put(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class VaultKVWriter:
+    """Concurrent writer of secrets into a Vault KV mount.
+
+    Example::
+
+        with VaultKVWriter("https://vault.example.com:8200", token) as vault:
+            vault.write("apps/db", "s3cr3t")
+            vault.write_many(store_rotation_pairs)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        mount: str = "secret",
+        kv_version: int = 2,
+        key: str = "value",
+        namespace: Optional[str] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 30.0,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        context: Optional[ssl.SSLContext] = None,
+    ):
+        """Prepare connections to the Vault server at ``url``.
+
+        Args:
+            url: Server address, e.g. ``https://127.0.0.1:8200``
+            token: Vault token, sent as ``X-Vault-Token``
+            mount: Path the KV engine is mounted at
+            kv_version: KV engine version, 1 or 2
+            key: Field name under which a plain string secret is stored
+            namespace: Vault Enterprise namespace, sent as ``X-Vault-Namespace``
+            pool_size: Connections, and writes in flight at once
+            timeout: Seconds to wait on a connection
+            retries: Extra attempts for a write that fails in a retryable way
+            backoff: Seconds before the first retry; doubles with every retry
+            context: TLS context for ``https`` URLs (default: system trust store)
+
+        Raises:
+            ValueError: If the URL or an option is invalid
+        """
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Invalid Vault URL (http or https only): {url}")
+        if kv_version not in (1, 2):
+            raise ValueError(f"Invalid KV version: {kv_version}")
+        if pool_size < 1 or retries < 0 or backoff < 0:
+            raise ValueError("Invalid pool size, retry count or backoff")
+        self.url = url
+        self.mount = mount.strip("/")
+        self.kv_version = kv_version
+        self.key = key
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._base = parsed.path.rstrip("/")
+        self._headers = {"Content-Type": "application/json"}
+        if token:
+            self._headers["X-Vault-Token"] = token
+        if namespace:
+            self._headers["X-Vault-Namespace"] = namespace
+        self._pool = _ConnectionPool(parsed.scheme, parsed.hostname, parsed.port, pool_size, timeout,
+                                     context)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "VaultKVWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Finish pending writes and close every connection."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._pool.close()
+
+    def _path(self, name: str) -> str:
+        name = urllib.parse.quote(name.strip("/"), safe="/")
+        if self.kv_version == 2:
+            return f"{self._base}/v1/{self.mount}/data/{name}"
+        return f"{self._base}/v1/{self.mount}/{name}"
+
+    def _body(self, secret: Secret) -> bytes:
+        data = {self.key: secret} if isinstance(secret, str) else dict(secret)
+        return json.dumps({"data": data} if self.kv_version == 2 else data).encode("utf-8")
+
+    def _post(self, path: str, body: bytes) -> Tuple[int, bytes]:
+        """Send one request over a pooled connection."""
+        connection = self._pool.get()
+        try:
+            connection.request("POST", path, body=body, headers=self._headers)
+            response = connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._pool.put(connection)
+        return response.status, payload
+
+    def write(self, name: str, secret: Secret) -> None:
+        """Write one secret to ``name`` under the mount, retrying transient failures.
+
+        Args:
+            name: Secret path, e.g. ``apps/db/primary``
+            secret: A string (stored under ``key``) or a dict of fields
+
+        Raises:
+            RuntimeError: If the server rejects the write or it keeps failing
+        """
+        path = self._path(name)
+        body = self._body(secret)
+        for attempt in range(self.retries + 1):
+            try:
+                status, payload = self._post(path, body)
+            except (OSError, http.client.HTTPException) as e:
+                error = str(e) or type(e).__name__
+            else:
+                if status < 300:
+                    return
+                error = f"HTTP {status} {_errors(payload)}".rstrip()
+                if status not in _RETRY_STATUSES:
+                    raise RuntimeError(f"Writing {name} failed: {error}")
+            if attempt < self.retries:
+                # Exponential backoff with jitter, so parallel writers do not retry in step
+                time.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+        raise RuntimeError(f"Writing {name} failed after {self.retries + 1} attempts: {error}")
+
+    def write_many(self, secrets: Iterable[Tuple[str, Secret]]) -> int:
+        """Write ``(name, secret)`` pairs with up to ``pool_size`` writes in flight.
+
+        ``secrets`` is consumed lazily, so long streams are written in
+        constant memory.
+
+        Returns:
+            Number of secrets written
+
+        Raises:
+            RuntimeError: If a write fails; writes not yet started are abandoned
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.pool_size, thread_name_prefix="vault")
+        pending: Deque = deque()
+        written = 0
+        try:
+            for name, secret in secrets:
+                pending.append(self._executor.submit(self.write, name, secret))
+                if len(pending) >= 2 * self.pool_size:
+                    pending.popleft().result()
+                    written += 1
+            while pending:
+                pending.popleft().result()
+                written += 1
+        finally:
+            for future in pending:
+                future.cancel()
+        return written
+
+
+def _errors(payload: bytes) -> str:
+    """Vault's error messages from a response body, or the start of the body."""
+    try:
+        return "; ".join(json.loads(payload)["errors"])
+    except (ValueError, KeyError, TypeError):
+        return payload[:200].decode("utf-8", "replace")
+
+
+class VaultSink(Stage):
+    """Pipeline stage writing every chunk into Vault (see :mod:`securepass.pipeline`).
+
+    A ``PasswordBatch`` is written to ``<path_prefix>1``, ``<path_prefix>2``...
+    in chunk order; a list of ``(name, secret)`` pairs is written as given.
+    """
+
+    def __init__(self, url: str, token: Optional[str] = None, path_prefix: str = "generated/",
+                 mode: str = "inline", **options):
+        """Takes the arguments of :class:`VaultKVWriter`, plus ``path_prefix`` and ``mode``."""
+        super().__init__(mode)
+        VaultKVWriter(url, token, **options).close()
+        self.url = url
+        self.token = token
+        self.path_prefix = path_prefix
+        self.options = options
+        self._number = 0
+        self._writer: Optional[VaultKVWriter] = None
+
+    def open(self) -> None:
+        self._writer = VaultKVWriter(self.url, self.token, **self.options)
+
+    def process(self, chunk) -> None:
+        if isinstance(chunk, PasswordBatch):
+            first = self._number + 1
+            self._number += len(chunk)
+            chunk = ((f"{self.path_prefix}{n}", secret) for n, secret in enumerate(chunk, first))
+        self._writer.write_many(chunk)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -22,6 +22,10 @@ setup(
         "click>=8.0.0",
         "pyperclip>=1.8.0",
     ],
+    extras_require={
+        "encryption": ["cryptography>=41.0.0"],
+        "hashing": ["argon2-cffi>=21.3.0", "bcrypt>=4.0.0"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -0,0 +1,118 @@
+import json
+import random
+import re
+import string
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import audit as audit_module
+from securepass import cli
+from securepass.audit import AuditPolicy, audit_block, audit_file, split_ranges, strength_score
+from securepass.blocklist import Blocklist
+
+CLASS_BITS = [(1, string.ascii_lowercase), (2, string.ascii_uppercase), (4, string.digits)]
+
+
+def _naive(lines, policy, blocked=()):
+    """Per-line reference implementation of the audit counts."""
+    failures, passed, scores = {}, 0, [0] * 5
+    for line in lines:
+        mask = sum(bit for bit, chars in CLASS_BITS if any(c in chars for c in line))
+        mask |= 8 * any(c not in string.ascii_letters + string.digits for c in line)
+        size = len(line.encode("utf-8"))
+        reasons = policy.failures(size, mask)
+        if policy.max_repeat and re.search(rb"(.)\1{%d}" % policy.max_repeat, line.encode("utf-8")):
+            reasons.append("repeated")
+        if any(word in line.lower() for word in blocked):
+            reasons.append("blocklisted")
+        for reason in reasons:
+            failures[reason] = failures.get(reason, 0) + 1
+        passed += not reasons
+        scores[strength_score(size, mask)] += 1
+    return failures, passed, scores
+
+
+def test_block_counts():
+    """Test classes, failures and skipped empty lines on a small block with CRLF endings."""
+    block = "abc\r\nABC1\n\n!!x\nPass-word1\nété\nZZZZzzzz1234!".encode("utf-8")
+    report = audit_block(block, AuditPolicy(min_length=10, min_classes=3, required=["digit"], max_repeat=3))
+    assert report.passwords == 6 and report.empty == 1
+    assert report.passed == 1
+    assert dict(report.failures) == {"too_short": 4, "too_few_classes": 4, "missing_digit": 3, "repeated": 1}
+    assert report.classes == [0, 1, 3, 0, 2]
+    assert report.as_dict()["min_length"] == 3 and report.as_dict()["max_length"] == 13
+
+
+@pytest.mark.parametrize("policy", [
+    AuditPolicy(),
+    AuditPolicy(min_length=8, max_length=14, min_classes=2, required=["upper", "symbol"], max_repeat=1),
+    AuditPolicy(min_length=4, min_classes=0, max_repeat=2),
+])
+def test_matches_per_line_reference(policy):
+    """Test the bulk audit agrees with a line-by-line evaluation."""
+    rng = random.Random(7)
+    alphabet = string.ascii_letters + string.digits + string.punctuation + " é"
+    lines = ["".join(rng.choice(alphabet[:rng.choice([10, 26, 62, 96])]) for _ in range(rng.randint(1, 24)))
+             for _ in range(3000)]
+    report = audit_block("\n".join(lines).encode("utf-8"), policy)
+    failures, passed, scores = _naive(lines, policy)
+    assert (dict(report.failures), report.passed, report.scores) == (failures, passed, scores)
+
+
+def test_blocklist(tmp_path):
+    """Test lines with a blocked word fail the policy."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("password\nletmein\n")
+    with Blocklist.open(str(wordlist)) as words:
+        lines = ["MyPassword1!", "letmein", "Str0ng-enough", "pass word", "LETMEINletmein"]
+        report = audit_block("\n".join(lines).encode(), AuditPolicy(min_length=4, min_classes=1), words)
+    assert report.failures["blocklisted"] == 3
+    assert report.passed == 2
+
+
+def test_file_ranges_and_workers(tmp_path, monkeypatch):
+    """Test ranges end at newlines and a multi-process audit equals a single-process one."""
+    data = b"".join(b"%d-Password-%d\n" % (i, i * 7) for i in range(20000))
+    assert all(data[end - 1:end] == b"\n" for _, end in split_ranges(data, 7))
+    assert split_ranges(data, 7)[-1][1] == len(data)
+    assert split_ranges(b"no newline", 3) == [(0, 10)]
+
+    path = tmp_path / "dump.txt"
+    path.write_bytes(data + b"last")
+    monkeypatch.setattr(audit_module, "MIN_RANGE_SIZE", 1000)
+    monkeypatch.setattr(audit_module, "BLOCK_SIZE", 4096)
+    policy = AuditPolicy(max_repeat=2)
+    single = audit_file(str(path), policy, workers=1)
+    multi = audit_file(str(path), policy, workers=3)
+    assert single.passwords == 20001
+    assert multi.as_dict() == single.as_dict()
+
+    (tmp_path / "empty.txt").write_bytes(b"")
+    assert audit_file(str(tmp_path / "empty.txt")).passwords == 0
+
+
+def test_invalid_policy():
+    """Test invalid bounds and class names are rejected."""
+    for kwargs in [{"min_length": 0}, {"min_length": 10, "max_length": 8}, {"min_classes": 5},
+                   {"required": ["emoji"]}, {"max_repeat": 0}]:
+        with pytest.raises(ValueError):
+            AuditPolicy(**kwargs)
+
+
+def test_cli_audit(tmp_path):
+    """Test passgen audit prints a text or JSON report."""
+    dump = tmp_path / "dump.txt"
+    dump.write_text("hunter2\nCorrect-Horse-Battery-9\npassword123\n\n")
+    words = tmp_path / "words.txt"
+    words.write_text("password\n")
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['audit', str(dump), '--blocklist', str(words)])
+    assert result.exit_code == 0, result.output
+    assert "Audited 3 passwords" in result.output and "Passed policy: 1 (33.3%)" in result.output
+    assert "blocklisted: 1" in result.output
+
+    result = runner.invoke(cli.cli, ['audit', str(dump), '--json', '--min-length', '8', '--require', 'symbol'])
+    report = json.loads(result.output)
+    assert report["passwords"] == 3 and report["empty"] == 1
+    assert report["failures"] == {"missing_symbol": 2, "too_few_classes": 2, "too_short": 1}
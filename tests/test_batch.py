@@ -0,0 +1,93 @@
+import os
+import string
+import pytest
+from securepass.batch import PasswordBatch
+from securepass.generator import PasswordGenerator
+
+
+def test_batch_indexing_and_len():
+    """Test a batch behaves like a list of fixed-length strings."""
+    batch = PasswordBatch(bytearray(b"aaaabbbbcccc"), 4)
+    assert len(batch) == 3
+    assert batch[0] == "aaaa"
+    assert batch[-1] == "cccc"
+    assert list(batch) == ["aaaa", "bbbb", "cccc"]
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_batch_slicing():
+    """Test slices return new batches, including stepped and empty slices."""
+    batch = PasswordBatch(b"aaaabbbbccccdddd", 4)
+    assert isinstance(batch[1:3], PasswordBatch)
+    assert batch[1:3].tolist() == ["bbbb", "cccc"]
+    assert batch[::2].tolist() == ["aaaa", "cccc"]
+    assert batch[::-1].tolist() == ["dddd", "cccc", "bbbb", "aaaa"]
+    assert len(batch[3:1]) == 0
+
+
+def test_batch_invalid_stride():
+    """Test invalid strides are rejected."""
+    with pytest.raises(ValueError):
+        PasswordBatch(b"abc", 0)
+    with pytest.raises(ValueError):
+        PasswordBatch(b"abcde", 2)
+
+
+def test_batch_repr_hides_passwords():
+    """Test repr never reveals the stored passwords."""
+    batch = PasswordBatch(b"secretpw", 8)
+    assert "secretpw" not in repr(batch)
+
+
+def test_batch_write_to(tmp_path):
+    """Test write_to streams every password with separators."""
+    batch = PasswordBatch(b"aaaabbbbcccc", 4)
+    path = tmp_path / "out.txt"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    try:
+        assert batch.write_to(fd) == 15
+    finally:
+        os.close(fd)
+    assert path.read_bytes() == b"aaaa\nbbbb\ncccc\n"
+
+    with open(path, "wb") as f:
+        batch.write_to(f, sep=b"")
+    assert path.read_bytes() == b"aaaabbbbcccc"
+
+
+def test_batch_write_to_many_buffers(tmp_path):
+    """Test writes spanning more buffers than one writev call accepts."""
+    batch = PasswordGenerator.generate_passwords(5000, 8, "alnum")
+    path = tmp_path / "many.txt"
+    with open(path, "wb") as f:
+        batch.write_to(f)
+    assert path.read_text().splitlines() == batch.tolist()
+
+
+def test_generate_passwords_charsets():
+    """Test batch generation respects length and charset."""
+    batch = PasswordGenerator.generate_passwords(200, 12, "digits")
+    assert len(batch) == 200
+    assert batch.stride == 12
+    assert all(p.isdigit() and len(p) == 12 for p in batch)
+
+
+def test_generate_passwords_full_has_all_classes():
+    """Test every "full" password in a batch contains each character class."""
+    for password in PasswordGenerator.generate_passwords(500, 8, "full"):
+        assert any(c.isupper() for c in password)
+        assert any(c.islower() for c in password)
+        assert any(c.isdigit() for c in password)
+        assert any(c in string.punctuation for c in password)
+
+
+def test_generate_passwords_validation():
+    """Test batch generation validates its arguments."""
+    assert len(PasswordGenerator.generate_passwords(0)) == 0
+    with pytest.raises(ValueError, match="Invalid password count"):
+        PasswordGenerator.generate_passwords(-1)
+    with pytest.raises(ValueError, match="Invalid password length"):
+        PasswordGenerator.generate_passwords(5, 4)
+    with pytest.raises(ValueError, match="Invalid charset"):
+        PasswordGenerator.generate_passwords(5, 10, "invalid")
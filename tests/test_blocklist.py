@@ -0,0 +1,113 @@
+import os
+import random
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass.blocklist import Blocklist
+from securepass.generator import PasswordGenerator
+
+WORDS = ["password", "dragon", "monkey", "Letmein", "shadow", "he", "sword", "ordnance"]
+
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(WORDS) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def blocklist(wordlist):
+    with Blocklist.open(wordlist) as b:
+        yield b
+
+
+def test_contains(blocklist):
+    """Test words are found anywhere in a password, case-insensitively."""
+    assert "xxPassWord99" in blocklist
+    assert blocklist.contains("7LETMEIN")
+    assert blocklist.contains("qq-dragon")
+    assert not blocklist.contains("drago-n")
+    assert not blocklist.contains("")
+    # Words shorter than the minimum length are ignored
+    assert not blocklist.contains("heheheh")
+    assert blocklist.check_many(["monkey1", "m0nkey"]) == [True, False]
+
+
+def test_matching_lines(blocklist):
+    """Test a block of lines is scanned in one pass without matches spanning lines."""
+    block = b"fine\nxxPASSWORDxx\npass\nword\ndragonmonkey\n\nshadow"
+    assert blocklist.matching_lines(block) == [1, 4, 6]
+    assert blocklist.matching_lines(b"") == []
+
+
+def test_overlapping_words(blocklist):
+    """Test matches that start partway through a longer partial match."""
+    assert blocklist.find("xpasswordnance") == "password"
+    assert blocklist.find("passworX") is None
+    assert blocklist.find("PASSSWORD") == "SWORD"
+    assert blocklist.find("ordnancx") is None
+    assert blocklist.find("zzordnance") == "ordnance"
+
+
+def test_matches_naive_search(tmp_path):
+    """Test the automaton agrees with a substring search on random inputs."""
+    rng = random.Random(3)
+    words = ["".join(rng.choice("abc") for _ in range(rng.randint(4, 7))) for _ in range(60)]
+    path = str(tmp_path / "abc.ac")
+    with Blocklist.compile(words, path) as b:
+        for _ in range(500):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 20)))
+            assert b.contains(text) is any(word in text for word in words)
+            found = b.find(text)
+            assert found is None or found in words
+
+
+def test_cache_reused_and_refreshed(wordlist):
+    """Test the compiled automaton is cached and rebuilt when the wordlist changes."""
+    cache = wordlist + ".ac"
+    Blocklist.open(wordlist).close()
+    assert os.path.exists(cache)
+    with patch.object(Blocklist, "compile") as compile_:
+        Blocklist.open(wordlist).close()
+    compile_.assert_not_called()
+
+    with open(wordlist, "a") as f:
+        f.write("qwerty\n")
+    with Blocklist.open(wordlist) as b:
+        assert b.contains("1qwerty1")
+
+    with open(cache, "wb") as f:
+        f.write(b"garbage")
+    with Blocklist.open(wordlist) as b:
+        assert b.contains("1qwerty1")
+
+
+def test_empty_wordlist(tmp_path):
+    """Test an empty blocklist blocks nothing."""
+    with Blocklist.compile([], str(tmp_path / "empty.ac")) as b:
+        assert not b.contains("anything")
+
+
+def test_generator_rejects_blocked(blocklist):
+    """Test the generator redraws passwords containing blocked words."""
+    candidates = iter([b"xxdragonxx", b"shadow0000", b"cleanpass1"])
+    with patch("securepass.generator._CharsetTable.sample", lambda self, n: next(candidates)):
+        assert PasswordGenerator.generate_password(10, "alnum", reject=blocklist.contains) == "cleanpass1"
+    batch = PasswordGenerator.generate_passwords(500, 12, "letters", reject=blocklist.contains)
+    assert not any(blocklist.check_many(batch))
+
+
+def test_cli_blocklist(wordlist, tmp_path):
+    """Test --blocklist filters generated passwords and writes the cache."""
+    cache = str(tmp_path / "compiled.ac")
+    result = CliRunner().invoke(cli.cli, ['--count', '200', '-c', 'letters', '-l', '10',
+                                          '--blocklist', wordlist, '--blocklist-cache', cache])
+    assert result.exit_code == 0
+    passwords = result.output.split()
+    assert len(passwords) == 200
+    with Blocklist(cache) as b:
+        assert not any(b.check_many(passwords))
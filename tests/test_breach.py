@@ -0,0 +1,123 @@
+import hashlib
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass.breach import BreachCorpus, sha1_hex
+from securepass.clipboard import ClipboardDriver
+from securepass.generator import PasswordGenerator
+
+BREACHED = ["password", "123456", "hunter2", "correct horse battery staple"]
+
+
+def _write_corpus(path, passwords, filler=500, lowercase=False):
+    """Write a sorted HIBP-style corpus containing ``passwords`` plus filler hashes."""
+    hashes = {sha1_hex(p).decode() for p in passwords}
+    hashes |= {hashlib.sha1(b"filler%d" % i).hexdigest().upper() for i in range(filler)}
+    lines = [f"{h.lower() if lowercase else h}:{i + 1}" for i, h in enumerate(sorted(hashes))]
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode())
+    return path
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    return _write_corpus(tmp_path / "pwned.txt", BREACHED)
+
+
+def test_sha1_hex():
+    """Test hashes are uppercase hex bytes."""
+    assert sha1_hex("password") == b"5BAA61E4C9B93F3F0682250B6CF8331B7EE68FD8"
+
+
+def test_contains(corpus_path):
+    """Test breached passwords are found and others are not."""
+    with BreachCorpus(str(corpus_path)) as corpus:
+        for password in BREACHED:
+            assert password in corpus
+        assert "not-in-the-corpus" not in corpus
+        assert corpus.check_many(["hunter2", "Hunter2", "123456"]) == [True, False, True]
+
+
+def test_every_hash_found(corpus_path):
+    """Test the binary search finds the first, last and every other line."""
+    hashes = [line.split(b":")[0] for line in corpus_path.read_bytes().splitlines()]
+    with BreachCorpus(str(corpus_path)) as corpus:
+        assert all(corpus.contains_hash(h) for h in hashes)
+        assert not corpus.contains_hash(b"0" * 40)
+        assert not corpus.contains_hash(b"F" * 40)
+
+
+def test_lowercase_corpus(tmp_path):
+    """Test corpora with lowercase hex digests are searched correctly."""
+    path = _write_corpus(tmp_path / "lower.txt", BREACHED, lowercase=True)
+    with BreachCorpus(str(path)) as corpus:
+        assert "hunter2" in corpus
+        assert "hunter3" not in corpus
+
+
+def test_empty_corpus(tmp_path):
+    """Test an empty corpus contains nothing."""
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    with BreachCorpus(str(path)) as corpus:
+        assert "password" not in corpus
+
+
+def test_prefix_index(corpus_path, tmp_path):
+    """Test lookups through a prefix index match plain binary search."""
+    index = tmp_path / "pwned.idx"
+    with BreachCorpus(str(corpus_path)) as corpus:
+        corpus.build_index(str(index))
+
+    with BreachCorpus(str(corpus_path), str(index)) as corpus:
+        for password in BREACHED:
+            assert password in corpus
+        assert "not-in-the-corpus" not in corpus
+
+
+def test_prefix_index_mismatch(corpus_path, tmp_path):
+    """Test an index built for another corpus is refused."""
+    index = tmp_path / "other.idx"
+    other = _write_corpus(tmp_path / "other.txt", ["x"], filler=10)
+    with BreachCorpus(str(other)) as corpus:
+        corpus.build_index(str(index))
+
+    with pytest.raises(ValueError, match="does not match"):
+        BreachCorpus(str(corpus_path), str(index))
+
+
+def test_generator_reject(corpus_path):
+    """Test the generator redraws candidates the predicate rejects."""
+    candidates = iter([True, True, False])
+    password = PasswordGenerator.generate_password(12, "alnum", reject=lambda p: next(candidates))
+    assert len(password) == 12
+
+    with BreachCorpus(str(corpus_path)) as corpus:
+        batch = PasswordGenerator.generate_passwords(100, 8, "digits", reject=corpus.contains)
+        assert not any(corpus.check_many(batch))
+
+
+def test_generator_reject_everything():
+    """Test a predicate that rejects every candidate eventually fails."""
+    with pytest.raises(RuntimeError, match="rejected"):
+        PasswordGenerator.generate_password(8, "digits", reject=lambda p: True)
+    with pytest.raises(RuntimeError, match="rejected"):
+        PasswordGenerator.generate_passwords(2, 8, "digits", reject=lambda p: True)
+
+
+def test_cli_reject_breached(corpus_path, tmp_path):
+    """Test --reject-breached passes the corpus check to the generator."""
+    index = tmp_path / "pwned.idx"
+    with patch.object(ClipboardDriver, 'copy_password'):
+        runner = CliRunner()
+        result = runner.invoke(cli.cli, [
+            '--no-copy', '--reject-breached', str(corpus_path), '--breach-index', str(index),
+        ])
+
+    assert result.exit_code == 0
+    assert index.exists()
+    password = result.output.split("Generated Password: ")[1].strip()
+    with BreachCorpus(str(corpus_path)) as corpus:
+        assert password not in corpus
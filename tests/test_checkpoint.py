@@ -0,0 +1,154 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.checkpoint import ChunkedJob, Progress, format_duration
+from securepass.hashing import verify_password
+
+
+def _numbers(out, start, n):
+    out.write(b"".join(b"%d\n" % i for i in range(start, start + n)))
+
+
+def _read_all(job):
+    return b"".join(open(job.chunk_path(i), "rb").read() for i in range(job.chunks))
+
+
+def test_writes_numbered_chunks(tmp_path):
+    """Test items are split over chunk files with a final short chunk."""
+    reports = []
+    job = ChunkedJob(str(tmp_path), 25, chunk_size=10, params={"length": 12})
+    assert job.run(_numbers, report=reports.append) == 3
+    assert sorted(os.listdir(tmp_path)) == ["checkpoint.json", "chunk-000000.txt", "chunk-000001.txt",
+                                            "chunk-000002.txt"]
+    assert _read_all(job) == b"".join(b"%d\n" % i for i in range(25))
+    assert [(r.chunks_done, r.items_done) for r in reports] == [(1, 10), (2, 20), (3, 25)]
+    assert reports[-1].eta == 0 and reports[0].rate > 0
+    assert json.loads((tmp_path / "checkpoint.json").read_text())["completed"] == 3
+
+
+def test_resume_after_interruption(tmp_path):
+    """Test a killed job resumes at the first unfinished chunk without rewriting any."""
+    def failing(out, start, n):
+        if start == 20:
+            out.write(b"half a chunk")
+            raise KeyboardInterrupt
+        _numbers(out, start, n)
+
+    job = ChunkedJob(str(tmp_path), 45, chunk_size=10)
+    with pytest.raises(KeyboardInterrupt):
+        job.run(failing)
+    assert sorted(os.listdir(tmp_path)) == ["checkpoint.json", "chunk-000000.txt", "chunk-000001.txt"]
+    first_chunk = os.stat(job.chunk_path(0)).st_mtime_ns
+
+    written = []
+    resumed = ChunkedJob(str(tmp_path), 45, chunk_size=10)
+    assert resumed.completed == 2
+    assert resumed.run(lambda out, start, n: written.append(start) or _numbers(out, start, n)) == 3
+    assert written == [20, 30, 40]
+    assert os.stat(job.chunk_path(0)).st_mtime_ns == first_chunk
+    assert _read_all(resumed) == b"".join(b"%d\n" % i for i in range(45))
+    assert ChunkedJob(str(tmp_path), 45, chunk_size=10).run(_numbers) == 0
+
+
+def test_chunk_renamed_before_checkpoint_counts_as_done(tmp_path):
+    """Test a chunk finished after the last checkpoint update is not regenerated."""
+    job = ChunkedJob(str(tmp_path), 30, chunk_size=10)
+    job.run(_numbers)
+    state = json.loads((tmp_path / "checkpoint.json").read_text())
+    state["completed"] = 1
+    (tmp_path / "checkpoint.json").write_text(json.dumps(state))
+    (tmp_path / ".passgen-stale").write_bytes(b"partial")
+    assert ChunkedJob(str(tmp_path), 30, chunk_size=10).completed == 3
+    assert not (tmp_path / ".passgen-stale").exists()
+
+
+def test_rejects_other_jobs(tmp_path):
+    """Test resuming with different parameters or over unknown chunks fails."""
+    ChunkedJob(str(tmp_path), 30, chunk_size=10, params={"length": 12, "split": (2, 3)}).run(_numbers)
+    assert ChunkedJob(str(tmp_path), 30, chunk_size=10, params={"length": 12, "split": (2, 3)}).completed == 3
+    for kwargs in [{"count": 31}, {"chunk_size": 5}, {"params": {"length": 16, "split": (2, 3)}},
+                   {"checkpoint": False}]:
+        options = {"count": 30, "chunk_size": 10, "params": {"length": 12, "split": (2, 3)}, **kwargs}
+        with pytest.raises(ValueError):
+            ChunkedJob(str(tmp_path), **options)
+    os.unlink(tmp_path / "checkpoint.json")
+    with pytest.raises(ValueError, match="no checkpoint"):
+        ChunkedJob(str(tmp_path), 30, chunk_size=10)
+    with pytest.raises(ValueError):
+        ChunkedJob(str(tmp_path / "new"), 0)
+
+
+def test_progress_format():
+    """Test progress lines and durations."""
+    assert format_duration(3) == "3s"
+    assert format_duration(123) == "2m03s"
+    assert format_duration(3723.4) == "1h02m03s"
+    line = str(Progress(2, 500, 2000000, 500000000, 1e6, 1.0, 498.0))
+    assert line == "Chunk 2/500: 2000000/500000000 written, 1000000/s (1.00s per chunk), ETA 8m18s"
+
+
+def test_cli_output_checkpoint(tmp_path):
+    """Test passgen --count --output --checkpoint writes, resumes and validates."""
+    out = str(tmp_path / "out")
+    runner = CliRunner()
+    args = ['--count', '250', '--output', out, '--checkpoint', '--chunk-size', '100', '-l', '12',
+            '-c', 'alnum']
+    result = runner.invoke(cli.cli, args)
+    assert result.exit_code == 0, result.output
+    assert "Chunk 3/3: 250/250 written" in result.output and "ETA" in result.output
+    lines = [line for i in range(3) for line in open(os.path.join(out, f"chunk-{i:06d}.txt"))]
+    assert len(lines) == 250 and len(set(lines)) == 250
+    assert all(len(line) == 13 and line[:12].isalnum() for line in lines)
+
+    # As if the job had been killed while writing the last chunk
+    state_path = os.path.join(out, "checkpoint.json")
+    with open(state_path) as f:
+        state = json.load(f)
+    with open(state_path, "w") as f:
+        json.dump(dict(state, completed=2), f)
+    os.unlink(os.path.join(out, "chunk-000002.txt"))
+    result = runner.invoke(cli.cli, args)
+    assert result.exit_code == 0
+    assert "Resuming at chunk 3/3" in result.output
+    assert len(open(os.path.join(out, "chunk-000002.txt")).readlines()) == 50
+    assert [line for line in open(os.path.join(out, "chunk-000000.txt"))] == lines[:100]
+
+    result = runner.invoke(cli.cli, args)
+    assert "already written" in result.output
+
+    result = runner.invoke(cli.cli, args[:-2] + ['-l', '16'])
+    assert result.exit_code == 1 and "different job" in result.output
+
+
+def test_cli_output_split_and_usage(tmp_path):
+    """Test chunked Shamir shares and the option combinations that are refused."""
+    out = str(tmp_path / "shares")
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['--count', '30', '--output', out, '--chunk-size', '20',
+                                     '--split', '2/3'])
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(out)) == ["chunk-000000.txt", "chunk-000001.txt"]
+    assert len(open(os.path.join(out, "chunk-000001.txt")).read().split()) == 30
+
+    for args in [['--checkpoint'], ['--output', out], ['--count', '5', '--checkpoint'],
+                 ['--count', '5', '--output', str(tmp_path / "x"), '--encrypt-to', 'f.enc'],
+                 ['--count', '5', '--output', str(tmp_path / "x"), '--hash', 'bcrypt', '--format', 'shadow'],
+                 ['--count', '5', '--output', str(tmp_path / "x"), '--hash', 'pbkdf2', '--format', 'shadow']]:
+        result = runner.invoke(cli.cli, args)
+        assert result.exit_code != 0
+    assert not os.path.exists(tmp_path / "x")
+
+
+def test_cli_output_hash_pairs(tmp_path):
+    """Test hashed chunk files hold jsonl records pairing each password with its hash."""
+    out = str(tmp_path / "hashed")
+    result = CliRunner().invoke(cli.cli, ['--count', '3', '--output', out, '--hash', 'pbkdf2',
+                                          '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in open(os.path.join(out, "chunk-000000.txt"))]
+    assert [r["user"] for r in records] == ["user1", "user2", "user3"]
+    assert all(verify_password(r["password"], r["hash"]) for r in records)
@@ -3,6 +3,7 @@ Tests for the Secure Password Generator CLI module.
 """
 
 import pytest
+import subprocess
 import sys
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
@@ -175,4 +176,12 @@ def test_cli_main_module():
                 sys.exit(result)
             
             # Verify sys.exit was called with the expected value
-            mock_exit.assert_called_once_with(42)
\ No newline at end of file
+            mock_exit.assert_called_once_with(42)
+
+
+def test_cli_import_defers_vault():
+    """Test importing the CLI loads neither the Vault writer, HTTP and TLS modules nor multiprocessing."""
+    modules = ['securepass.vault', 'securepass.pipeline', 'http.client', 'ssl', 'multiprocessing']
+    code = f"import sys, securepass.cli; print([m for m in {modules!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,106 @@
+import tracemalloc
+
+import pytest
+from securepass.dedup import BlockedBloomFilter, make_unique
+from securepass.generator import PasswordGenerator
+
+
+def _counter_draw(stride):
+    """Return a draw function yielding fresh, never-repeating values."""
+    state = {"next": 0}
+
+    def draw(count):
+        out = b""
+        for _ in range(count):
+            out += b"z%0*d" % (stride - 1, state["next"])
+            state["next"] += 1
+        return out
+
+    return draw
+
+
+def test_bloom_filter_add():
+    """Test the filter reports items it has already seen."""
+    bloom = BlockedBloomFilter(1024, 100)
+    assert bloom.add(b"alpha") is False
+    assert bloom.add(b"alpha") is True
+    assert bloom.add(b"beta") is False
+    assert 1 <= bloom.hashes <= 8
+
+
+def test_make_unique_exact():
+    """Test the exact path replaces every later duplicate."""
+    buffer = bytearray(b"aaaabbbbaaaaccccbbbb")
+    collisions = make_unique(buffer, 4, _counter_draw(4), memory_budget=1 << 20)
+    values = [bytes(buffer[i:i + 4]) for i in range(0, 20, 4)]
+    assert collisions == 2
+    assert values[:2] == [b"aaaa", b"bbbb"]
+    assert len(set(values)) == 5
+
+
+def test_make_unique_bloom():
+    """Test the Bloom path finds every duplicate within a small budget."""
+    items = [b"%08d" % i for i in range(3000)]
+    items += items[:500]  # 500 exact duplicates
+    buffer = bytearray(b"".join(items))
+    # 3500 * (8 + overhead) bytes would not fit, forcing the Bloom filter path
+    collisions = make_unique(buffer, 8, _counter_draw(8), memory_budget=16384)
+    values = [bytes(buffer[i:i + 8]) for i in range(0, len(buffer), 8)]
+    assert collisions == 500
+    assert len(set(values)) == 3500
+    assert values[:3000] == items[:3000]
+
+
+@pytest.mark.parametrize("budget", [256 * 1024, 64 * 1024])
+def test_make_unique_bloom_peak_memory(budget):
+    """Test the Bloom path, its positives and their exact re-check stay within the budget."""
+    items = [b"%08d" % i for i in range(20000)]
+    items += items[:1000]
+    buffer = bytearray(b"".join(items))
+    draw = _counter_draw(8)
+    tracemalloc.start()
+    try:
+        collisions = make_unique(buffer, 8, draw, memory_budget=budget)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert collisions == 1000
+    assert len({bytes(buffer[i:i + 8]) for i in range(0, len(buffer), 8)}) == len(items)
+    assert peak <= budget
+
+
+def test_make_unique_empty():
+    """Test empty batches need no check and no draws."""
+    assert make_unique(bytearray(), 8, _counter_draw(8), memory_budget=1 << 20) == 0
+    assert len(PasswordGenerator.generate_passwords(0, 8, "digits", unique=True)) == 0
+
+
+def test_make_unique_budget_too_small():
+    """Test budgets below a few bits per item are rejected."""
+    with pytest.raises(ValueError, match="too small"):
+        make_unique(bytearray(b"%08d" % 1) * 1000, 8, _counter_draw(8), memory_budget=100)
+
+
+def test_generate_unique_passwords():
+    """Test unique batches of short codes contain no duplicates."""
+    batch = PasswordGenerator.generate_passwords(20000, 8, "digits", unique=True)
+    assert len(set(batch)) == 20000
+
+    small_budget = PasswordGenerator.generate_passwords(
+        20000, 8, "digits", unique=True, memory_budget=64 * 1024
+    )
+    assert len(set(small_budget)) == 20000
+
+
+def test_generate_unique_reports_collisions():
+    """Test collisions are reported on the batch and to the stats collector."""
+    # 50000 draws from 10**8 values collide about a dozen times on average
+    with PasswordGenerator.stats() as collected:
+        batch = PasswordGenerator.generate_passwords(50000, 8, "digits", unique=True)
+    assert collected.collisions == batch.collisions
+
+
+def test_generate_unique_impossible():
+    """Test requesting more unique passwords than exist fails fast."""
+    with pytest.raises(ValueError, match="Cannot generate"):
+        PasswordGenerator.generate_passwords(10 ** 9, 8, "digits", unique=True)
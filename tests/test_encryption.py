@@ -0,0 +1,199 @@
+import io
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.encryption import (
+    CIPHER_AES_GCM,
+    CIPHER_SHAKE_BLAKE2,
+    DecryptionError,
+    EncryptedWriter,
+    _HEADER,
+    _RECORD,
+    decrypt_stream,
+    default_cipher,
+)
+from securepass.generator import PasswordGenerator
+
+FAST = {"work_factor": 10}
+
+CIPHERS = [CIPHER_SHAKE_BLAKE2]
+try:
+    import cryptography  # noqa: F401
+    CIPHERS.append(CIPHER_AES_GCM)
+except ImportError:
+    pass
+
+
+def _encrypt(data, cipher=CIPHER_SHAKE_BLAKE2, chunk_size=64, writes=1):
+    f = io.BytesIO()
+    with EncryptedWriter(f, "passphrase", chunk_size=chunk_size, cipher=cipher, **FAST) as w:
+        step = max(1, len(data) // writes)
+        for i in range(0, len(data), step):
+            w.write(data[i:i + step])
+    return f.getvalue()
+
+
+def _decrypt(blob, passphrase="passphrase"):
+    return b"".join(decrypt_stream(io.BytesIO(blob), passphrase))
+
+
+@pytest.mark.parametrize("cipher", CIPHERS)
+@pytest.mark.parametrize("size", [0, 1, 63, 64, 65, 1000])
+def test_round_trip(cipher, size):
+    """Test data of every size relative to the chunk size round-trips."""
+    data = bytes(range(256)) * 4
+    data = data[:size]
+    assert _decrypt(_encrypt(data, cipher, writes=7)) == data
+
+
+def test_ciphertext_hides_plaintext():
+    """Test the plaintext does not appear in the output."""
+    data = b"hunter2-hunter2-hunter2\n" * 20
+    blob = _encrypt(data)
+    assert b"hunter2" not in blob
+    assert blob != _encrypt(data)
+
+
+def test_default_cipher():
+    """Test the stdlib cipher is used when cryptography is missing."""
+    expected = CIPHER_AES_GCM if CIPHER_AES_GCM in CIPHERS else CIPHER_SHAKE_BLAKE2
+    assert default_cipher() == expected
+
+
+def test_wrong_passphrase():
+    """Test a wrong passphrase fails authentication."""
+    with pytest.raises(DecryptionError, match="Authentication failed"):
+        _decrypt(_encrypt(b"secret"), "other passphrase")
+
+
+def test_tampering_detected():
+    """Test flipped bits, truncation, dropped chunks and trailing data are detected."""
+    blob = bytearray(_encrypt(b"x" * 200))
+    record = _RECORD.size + 64 + 32
+
+    flipped = bytearray(blob)
+    flipped[_HEADER.size + _RECORD.size + 3] ^= 1
+    with pytest.raises(DecryptionError, match="Authentication"):
+        _decrypt(bytes(flipped))
+
+    with pytest.raises(DecryptionError, match="truncated"):
+        _decrypt(bytes(blob[:_HEADER.size + record]))
+
+    dropped = blob[:_HEADER.size] + blob[_HEADER.size + record:]
+    with pytest.raises(DecryptionError, match="Authentication"):
+        _decrypt(bytes(dropped))
+
+    with pytest.raises(DecryptionError, match="after the final chunk"):
+        _decrypt(bytes(blob) + b"\0")
+
+
+def test_not_encrypted():
+    """Test arbitrary input is rejected."""
+    with pytest.raises(DecryptionError, match="Not a securepass"):
+        _decrypt(b"hello")
+    with pytest.raises(DecryptionError, match="Not a securepass"):
+        _decrypt(b"X" * 100)
+
+
+def test_failed_write_is_not_finalized():
+    """Test an exception while writing leaves a stream that reads as truncated."""
+    f = io.BytesIO()
+    with pytest.raises(RuntimeError):
+        with EncryptedWriter(f, "passphrase", chunk_size=16, **FAST) as w:
+            w.write(b"a" * 40)
+            raise RuntimeError("generation failed")
+    with pytest.raises(DecryptionError, match="truncated"):
+        _decrypt(f.getvalue())
+
+
+def test_invalid_parameters():
+    """Test invalid writer parameters are rejected."""
+    with pytest.raises(ValueError, match="Passphrase"):
+        EncryptedWriter(io.BytesIO(), "")
+    with pytest.raises(ValueError, match="chunk size"):
+        EncryptedWriter(io.BytesIO(), "p", chunk_size=0)
+    with pytest.raises(ValueError, match="cipher"):
+        EncryptedWriter(io.BytesIO(), "p", cipher="rot13")
+    for work_factor in (9, 20, 30):
+        with pytest.raises(ValueError, match="work factor"):
+            EncryptedWriter(io.BytesIO(), "p", work_factor=work_factor)
+
+
+@pytest.mark.parametrize("field,value", [(3, 20), (4, 0), (4, 255), (5, 0), (5, 255)])
+def test_unsupported_kdf_parameters(field, value):
+    """Test out-of-range scrypt parameters in the header are reported, not passed to scrypt."""
+    fields = list(_HEADER.unpack(_encrypt(b"secret")[:_HEADER.size]))
+    fields[field] = value
+    with pytest.raises(DecryptionError, match="Unsupported"):
+        _decrypt(_HEADER.pack(*fields))
+
+
+def test_kdf_errors_become_decryption_errors(monkeypatch):
+    """Test scrypt failures surface as DecryptionError."""
+    blob = _encrypt(b"secret")
+
+    def failing_scrypt(*args, **kwargs):
+        raise ValueError("memory limit exceeded")
+
+    monkeypatch.setattr("securepass.encryption.hashlib.scrypt", failing_scrypt)
+    with pytest.raises(DecryptionError, match="memory limit"):
+        _decrypt(blob)
+
+
+def test_aes_gcm_requires_cryptography():
+    """Test AES-GCM without cryptography raises ImportError."""
+    if CIPHER_AES_GCM in CIPHERS:
+        pytest.skip("cryptography is installed")
+    with pytest.raises(ImportError, match="cryptography"):
+        EncryptedWriter(io.BytesIO(), "p", cipher=CIPHER_AES_GCM, **FAST)
+
+
+def test_batch_to_bytes():
+    """Test batches serialize with a separator after every password."""
+    batch = PasswordGenerator.generate_passwords(50, 12, "alnum")
+    assert batch.to_bytes() == "".join(p + "\n" for p in batch).encode()
+    assert batch.to_bytes(b"\r\n") == "".join(p + "\r\n" for p in batch).encode()
+    assert batch[:0].to_bytes() == b""
+
+
+def test_cli_encrypt_and_decrypt(tmp_path, monkeypatch):
+    """Test --encrypt-to writes a file that passgen decrypt streams back."""
+    monkeypatch.setenv("SP_PASSPHRASE", "correct horse")
+    encrypted = tmp_path / "out.enc"
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, [
+        '--count', '100', '-c', 'digits', '--encrypt-to', str(encrypted),
+        '--passphrase-env', 'SP_PASSPHRASE',
+    ])
+    assert result.exit_code == 0
+    assert result.output == ""
+
+    result = runner.invoke(cli.cli, ['decrypt', str(encrypted), '--passphrase-env', 'SP_PASSPHRASE'])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert len(lines) == 100
+    assert all(len(line) == 20 and line.isdigit() for line in lines)
+
+
+def test_cli_decrypt_wrong_passphrase(tmp_path, monkeypatch):
+    """Test decrypt reports authentication failures."""
+    encrypted = tmp_path / "out.enc"
+    encrypted.write_bytes(_encrypt(b"secret"))
+    monkeypatch.setenv("SP_PASSPHRASE", "wrong")
+    result = CliRunner().invoke(cli.cli, ['decrypt', str(encrypted), '--passphrase-env', 'SP_PASSPHRASE'])
+    assert result.exit_code == 1
+    assert "Authentication failed" in result.output
+
+
+def test_cli_decrypt_bad_header(tmp_path, monkeypatch):
+    """Test decrypt reports unusable header parameters without a traceback."""
+    fields = list(_HEADER.unpack(_encrypt(b"secret")[:_HEADER.size]))
+    fields[4] = 200
+    encrypted = tmp_path / "out.enc"
+    encrypted.write_bytes(_HEADER.pack(*fields))
+    monkeypatch.setenv("SP_PASSPHRASE", "passphrase")
+    result = CliRunner().invoke(cli.cli, ['decrypt', str(encrypted), '--passphrase-env', 'SP_PASSPHRASE'])
+    assert result.exit_code == 1
+    assert "Unsupported encryption parameters" in result.output
@@ -0,0 +1,140 @@
+import os
+import pytest
+from unittest.mock import patch
+from securepass.entropy import EntropyHealthError, EntropyPool, HealthTests
+from securepass.generator import PasswordGenerator
+
+
+def _no_runs(block):
+    """Return block with every repeated neighbour changed, so no runs exist."""
+    data = bytearray(block)
+    for i in range(1, len(data)):
+        if data[i] == data[i - 1]:
+            data[i] = (data[i] + 1) % 256
+    return bytes(data)
+
+
+def test_health_cutoffs():
+    """Test SP 800-90B cutoffs for full-entropy bytes at alpha = 2**-40."""
+    health = HealthTests()
+    assert health.rct_cutoff == 6
+    assert health.apt_cutoff == 19
+    assert HealthTests(min_entropy=1).rct_cutoff == 41
+
+
+def test_health_passes_random_data():
+    """Test healthy randomness passes over many blocks."""
+    health = HealthTests()
+    for _ in range(50):
+        health.check(os.urandom(1 << 16))
+    assert not health.failed
+
+
+def test_repetition_count_failure():
+    """Test a stuck source fails the repetition count test."""
+    health = HealthTests()
+    with pytest.raises(EntropyHealthError, match="repetition count"):
+        health.check(_no_runs(os.urandom(1000)) + b"\x2a" * 6)
+    # Once failed, the tests keep failing
+    with pytest.raises(EntropyHealthError, match="previously failed"):
+        health.check(os.urandom(64))
+
+
+def test_repetition_count_across_blocks():
+    """Test a run straddling two blocks is still detected."""
+    health = HealthTests()
+    first = _no_runs(os.urandom(100))
+    health.check(first[:-1] + bytes([first[-2] ^ 1]) + b"\x2a" * 3)
+    with pytest.raises(EntropyHealthError):
+        health.check(b"\x2a" * 3 + _no_runs(os.urandom(100))[1:])
+
+
+def test_repetition_count_allows_shorter_runs():
+    """Test runs just below the cutoff pass."""
+    health = HealthTests()
+    health.check(b"\x01" * 5 + b"\x02" * 5 + b"\x01" * 5)
+    assert not health.failed
+
+
+def test_adaptive_proportion_failure():
+    """Test a biased window fails the adaptive proportion test."""
+    window = bytearray(_no_runs(os.urandom(512)).replace(b"\x07", b"\x08"))
+    for i in range(0, 512, 16):
+        window[i] = 7
+    health = HealthTests()
+    with pytest.raises(EntropyHealthError, match="adaptive proportion"):
+        health.check(bytes(window[:300]))
+        health.check(bytes(window[300:]))
+
+
+def test_sampled_region_catches_stuck_source():
+    """Test a source that gets stuck after the fully tested bytes still fails."""
+    health = HealthTests(full_bytes=1024, period=1 << 20, stride=64)
+    health.check(os.urandom(1 << 18))
+    with pytest.raises(EntropyHealthError):
+        health.check(b"\x2a" * 4096)
+
+
+def test_sampling_tests_every_stride_byte():
+    """Test only every stride-th byte is tested outside the full region, unless sampling is off."""
+    # A run between two tested samples (multiples of 64) and past the fully tested bytes
+    block = bytearray(_no_runs(os.urandom(4096)))
+    block[2001:2007] = b"\x2a" * 6
+    block = bytes(block)
+    sampled = HealthTests(full_bytes=1024, period=1 << 20, stride=64)
+    sampled.check(block)
+    assert not sampled.failed
+    with pytest.raises(EntropyHealthError, match="repetition count"):
+        HealthTests(full_bytes=1 << 20, period=1 << 20).check(block)
+
+
+def test_invalid_sampling():
+    """Test sampling parameters are validated."""
+    for kwargs in [{"full_bytes": 0}, {"full_bytes": 2, "period": 1}, {"stride": 0}]:
+        with pytest.raises(ValueError):
+            HealthTests(**kwargs)
+
+
+def test_pool_reads_and_stops_on_failure():
+    """Test the pool serves every byte once and stops after a failure."""
+    chunks = iter([b"\x00\x01" * 32, b"\x00" * 64])
+    pool = EntropyPool(block_size=64, source=lambda n: next(chunks))
+    assert pool.read(10) + pool.read(54) == b"\x00\x01" * 32
+    with pytest.raises(EntropyHealthError):
+        pool.read(1)
+    with pytest.raises(EntropyHealthError):
+        pool.read(1)
+
+
+def test_pool_large_reads_are_tested():
+    """Test reads larger than a block bypass the buffer but not the tests."""
+    pool = EntropyPool(block_size=64, source=lambda n: b"\x00" * n)
+    with pytest.raises(EntropyHealthError):
+        pool.read(1000)
+
+
+def test_generation_stops_on_health_failure():
+    """Test generation raises once the thread's pool source fails."""
+    failing = EntropyPool(source=lambda n: b"\x00" * n)
+    with patch("securepass.generator._thread_pool", return_value=failing):
+        with pytest.raises(EntropyHealthError):
+            PasswordGenerator.generate_from_rules("minlength: 12")
+        with pytest.raises(RuntimeError, match="Failed to generate passwords"):
+            PasswordGenerator.generate_passwords(10, 12, "alnum")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_pool_discarded_after_fork():
+    """Test a forked child never reuses the parent's buffered bytes."""
+    pool = EntropyPool()
+    pool.read(1)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - child process
+        os.write(write_fd, pool.read(32))
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child = os.read(read_fd, 32)
+    os.close(read_fd)
+    os.close(write_fd)
+    assert child != pool.read(32)
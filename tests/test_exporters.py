@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.exporters import FORMATS, open_exporter, with_passwords
+
+ENTRIES = [
+    ("Mail", "alice", "plain"),
+    ('Team, "ops" <eng>', "bob@example.com", 'p,a"s<s&w>o\nrd'),
+    ("Wiki & docs", "", "x" * 20),
+    ("Héllo", "carol", "ünïcode'"),
+    ("VPN", "dave", "s3cr3t"),
+]
+
+
+def _export(fmt, entries=ENTRIES, **kwargs):
+    out = io.StringIO()
+    with open_exporter(fmt, out, chunk_size=2, **kwargs) as exporter:
+        assert exporter.write(iter(entries)) == len(entries)
+    return out.getvalue()
+
+
+def test_bitwarden_csv():
+    """Test Bitwarden CSV rows round-trip through the csv module."""
+    rows = list(csv.DictReader(io.StringIO(_export("bitwarden-csv", folder="IT, shared"))))
+    assert [(r["name"], r["login_username"], r["login_password"]) for r in rows] == ENTRIES
+    assert {r["type"] for r in rows} == {"login"} and {r["folder"] for r in rows} == {"IT, shared"}
+
+
+def test_onepassword_csv():
+    """Test 1Password CSV rows round-trip and folders are refused."""
+    rows = list(csv.DictReader(io.StringIO(_export("1password-csv"))))
+    assert [(r["Title"], r["Username"], r["Password"]) for r in rows] == ENTRIES
+    with pytest.raises(ValueError):
+        open_exporter("1password-csv", io.StringIO(), folder="x")
+
+
+def test_bitwarden_json():
+    """Test the streamed Bitwarden JSON document parses across chunk boundaries."""
+    document = json.loads(_export("bitwarden-json", folder="IT"))
+    assert document["encrypted"] is False
+    [folder] = document["folders"]
+    assert folder["name"] == "IT"
+    items = document["items"]
+    assert [(i["name"], i["login"]["username"], i["login"]["password"]) for i in items] == ENTRIES
+    assert all(i["type"] == 1 and i["folderId"] == folder["id"] for i in items)
+
+
+def test_keepass_xml():
+    """Test KeePass XML parses with escaped values and unique entry UUIDs."""
+    root = ET.fromstring(_export("keepass-xml", folder="R&D").encode("utf-8"))
+    group = root.find("Root/Group")
+    assert group.findtext("Name") == "R&D"
+    entries = group.findall("Entry")
+    values = [{s.findtext("Key"): s.findtext("Value") for s in e.findall("String")} for e in entries]
+    assert [(v["Title"], v["UserName"], v["Password"] or "") for v in values] == ENTRIES
+    assert len({e.findtext("UUID") for e in entries}) == len(ENTRIES)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_empty_and_invalid(fmt):
+    """Test empty exports are well-formed and values CSV or XML cannot hold are refused."""
+    text = _export(fmt, [])
+    if fmt == "bitwarden-json":
+        assert json.loads(text)["items"] == []
+    elif fmt == "keepass-xml":
+        assert ET.fromstring(text.encode()).find("Root/Group/Entry") is None
+    else:
+        assert text.count("\n") == 1
+    if fmt == "bitwarden-json":
+        assert json.loads(_export(fmt, [("nul\0name", "u", "p")]))["items"][0]["name"] == "nul\0name"
+    else:
+        with pytest.raises(ValueError):
+            _export(fmt, [("nul\0name", "u", "p")])
+
+
+def test_failed_export_is_not_terminated():
+    """Test an exception inside the context leaves the document unfinished."""
+    out = io.StringIO()
+    with pytest.raises(RuntimeError):
+        with open_exporter("keepass-xml", out) as exporter:
+            exporter.write(ENTRIES[:1])
+            raise RuntimeError("generation failed")
+    assert "</KeePassFile>" not in out.getvalue()
+    with pytest.raises(ValueError):
+        _export("keepass-xml", [("bell\x07", "u", "p")])
+    with pytest.raises(ValueError):
+        open_exporter("lastpass-csv", io.StringIO())
+
+
+def test_with_passwords():
+    """Test generated passwords are added in order across chunks."""
+    entries = list(with_passwords(((f"n{i}", f"u{i}") for i in range(10)), 12, "alnum", chunk_size=3))
+    assert [e[:2] for e in entries] == [(f"n{i}", f"u{i}") for i in range(10)]
+    assert all(len(e[2]) == 12 and e[2].isalnum() for e in entries)
+
+
+def test_cli_export(tmp_path):
+    """Test passgen export adds passwords to every account."""
+    accounts = tmp_path / "accounts.csv"
+    accounts.write_text("name,username\nMail,alice\nWiki,\n")
+    output = tmp_path / "vault.json"
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['export', str(accounts), '-f', 'bitwarden-json', '-o', str(output),
+                                     '-l', '16'])
+    assert result.exit_code == 0, result.output
+    items = json.loads(output.read_text())["items"]
+    assert [(i["name"], i["login"]["username"]) for i in items] == [("Mail", "alice"), ("Wiki", "")]
+    assert all(len(i["login"]["password"]) == 16 for i in items)
+
+    accounts.write_text("title\nMail\n")
+    result = runner.invoke(cli.cli, ['export', str(accounts), '-f', 'keepass-xml'])
+    assert result.exit_code == 1
+
+    for text in ("name,username\nMail,alice\n\"\"\nWiki,bob\n", "username,name\nalice,Mail\nbob\n",
+                 "name,username\nMail,alice\n,bob\n"):
+        accounts.write_text(text)
+        result = runner.invoke(cli.cli, ['export', str(accounts), '-f', 'bitwarden-json', '-o', str(output)])
+        assert result.exit_code == 1
+        assert isinstance(result.exception, SystemExit)
+        assert "line 3 has no name" in result.output
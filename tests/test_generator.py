@@ -1,7 +1,6 @@
 import pytest
 import string
-import random
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from securepass.generator import PasswordGenerator
 
 
@@ -65,17 +64,28 @@ def test_password_generation():
     assert any(c in string.punctuation for c in password)
 
 
-def test_system_random_failure():
-    """Test exception handling for SystemRandom failure."""
-    # Create a custom mock class to replace SystemRandom
-    mock_random = MagicMock()
-    mock_random.return_value.choice.side_effect = Exception("Test error")
-    
-    with patch('random.SystemRandom', mock_random):
+def test_randomness_failure():
+    """Test exception handling for randomness source failure."""
+    with patch('securepass.generator._read_random', side_effect=Exception("Test error")):
         with pytest.raises(RuntimeError, match="Failed to generate password"):
             PasswordGenerator.generate_password(10)
 
 
+def test_thread_safety():
+    """Test concurrent generation from many threads yields valid, distinct passwords."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def work(_):
+        return [PasswordGenerator.generate_password(16, "alnum") for _ in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [p for chunk in pool.map(work, range(16)) for p in chunk]
+
+    assert len(results) == 3200
+    assert all(len(p) == 16 and p.isalnum() for p in results)
+    assert len(set(results)) == len(results)
+
+
 def test_min_length_guarantees():
     """Test that even minimal length passwords meet requirements."""
     # Test with minimal length = 8
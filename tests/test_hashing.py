@@ -0,0 +1,205 @@
+import json
+import sys
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass.hashing import (
+    check_format,
+    format_record,
+    hash_password,
+    hash_passwords,
+    memory_cost,
+    plan_workers,
+    resolve_params,
+    verify_password,
+)
+
+FAST = {
+    "scrypt": {"ln": 4},
+    "pbkdf2": {"rounds": 1000},
+    "bcrypt": {"rounds": 4},
+    "argon2": {"time_cost": 1, "memory_cost": 64, "parallelism": 1},
+}
+
+GiB = 1024 ** 3
+
+
+@pytest.mark.parametrize("scheme", ["scrypt", "pbkdf2"])
+def test_hash_and_verify(scheme):
+    """Test stdlib schemes round-trip and use fresh salts."""
+    hashed = hash_password("correct horse", scheme, FAST[scheme])
+    assert verify_password("correct horse", hashed)
+    assert not verify_password("wrong horse", hashed)
+    assert hashed != hash_password("correct horse", scheme, FAST[scheme])
+
+
+def test_hash_formats():
+    """Test hashes are modular crypt strings carrying their parameters."""
+    assert hash_password("x", "scrypt", FAST["scrypt"]).startswith("$scrypt$ln=4,r=8,p=1$")
+    assert hash_password("x", "pbkdf2", FAST["pbkdf2"]).startswith("$pbkdf2-sha256$1000$")
+
+
+@pytest.mark.parametrize("scheme, module", [("bcrypt", "bcrypt"), ("argon2", "argon2")])
+def test_optional_schemes(scheme, module):
+    """Test bcrypt and argon2 when their packages are installed."""
+    pytest.importorskip(module)
+    hashed = hash_password("correct horse", scheme, FAST[scheme])
+    assert verify_password("correct horse", hashed)
+    assert not verify_password("wrong horse", hashed)
+
+
+@pytest.mark.parametrize("scheme, module", [("bcrypt", "bcrypt"), ("argon2", "argon2")])
+def test_optional_scheme_missing(scheme, module):
+    """Test a missing optional package raises ImportError."""
+    with patch.dict(sys.modules, {module: None}):
+        with pytest.raises(ImportError, match="not installed"):
+            hash_password("x", scheme, FAST[scheme])
+
+
+def test_invalid_scheme_and_params():
+    """Test unknown schemes and parameters are rejected."""
+    with pytest.raises(ValueError, match="Invalid hash scheme"):
+        hash_password("x", "md5")
+    with pytest.raises(ValueError, match="Invalid parameter"):
+        resolve_params("scrypt", {"rounds": 3})
+    with pytest.raises(ValueError, match="Unrecognized"):
+        verify_password("x", "plaintext")
+
+
+def test_memory_cost():
+    """Test memory estimates follow the KDF parameters."""
+    assert memory_cost("scrypt") > 32 * 1024 * 1024
+    assert memory_cost("scrypt", {"ln": 16}) > 2 * memory_cost("scrypt") - 4096
+    assert memory_cost("argon2") == 64 * 1024 * 1024
+    assert memory_cost("pbkdf2") < memory_cost("bcrypt")
+
+
+def test_plan_workers():
+    """Test the scheduler bounds processes by CPUs and by KDF memory."""
+    assert plan_workers("pbkdf2", workers=8, memory_limit=GiB) == 8
+    # 1 GiB fits few 256 MiB argon2 derivations but many scrypt ones at ln=10
+    assert plan_workers("argon2", {"memory_cost": 262144}, workers=8, memory_limit=GiB) == 3
+    assert plan_workers("scrypt", {"ln": 10}, workers=8, memory_limit=GiB) == 8
+    # Never fewer than one process, even if one derivation does not fit
+    assert plan_workers("argon2", {"memory_cost": 4 * 1048576}, workers=8, memory_limit=GiB) == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_hash_passwords_order(workers):
+    """Test results stream back paired and in input order."""
+    passwords = [f"password-{i}" for i in range(11)]
+    results = list(
+        hash_passwords(iter(passwords), "pbkdf2", FAST["pbkdf2"], workers=workers,
+                       memory_limit=GiB, chunk_size=3)
+    )
+    assert [p for p, _ in results] == passwords
+    assert all(verify_password(p, h) for p, h in results)
+
+
+def test_hash_passwords_validates_eagerly():
+    """Test bad arguments fail at call time, before any hashing."""
+    with pytest.raises(ValueError):
+        hash_passwords([], "md5")
+    with pytest.raises(ValueError):
+        hash_passwords([], "scrypt", chunk_size=0)
+
+
+def test_format_record():
+    """Test the three output formats."""
+    assert format_record("htpasswd", "alice", "pw", "$2b$h") == "alice:$2b$h"
+    assert format_record("shadow", "alice", "pw", "$2b$h").startswith("alice:$2b$h:")
+    assert format_record("shadow", "alice", "pw", "$2b$h").endswith(":0:99999:7:::")
+    assert json.loads(format_record("jsonl", "alice", "pw", "$h")) == {
+        "user": "alice", "password": "pw", "hash": "$h"
+    }
+    with pytest.raises(ValueError):
+        format_record("csv", "alice", "pw", "$h")
+    with pytest.raises(ValueError, match="bcrypt"):
+        format_record("htpasswd", "alice", "pw", "$scrypt$ln=4,r=8,p=1$salt$key")
+
+
+@pytest.mark.parametrize("fmt, scheme", [
+    ("htpasswd", "scrypt"), ("htpasswd", "pbkdf2"), ("htpasswd", "argon2"),
+    ("shadow", "scrypt"), ("shadow", "pbkdf2"), ("shadow", "argon2"),
+    ("csv", "bcrypt"), ("jsonl", "md5"),
+])
+def test_check_format_rejects(fmt, scheme):
+    """Test formats refuse schemes their consumers cannot verify."""
+    with pytest.raises(ValueError):
+        check_format(fmt, scheme)
+
+
+def test_check_format_accepts():
+    """Test jsonl takes every scheme and htpasswd/shadow take bcrypt."""
+    for scheme in ("scrypt", "pbkdf2", "bcrypt", "argon2"):
+        check_format("jsonl", scheme)
+    check_format("htpasswd", "bcrypt")
+    check_format("shadow", "bcrypt")
+
+
+def test_cli_count():
+    """Test --count prints that many passwords without touching the clipboard."""
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['--count', '5', '-c', 'alnum', '-l', '12'])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert len(lines) == 5
+    assert all(len(line) == 12 for line in lines)
+
+
+def test_cli_hash():
+    """Test --hash streams jsonl records carrying the plaintext and its hash."""
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['--count', '2', '--hash', 'pbkdf2', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [r["user"] for r in records] == ["user1", "user2"]
+    for record in records:
+        assert record["hash"].startswith("$pbkdf2-sha256$")
+        assert verify_password(record["password"], record["hash"])
+
+
+def test_cli_hash_htpasswd(tmp_path):
+    """Test htpasswd records with the plaintext side file."""
+    pytest.importorskip("bcrypt")
+    plaintext = tmp_path / "plain.txt"
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, [
+        '--count', '2', '--hash', 'bcrypt', '--format', 'htpasswd', '--workers', '1',
+        '--plaintext-out', str(plaintext),
+    ])
+    assert result.exit_code == 0
+    records = result.output.splitlines()
+    secrets = plaintext.read_text().splitlines()
+    assert [r.split(":")[0] for r in records] == ["user1", "user2"]
+    for record, secret in zip(records, secrets):
+        user, password = secret.split(":", 1)
+        assert record.startswith(user + ":$2b$")
+        assert verify_password(password, record.split(":", 1)[1])
+
+
+@pytest.mark.parametrize("args", [
+    ['--hash', 'pbkdf2', '--format', 'htpasswd', '--plaintext-out'],
+    ['--hash', 'scrypt', '--format', 'shadow', '--plaintext-out'],
+    ['--hash', 'bcrypt', '--format', 'htpasswd'],
+    ['--hash', 'bcrypt', '--format', 'shadow'],
+])
+def test_cli_hash_refused(args, tmp_path):
+    """Test unverifiable scheme/format pairs and hash-only output without plaintext fail before hashing."""
+    if args[-1] == '--plaintext-out':
+        args = args + [str(tmp_path / "plain.txt")]
+    with patch.object(cli, 'hash_passwords') as hashing:
+        result = CliRunner().invoke(cli.cli, ['--count', '2'] + args)
+    assert result.exit_code == 1
+    hashing.assert_not_called()
+    assert not (tmp_path / "plain.txt").exists()
+
+
+def test_cli_hash_requires_count():
+    """Test --hash without --count is an error."""
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['--hash', 'scrypt', '--no-copy'])
+    assert result.exit_code != 0
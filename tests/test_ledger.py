@@ -0,0 +1,153 @@
+import multiprocessing
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass.batch import PasswordBatch
+from securepass.generator import PasswordGenerator
+from securepass.ledger import DIGEST_SIZE, IssuanceLedger
+
+KEY = b"ledger test key"
+
+
+@pytest.fixture
+def ledger_path(tmp_path):
+    return str(tmp_path / "issued.db")
+
+
+@pytest.fixture
+def ledger(ledger_path):
+    with IssuanceLedger(ledger_path, KEY) as ledger:
+        yield ledger
+
+
+def test_digest_is_keyed(ledger_path, tmp_path):
+    """Test digests are truncated HMACs that depend on the key."""
+    other = str(tmp_path / "other.db")
+    with IssuanceLedger(ledger_path, KEY) as a, IssuanceLedger(other, b"other") as b:
+        assert len(a.digest("secret")) == DIGEST_SIZE
+        assert a.digest("secret") == a.digest("secret")
+        assert a.digest("secret") != b.digest("secret")
+
+
+def test_wrong_key_rejected(ledger_path):
+    """Test a ledger refuses a key other than the one it was created with."""
+    IssuanceLedger(ledger_path, KEY).close()
+    with pytest.raises(ValueError, match="Key does not match"):
+        IssuanceLedger(ledger_path, b"wrong key")
+    with pytest.raises(ValueError, match="empty"):
+        IssuanceLedger(ledger_path, b"")
+
+
+def test_record_and_check(ledger):
+    """Test recorded secrets are found, individually and in batches."""
+    assert ledger.record_many(["alpha", "beta", "alpha"]) == 2
+    assert ledger.record_many(["beta", "gamma"]) == 1
+    assert "alpha" in ledger and "delta" not in ledger
+    assert len(ledger) == 3
+    secrets = [f"s{i}" for i in range(1200)]
+    ledger.record_many(secrets[::2])
+    assert ledger.check_many(secrets) == [i % 2 == 0 for i in range(1200)]
+
+
+def test_persists_across_runs(ledger_path):
+    """Test the ledger survives reopening."""
+    with IssuanceLedger(ledger_path, KEY) as ledger:
+        ledger.record_many(["alpha"])
+    with IssuanceLedger(ledger_path, KEY) as ledger:
+        assert "alpha" in ledger
+
+
+def test_claim_many(ledger):
+    """Test claims report previously issued and repeated secrets as not new."""
+    ledger.record_many(["old"])
+    assert ledger.claim_many(["new", "old", "new", "other"]) == [True, False, False, True]
+    assert ledger.reject_reused("fresh") is False
+    assert ledger.reject_reused("fresh") is True
+
+
+def test_generator_no_reuse(ledger):
+    """Test the generator redraws passwords the ledger has seen."""
+    issued = PasswordGenerator.generate_password(8, "digits", reject=ledger.reject_reused)
+    assert issued in ledger
+    assert ledger.reject_reused(issued) is True
+
+    # Candidates 0-99 except 50 were issued before: the generator must settle on 50
+    ledger.record_many(f"{i:08d}" for i in range(100) if i != 50)
+    codes = iter(f"{i:08d}".encode() for i in range(100))
+    with patch("securepass.generator._CharsetTable.sample", lambda self, n: next(codes)):
+        password = PasswordGenerator.generate_password(8, "digits", reject=ledger.reject_reused)
+    assert password == "00000050"
+
+
+def test_replace_reused(ledger):
+    """Test batch claiming overwrites reused passwords in place."""
+    ledger.record_many(["aaaaaaaa", "bbbbbbbb"])
+    batch = PasswordBatch(b"aaaaaaaacccccccccccccccc" + b"bbbbbbbb", 8)
+    fresh = iter(["dddddddd", "eeeeeeee", "ffffffff", "gggggggg"])
+
+    def draw(n):
+        return PasswordBatch("".join(next(fresh) for _ in range(n)).encode(), 8)
+
+    # aaaaaaaa and bbbbbbbb were issued before; the second cccccccc repeats the first
+    assert ledger.replace_reused(batch, draw) == 3
+    assert batch.tolist() == ["dddddddd", "cccccccc", "eeeeeeee", "ffffffff"]
+    assert all(ledger.check_many(batch))
+
+
+def test_batch_setitem():
+    """Test replacing a password in a batch."""
+    batch = PasswordBatch(b"aaaabbbb", 4)
+    batch[1] = "cccc"
+    batch[-2] = "dddd"
+    assert batch.tolist() == ["dddd", "cccc"]
+    with pytest.raises(ValueError):
+        batch[0] = "toolong"
+    with pytest.raises(IndexError):
+        batch[2] = "eeee"
+
+
+def _claim_worker(args):
+    path, secrets = args
+    with IssuanceLedger(path, KEY) as ledger:
+        return sum(ledger.claim_many(secrets))
+
+
+def test_concurrent_claims(ledger_path):
+    """Test processes sharing a ledger never both claim the same secret."""
+    IssuanceLedger(ledger_path, KEY).close()
+    secrets = [f"shared-{i}" for i in range(200)]
+    with multiprocessing.Pool(4) as pool:
+        claimed = pool.map(_claim_worker, [(ledger_path, secrets)] * 4)
+    assert sum(claimed) == len(secrets)
+
+
+def test_cli_no_reuse(ledger_path, monkeypatch):
+    """Test --ledger --no-reuse records passwords across runs."""
+    monkeypatch.setenv("SECUREPASS_LEDGER_KEY", "cli key")
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['--count', '50', '-c', 'digits', '-l', '8',
+                                     '--ledger', ledger_path, '--no-reuse'])
+    assert result.exit_code == 0
+    first = result.output.splitlines()
+    result = runner.invoke(cli.cli, ['--no-copy', '--ledger', ledger_path, '--no-reuse'])
+    assert result.exit_code == 0
+    single = result.output.split("Generated Password: ")[1].strip()
+
+    with IssuanceLedger(ledger_path, b"cli key") as ledger:
+        assert len(ledger) == 51
+        assert all(ledger.check_many(first + [single]))
+
+
+def test_cli_ledger_requires_key(ledger_path, monkeypatch):
+    """Test the ledger options are validated."""
+    monkeypatch.delenv("SECUREPASS_LEDGER_KEY", raising=False)
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['--no-copy', '--ledger', ledger_path])
+    assert result.exit_code == 1
+    assert "SECUREPASS_LEDGER_KEY" in result.output
+    result = runner.invoke(cli.cli, ['--no-copy', '--no-reuse'])
+    assert result.exit_code == 1
+    assert "--no-reuse requires --ledger" in result.output
@@ -0,0 +1,123 @@
+import multiprocessing
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.partition import CodeSpace, parse_node
+
+KEY = b"partition test key"
+
+
+def test_permutation_is_bijective():
+    """Test every counter maps to a distinct code and back."""
+    space = CodeSpace(KEY, 4, "digits")
+    values = [space.permute(i) for i in range(space.size)]
+    assert sorted(values) == list(range(space.size))
+    assert all(space.invert(value) == i for i, value in enumerate(values))
+    assert values[:20] != list(range(20))
+
+
+def test_key_changes_permutation():
+    """Test spaces under different keys order codes differently."""
+    a = CodeSpace(KEY, 10, "alnum")
+    b = CodeSpace(b"other key", 10, "alnum")
+    assert a.codes(0, 50).tolist() != b.codes(0, 50).tolist()
+    assert a.codes(0, 50).tolist() == CodeSpace(KEY, 10, "alnum").codes(0, 50).tolist()
+
+
+def test_codes_use_charset():
+    """Test codes are fixed-length strings over the charset alphabet."""
+    space = CodeSpace(KEY, 12, "letters")
+    for code in space.codes(1000, 100):
+        assert len(code) == 12 and code.isalpha()
+        assert space.code(space.index_of(code)) == code
+    assert space.encode(0) == "a" * 12
+    assert space.decode(space.encode(12345)) == 12345
+
+
+def test_partitions_cover_space():
+    """Test node ranges are disjoint and together cover the counter range."""
+    space = CodeSpace(KEY, 3, "digits")
+    ranges = [space.partition(node, 7) for node in range(7)]
+    assert ranges[0][0] == 0 and ranges[-1][1] == space.size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def _node_codes(args):
+    node, nodes = args
+    space = CodeSpace(KEY, 4, "digits")
+    start, stop = space.partition(node, nodes)
+    return space.codes(start, stop - start).tolist()
+
+
+def test_nodes_never_collide():
+    """Test independent processes generate disjoint codes."""
+    with multiprocessing.Pool(4) as pool:
+        shares = pool.map(_node_codes, [(node, 4) for node in range(4)])
+    issued = [code for share in shares for code in share]
+    assert len(issued) == 10000
+    assert len(set(issued)) == 10000
+
+
+def test_invalid_arguments():
+    """Test invalid spaces, ranges and node specifications are rejected."""
+    with pytest.raises(ValueError):
+        CodeSpace(b"", 8)
+    with pytest.raises(ValueError):
+        CodeSpace(KEY, 8, "full")
+    with pytest.raises(ValueError):
+        CodeSpace(KEY, 8, rounds=4)
+    with pytest.raises(ValueError):
+        CodeSpace(KEY, 4, "digits").codes(9990, 20)
+    with pytest.raises(ValueError):
+        CodeSpace(KEY, 4, "digits").decode("12a4")
+    assert parse_node("3/16") == (3, 16)
+    for bad in ["3", "16/16", "a/4", "-1/4"]:
+        with pytest.raises(ValueError):
+            parse_node(bad)
+
+
+def test_largest_code_space():
+    """Test the longest codes the permutation allows, and the CLI's longest length."""
+    space = CodeSpace(KEY, 171, "alnum")
+    code = space.codes(12345, 1).tolist()[0]
+    assert len(code) == 171
+    assert space.invert(space.decode(code)) == 12345
+    with pytest.raises(ValueError, match="too large"):
+        CodeSpace(KEY, 172, "alnum")
+
+    result = CliRunner().invoke(cli.cli, ['codes', '--node', '0/2', '-n', '2', '-l', '128',
+                                          '--offset', '0'], env={"SECUREPASS_CODE_KEY": "abc"})
+    assert result.exit_code == 0
+    assert [len(line) for line in result.output.splitlines()] == [128, 128]
+
+
+def test_cli_codes_state(tmp_path, monkeypatch):
+    """Test the codes subcommand resumes from its state file."""
+    monkeypatch.setenv("SECUREPASS_CODE_KEY", "cli key")
+    state = tmp_path / "node.state"
+    runner = CliRunner()
+    args = ['codes', '--node', '1/4', '-n', '5', '-l', '8', '--state', str(state)]
+    first = runner.invoke(cli.cli, args)
+    second = runner.invoke(cli.cli, args)
+    assert first.exit_code == 0 and second.exit_code == 0
+    assert state.read_text().strip() == "10"
+
+    codes = first.output.split() + second.output.split()
+    space = CodeSpace(b"cli key", 8, "alnum")
+    start, _ = space.partition(1, 4)
+    assert codes == space.codes(start, 10).tolist()
+
+
+def test_cli_codes_errors(tmp_path, monkeypatch):
+    """Test the codes subcommand validates its options."""
+    monkeypatch.setenv("SECUREPASS_CODE_KEY", "cli key")
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['codes', '--node', '1/4', '-n', '5'])
+    assert result.exit_code != 0
+    assert "--state or --offset" in result.output
+    result = runner.invoke(cli.cli, ['codes', '--node', '0/2', '-n', '6', '-l', '1',
+                                     '-c', 'digits', '--offset', '0'])
+    assert result.exit_code == 1
+    assert "only 5 codes left" in result.output
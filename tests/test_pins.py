@@ -0,0 +1,102 @@
+from collections import Counter
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.generator import PasswordGenerator
+from securepass.pins import COMMON_PINS, PinGenerator, _REPEATED_BLOCK, _dates, _sequences
+
+
+@pytest.mark.parametrize("pin", ["0000", "1212", "1234", "9876", "7890", "1225", "3112", "1987",
+                                 "2580", "000000", "123123", "654321", "311299", "19871987",
+                                 "20240229", "12345678", "777777777777", "121212121212",
+                                 "0123456789", "2109876543"])
+def test_weak_pins(pin):
+    """Test repeats, sequences, dates and common PINs are weak."""
+    assert PinGenerator(len(pin)).is_weak(pin)
+
+
+@pytest.mark.parametrize("pin", ["8361", "4830", "582047", "93720461", "5029173846", "602958173940"])
+def test_strong_pins(pin):
+    """Test PINs without a pattern are allowed."""
+    assert not PinGenerator(len(pin)).is_weak(pin)
+
+
+def test_common_pins_not_covered_by_patterns():
+    """Test the common PIN list only holds PINs the patterns miss."""
+    assert len(set(COMMON_PINS)) == len(COMMON_PINS)
+    for pin in COMMON_PINS:
+        assert _REPEATED_BLOCK.fullmatch(pin) is None
+        assert pin not in _sequences(len(pin))
+        assert pin not in set(_dates(len(pin)))
+
+
+def test_allowed_counts():
+    """Test the number of allowed PINs matches a full scan of the space."""
+    pins = PinGenerator(4)
+    assert pins.allowed == sum(not pins.is_weak(f"{v:04d}") for v in range(10000))
+    assert PinGenerator(10).allowed == 10 ** 10 - (10 + 90 + 99990) - 20
+
+
+@pytest.mark.parametrize("length", [4, 6, 8, 10, 12])
+def test_generated_pins_are_not_weak(length):
+    """Test generated PINs have the length and are never weak."""
+    pins = PinGenerator(length)
+    batch = pins.generate(5000)
+    assert len(batch) == 5000
+    assert all(len(pin) == length and pin.isdigit() and not pins.is_weak(pin) for pin in batch)
+
+
+def test_sampling_covers_allowed_pins_evenly():
+    """Test every allowed 4-digit PIN is drawn, with no PIN over-represented."""
+    pins = PinGenerator(4)
+    counts = Counter(pins.generate(40 * pins.allowed))
+    assert len(counts) == pins.allowed
+    assert max(counts.values()) < 100
+
+
+def test_extra_exclusions():
+    """Test a user-supplied list is excluded alongside the built-in checks."""
+    pins = PinGenerator(4, exclude=["8361\n", "12345", "abcd"])
+    assert pins.is_weak("8361")
+    assert pins.allowed == PinGenerator(4).allowed - 1
+    assert PinGenerator(10, exclude=["5029173846"]).is_weak("5029173846")
+
+
+def test_invalid_arguments():
+    """Test invalid lengths and malformed PINs are rejected."""
+    for length in [3, 13]:
+        with pytest.raises(ValueError):
+            PinGenerator(length)
+    with pytest.raises(ValueError):
+        PinGenerator(4).is_weak("12a4")
+    with pytest.raises(ValueError):
+        PinGenerator(4).is_weak("12345")
+    with pytest.raises(ValueError, match="excluded"):
+        PinGenerator(4, (f"{i:04d}" for i in range(10000)))
+
+
+def test_generator_and_cli(tmp_path):
+    """Test PasswordGenerator.generate_pin and the pin subcommand."""
+    assert len(PasswordGenerator.generate_pin(5)) == 5
+    exclude = tmp_path / "top.txt"
+    exclude.write_text("8361\n")
+    result = CliRunner().invoke(cli.cli, ['pin', '-l', '4', '-n', '2000', '--exclude', str(exclude)])
+    assert result.exit_code == 0
+    pins = result.output.split()
+    assert len(pins) == 2000
+    assert "8361" not in pins and not any(PinGenerator(4).is_weak(pin) for pin in pins)
+    assert CliRunner().invoke(cli.cli, ['pin', '-l', '3']).exit_code != 0
+
+
+def test_cli_errors(tmp_path):
+    """Test the pin subcommand reports bad exclusion files without a traceback."""
+    everything = tmp_path / "all.txt"
+    everything.write_text("".join(f"{i:04d}\n" for i in range(10000)))
+    undecodable = tmp_path / "bad.txt"
+    undecodable.write_bytes(b"\xff\xfe1234\n")
+    for exclude in (everything, undecodable):
+        result = CliRunner().invoke(cli.cli, ['pin', '-l', '4', '--exclude', str(exclude)])
+        assert result.exit_code == 1
+        assert result.exception is None or isinstance(result.exception, SystemExit)
@@ -0,0 +1,196 @@
+import http.server
+import json
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from securepass.batch import PasswordBatch
+from securepass.hashing import verify_password
+from securepass.pipeline import (
+    BatchSource, BlocklistFilter, EncodeTransform, FileSink, GeneratorSource, HashTransform,
+    HTTPSink, Pipeline, PolicyFilter, PolicySource, RejectFilter, SQLiteSink, SplitTransform, Stage,
+)
+from securepass.shamir import combine, parse_share
+
+FAST_PBKDF2 = {"rounds": 1000}
+
+
+class Collect(Stage):
+    """Test sink keeping every chunk it receives."""
+
+    def __init__(self, mode="inline", delay=0.0):
+        super().__init__(mode)
+        self.delay = delay
+        self.chunks = []
+
+    def process(self, chunk):
+        time.sleep(self.delay)
+        self.chunks.append(chunk)
+
+
+class Fail(Stage):
+    def process(self, chunk):
+        raise ValueError("stage failed")
+
+
+def test_generate_encode_file(tmp_path):
+    """Test passwords flow through to a file with per-stage metrics."""
+    output = tmp_path / "out.txt"
+    metrics = Pipeline(
+        GeneratorSource(1000, length=12, charset="alnum", chunk_size=300),
+        EncodeTransform(),
+        FileSink(str(output)),
+    ).run()
+    lines = output.read_text().splitlines()
+    assert len(lines) == 1000 and all(len(line) == 12 and line.isalnum() for line in lines)
+    assert [m.name for m in metrics] == ["GeneratorSource", "EncodeTransform", "FileSink"]
+    assert [m.chunks for m in metrics] == [4, 4, 4]
+    assert metrics[0].items_out == 1000 and metrics[2].items_in == 1000
+    assert metrics[0].throughput > 0
+    assert metrics[1].as_dict()["items_out"] == 1000
+
+
+@pytest.mark.parametrize("mode,workers", [("thread", 1), ("thread", 3), ("process", 2)])
+def test_worker_stages_preserve_order(mode, workers):
+    """Test multi-worker stages pass chunks on in the order they arrived."""
+    numbers = iter(range(10 ** 6))
+    source = BatchSource(
+        lambda n: PasswordBatch(b"".join(b"%08d" % next(numbers) for _ in range(n)), 8), 500, chunk_size=7
+    )
+    chunks = list(Pipeline(source, HashTransform("pbkdf2", FAST_PBKDF2, mode=mode, workers=workers),
+                           queue_size=2).stream())
+    records = [record for chunk in chunks for record in chunk]
+    assert [password for password, _ in records] == [f"{i:08d}" for i in range(500)]
+    assert verify_password(*records[123])
+
+
+def test_filters(tmp_path):
+    """Test reject, blocklist and policy filters drop passwords."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("aaaa\n")
+    batch = PasswordBatch(b"xxaaaaxx" + b"Abcd1234" + b"abcdefgh" + b"ABCDEF12", 8)
+    collected = Collect()
+    Pipeline(
+        BatchSource(lambda n: batch, 4),
+        BlocklistFilter(str(wordlist)),
+        PolicyFilter("required: digit; allowed: upper, lower"),
+        RejectFilter(lambda password: password.startswith("ABC"), mode="thread"),
+        collected,
+    ).run()
+    assert [chunk.tolist() for chunk in collected.chunks] == [["Abcd1234"]]
+
+
+def test_policy_source_and_split(tmp_path):
+    """Test policy-generated passwords split into shares that recombine."""
+    output = tmp_path / "shares.txt"
+    source = PolicySource("required: upper; required: digit; allowed: lower", 50, length=10)
+    passwords = []
+    Pipeline(source, RejectFilter(lambda p: passwords.append(p)), SplitTransform(2, 3),
+             FileSink(str(output))).run()
+    lines = output.read_text().splitlines()
+    assert len(lines) == 50
+    recovered = [combine([parse_share(s) for s in line.split(" ")[:2]]).decode() for line in lines]
+    assert recovered == passwords
+    assert all(any(c.isupper() for c in p) and any(c.isdigit() for c in p) for p in passwords)
+
+
+def test_hash_encode_sqlite(tmp_path):
+    """Test hashed records are encoded as jsonl and stored in SQLite."""
+    db = str(tmp_path / "secrets.db")
+    Pipeline(GeneratorSource(20, chunk_size=8), HashTransform("pbkdf2", FAST_PBKDF2),
+             SQLiteSink(db)).run()
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute("SELECT secret, hash FROM secrets").fetchall()
+    assert len(rows) == 20 and all(verify_password(secret, hashed) for secret, hashed in rows)
+
+    collected = Collect()
+    Pipeline(GeneratorSource(5), HashTransform("pbkdf2", FAST_PBKDF2),
+             EncodeTransform("jsonl", user_prefix="svc"), collected).run()
+    lines = collected.chunks[0].decode().splitlines()
+    assert [json.loads(line)["user"] for line in lines] == [f"svc{i}" for i in range(1, 6)]
+    with pytest.raises(ValueError, match="cannot be verified"):
+        Pipeline(GeneratorSource(5), HashTransform("pbkdf2", FAST_PBKDF2), EncodeTransform("htpasswd"))
+
+
+def test_http_sink():
+    """Test chunks are POSTed as lines and error statuses raise."""
+    received = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, self.headers["Authorization"], body))
+            self.send_response(500 if self.path == "/fail" else 204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        Pipeline(GeneratorSource(30, chunk_size=10),
+                 HTTPSink(base + "/ok", headers={"Authorization": "Bearer t"})).run()
+        assert len(received) == 3
+        assert received[0][1] == "Bearer t" and received[0][2].count(b"\n") == 10
+        with pytest.raises(RuntimeError, match="500"):
+            Pipeline(GeneratorSource(1), HTTPSink(base + "/fail")).run()
+    finally:
+        server.shutdown()
+    with pytest.raises(ValueError):
+        HTTPSink("file:///etc/passwd")
+
+
+def test_backpressure_bounds_queued_chunks():
+    """Test a slow thread stage keeps the source at most a few chunks ahead."""
+    drawn = []
+    sink = Collect(mode="thread", delay=0.01)
+    source = BatchSource(lambda n: drawn.append(n) or PasswordBatch(b"x" * 8 * n, 8), 40, chunk_size=1)
+    ahead = []
+    original = sink.process
+
+    def process(chunk):
+        ahead.append(len(drawn) - len(sink.chunks))
+        original(chunk)
+
+    sink.process = process
+    metrics = Pipeline(source, sink, queue_size=2).run()
+    assert len(sink.chunks) == 40
+    assert max(ahead) <= 5
+    assert metrics[1].blocked_seconds > 0
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+def test_stage_failure_stops_pipeline(mode):
+    """Test an exception in any stage mode propagates and stops the pipeline."""
+    stage = Fail(mode=mode)
+    with pytest.raises(ValueError, match="stage failed"):
+        Pipeline(GeneratorSource(10 ** 6, chunk_size=100), stage, FileSink(None)).run()
+
+
+def test_invalid_configuration():
+    """Test invalid modes, worker counts and wiring are rejected."""
+    with pytest.raises(ValueError):
+        HashTransform(mode="fiber")
+    with pytest.raises(ValueError):
+        HashTransform(workers=2)
+    with pytest.raises(ValueError):
+        Pipeline(GeneratorSource(1), "not a stage")
+    with pytest.raises(ValueError):
+        Pipeline(GeneratorSource(1), queue_size=0)
+    with pytest.raises(ValueError):
+        SQLiteSink("x.db", table="secrets; DROP TABLE x")
+    with pytest.raises(ValueError, match="hashed records"):
+        Pipeline(GeneratorSource(1), EncodeTransform("jsonl")).run()
+
+
+def test_import_defers_urllib():
+    """Test importing the pipeline leaves urllib.request to the HTTP sink."""
+    code = "import sys, securepass.pipeline; print('urllib.request' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
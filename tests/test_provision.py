@@ -0,0 +1,104 @@
+import csv
+import io
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.hashing import verify_password
+from securepass.provision import provision_csv
+from securepass.rules import parse_rules
+
+USERS = "name,email\nalice,alice@example.com\nbob,bob@example.com\ncarol,carol@example.com\n"
+
+
+def _rows(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_provision_plaintext():
+    """Test every row gets a password and keeps its columns."""
+    out = io.StringIO()
+    assert provision_csv(io.StringIO(USERS), out, length=16, charset="alnum", chunk_size=2) == 3
+    rows = _rows(out.getvalue())
+    assert [r["name"] for r in rows] == ["alice", "bob", "carol"]
+    assert all(len(r["password"]) == 16 and r["password"].isalnum() for r in rows)
+    assert len({r["password"] for r in rows}) == 3
+
+
+def test_provision_policy():
+    """Test passwords satisfy a passwordrules policy."""
+    rules = "required: upper; required: digit; allowed: lower; minlength: 12; maxlength: 14"
+    out = io.StringIO()
+    provision_csv(io.StringIO(USERS), out, policy=rules)
+    policy = parse_rules(rules)
+    for row in _rows(out.getvalue()):
+        assert len(row["password"]) == 14
+        assert policy.check(row["password"])
+
+
+def test_provision_hash():
+    """Test hashed provisioning keeps rows aligned with their hashes."""
+    users = "name\n" + "".join(f"user{i}\n" for i in range(9))
+    out = io.StringIO()
+    count = provision_csv(
+        io.StringIO(users), out, hash_scheme="pbkdf2", hash_params={"rounds": 1000},
+        workers=1, chunk_size=4,
+    )
+    assert count == 9
+    rows = _rows(out.getvalue())
+    assert [r["name"] for r in rows] == [f"user{i}" for i in range(9)]
+    assert all(verify_password(r["password"], r["password_hash"]) for r in rows)
+
+
+def test_provision_hash_only():
+    """Test --no-plaintext output carries hashes only."""
+    out = io.StringIO()
+    provision_csv(
+        io.StringIO(USERS), out, hash_scheme="pbkdf2", hash_params={"rounds": 1000},
+        include_plaintext=False, workers=1,
+    )
+    rows = _rows(out.getvalue())
+    assert "password" not in rows[0]
+    assert all(r["password_hash"].startswith("$pbkdf2-sha256$") for r in rows)
+
+
+def test_provision_progress():
+    """Test progress is reported after every chunk."""
+    reports = []
+    provision_csv(io.StringIO(USERS), io.StringIO(), chunk_size=2,
+                  progress=lambda rows, elapsed: reports.append(rows))
+    assert reports == [2, 3]
+
+
+def test_provision_invalid():
+    """Test invalid inputs and option combinations are rejected."""
+    with pytest.raises(ValueError, match="header"):
+        provision_csv(io.StringIO(""), io.StringIO())
+    with pytest.raises(ValueError, match="hash scheme"):
+        provision_csv(io.StringIO(USERS), io.StringIO(), include_plaintext=False)
+    with pytest.raises(ValueError, match="chunk size"):
+        provision_csv(io.StringIO(USERS), io.StringIO(), chunk_size=0)
+
+
+def test_cli_provision(tmp_path):
+    """Test the provision subcommand writes the output CSV."""
+    users = tmp_path / "users.csv"
+    users.write_text(USERS)
+    output = tmp_path / "out.csv"
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['provision', str(users), '-o', str(output), '-c', 'digits'])
+    assert result.exit_code == 0
+    assert "Provisioned 3 accounts" in result.output
+    rows = _rows(output.read_text())
+    assert all(r["password"].isdigit() for r in rows)
+
+
+def test_cli_provision_bad_policy(tmp_path):
+    """Test an invalid policy is reported as an error."""
+    users = tmp_path / "users.csv"
+    users.write_text(USERS)
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['provision', str(users), '--policy', 'required: emoji'])
+    assert result.exit_code == 1
+    assert "Error:" in result.output
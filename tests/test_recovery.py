@@ -0,0 +1,128 @@
+import re
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass.recovery import RecoveryCodes, check_character, parse_layout
+
+
+@pytest.mark.parametrize("charset,check", [("digits", "damm"), ("digits", "luhn"), ("alnum", "luhn")])
+def test_generated_codes_validate(charset, check):
+    """Test generated codes have the layout and a correct check character."""
+    codes = RecoveryCodes(charset, groups=2, group_size=4, check=check)
+    batch = codes.generate(500)
+    pattern = r"\d{4}-\d{4}" if charset == "digits" else r"[A-Za-z0-9]{4}-[A-Za-z0-9]{4}"
+    assert all(re.fullmatch(pattern, code) for code in batch)
+    assert all(codes.validate_many(batch))
+    for code in batch[:50]:
+        body = code.replace("-", "")
+        assert check_character(body[:-1], charset, check) == body[-1]
+
+
+def test_known_check_digits():
+    """Test check digits against published examples."""
+    assert check_character("572") == "4"
+    assert check_character("7992739871", check="luhn") == "3"
+
+
+@pytest.mark.parametrize("charset,check", [("digits", "damm"), ("alnum", "luhn")])
+def test_single_substitutions_detected(charset, check):
+    """Test every single-character typo is rejected."""
+    codes = RecoveryCodes(charset, check=check)
+    for code in codes.generate(20):
+        body = code.replace("-", "")
+        typos = [body[:i] + c + body[i + 1:] for i in range(len(body))
+                 for c in codes.alphabet if c != body[i]]
+        assert not any(codes.validate_many(typos))
+
+
+def test_damm_detects_transpositions():
+    """Test Damm codes reject every adjacent transposition."""
+    codes = RecoveryCodes("digits", check="damm")
+    for code in codes.generate(200):
+        body = code.replace("-", "")
+        swapped = [body[:i] + body[i + 1] + body[i] + body[i + 2:]
+                   for i in range(len(body) - 1) if body[i] != body[i + 1]]
+        assert not any(codes.validate_many(swapped))
+
+
+def test_validate_normalizes_and_rejects_malformed():
+    """Test separators are ignored and malformed codes are invalid."""
+    codes = RecoveryCodes()
+    code = codes.generate(1)[0]
+    compact = code.replace("-", "")
+    assert codes.validate(compact)
+    assert codes.validate(compact[:2] + " " + compact[2:])
+    assert codes.validate_many(["", code[:-1], code.replace(code[0], "x", 1), "é" * 8, code]) == [
+        False, False, False, False, True]
+
+
+def test_sets_unique_per_user():
+    """Test a code repeated within a user's set is redrawn."""
+    codes = RecoveryCodes()
+    real_generate = codes.generate
+    calls = {"n": 0}
+
+    def repeating(count):
+        calls["n"] += 1
+        batch = real_generate(count)
+        if calls["n"] == 1:
+            batch[1] = batch[0]
+            batch[5] = batch[2]   # second user repeats a first-user code: allowed
+        return batch
+
+    with patch.object(codes, "generate", side_effect=repeating):
+        batch = next(codes.generate_sets(users=2, per_user=4))
+    first = batch.tolist()[:4]
+    assert len(set(first)) == 4
+    assert batch[5] == batch[2]
+
+
+def test_sets_and_formatting():
+    """Test sets are chunked by user and formatted one line per user."""
+    codes = RecoveryCodes()
+    batches = list(codes.generate_sets(users=25, per_user=10, chunk_users=10))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    lines = codes.format_sets(batches[2], 10).decode().splitlines()
+    assert len(lines) == 5
+    assert all(len(line.split(" ")) == 10 for line in lines)
+    assert lines[0].split(" ") == batches[2].tolist()[:10]
+
+
+def test_invalid_formats():
+    """Test invalid layouts and algorithm choices are rejected."""
+    with pytest.raises(ValueError):
+        RecoveryCodes("alnum", check="damm")
+    with pytest.raises(ValueError):
+        RecoveryCodes("full")
+    with pytest.raises(ValueError):
+        RecoveryCodes(groups=1, group_size=3)
+    with pytest.raises(ValueError):
+        next(RecoveryCodes(groups=1, group_size=4).generate_sets(1, 1000))
+    assert parse_layout("xxxx-xxxx") == (2, 4)
+    assert parse_layout("xxxxx-xxxxx-xxxxx") == (3, 5)
+    for bad in ["xx-xxx", "xxxx-", ""]:
+        with pytest.raises(ValueError):
+            parse_layout(bad)
+
+
+def test_cli_recovery_codes(tmp_path):
+    """Test the recovery-codes subcommand writes one line of valid codes per user."""
+    output = tmp_path / "codes.txt"
+    result = CliRunner().invoke(cli.cli, ['recovery-codes', '--users', '30', '--per-user', '10',
+                                          '--layout', 'xxxxx-xxxxx', '-o', str(output)])
+    assert result.exit_code == 0
+    lines = output.read_text().splitlines()
+    assert len(lines) == 30
+    codes = RecoveryCodes(groups=2, group_size=5)
+    for line in lines:
+        user_codes = line.split(" ")
+        assert len(set(user_codes)) == 10
+        assert all(codes.validate_many(user_codes))
+
+    result = CliRunner().invoke(cli.cli, ['recovery-codes', '--users', '1', '-c', 'alnum',
+                                          '--check', 'damm'])
+    assert result.exit_code == 1
+    assert "digits charset" in result.output
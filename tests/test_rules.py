@@ -0,0 +1,123 @@
+import pytest
+import string
+import threading
+from securepass.generator import PasswordGenerator
+from securepass.rules import PasswordPolicy, parse_rules
+
+
+def test_parse_rules_basic():
+    """Test a typical rule string compiles into the expected policy."""
+    policy = parse_rules("required: upper; required: digit; allowed: [-_]; minlength: 12; max-consecutive: 2")
+    assert policy.required == (string.ascii_uppercase, string.digits)
+    assert set(policy.alphabet) == set(string.ascii_uppercase + string.digits + "-_")
+    assert policy.min_length == 12
+    assert policy.max_length == 128
+    assert policy.max_consecutive == 2
+
+
+def test_parse_rules_default_alphabet():
+    """Test rules without character classes fall back to ascii-printable."""
+    policy = parse_rules("minlength: 10; maxlength: 16")
+    assert policy.alphabet == PasswordGenerator.charsets["full"]
+    assert policy.required == ()
+    assert policy.resolve_length() == 16
+
+
+def test_parse_rules_custom_sets():
+    """Test custom sets may contain separators and a trailing bracket."""
+    policy = parse_rules("required: [;,]; allowed: lower, [-]]")
+    assert policy.required == (",;",)
+    assert set(policy.alphabet) == set(string.ascii_lowercase + ",;-]")
+
+
+def test_parse_rules_is_cached():
+    """Test identical rule strings return the same compiled policy."""
+    assert parse_rules("required: lower; minlength: 9") is parse_rules("required: lower; minlength: 9")
+
+
+@pytest.mark.parametrize("rules", [
+    "required: emoji",
+    "required: unicode",
+    "minlength: ten",
+    "max-consecutive: 0",
+    "colour: blue",
+    "required",
+    "minlength: 20; maxlength: 10",
+    "maxlength: 6",
+])
+def test_parse_rules_invalid(rules):
+    """Test malformed or unsatisfiable rules raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_rules(rules)
+
+
+def test_generate_from_rules_satisfies_policy():
+    """Test generated passwords meet every rule without post-validation."""
+    rules = "required: upper; required: digit; required: [-_]; allowed: lower; max-consecutive: 1"
+    policy = parse_rules(rules)
+    for _ in range(200):
+        password = PasswordGenerator.generate_from_rules(rules, 12)
+        assert len(password) == 12
+        assert policy.check(password)
+
+
+def test_generate_from_rules_small_alphabet_runs():
+    """Test max-consecutive is enforced even with a two-character alphabet."""
+    policy = parse_rules("allowed: [ab]; max-consecutive: 1")
+    for _ in range(50):
+        password = PasswordGenerator.generate_from_rules(policy, 30)
+        assert password in ("ab" * 15, "ba" * 15)
+
+
+def test_generate_from_rules_fixed_positions_terminate():
+    """Test required characters placed where no run can be broken are redrawn, not looped on."""
+    rules = "required: [a]; required: [b]; max-consecutive: 1"
+    passwords = []
+    worker = threading.Thread(
+        target=lambda: passwords.extend(PasswordGenerator.generate_from_rules(rules, 8) for _ in range(500)),
+        daemon=True,
+    )
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive(), "generation did not terminate"
+    assert len(passwords) == 500 and set(passwords) == {"abababab", "babababa"}
+
+
+def test_generate_from_rules_many():
+    """Test batch draws meet every rule, place required characters anywhere and honour reject."""
+    rules = "required: upper; required: digit; required: [-_]; allowed: lower; max-consecutive: 1"
+    policy = parse_rules(rules)
+    batch = PasswordGenerator.generate_from_rules_many(rules, 12, 2000)
+    assert len(batch) == 2000 and batch.stride == 12
+    assert all(policy.check(password) for password in batch)
+    assert {password.index("-") if "-" in password else password.index("_") for password in batch} == set(range(12))
+
+    assert len(PasswordGenerator.generate_from_rules_many(policy, None, 0)) == 0
+    assert PasswordGenerator.generate_from_rules_many("allowed: [ab]; max-consecutive: 1", 8, 100,
+                                                      reject=lambda p: p.startswith("a")).tolist() == ["babababa"] * 100
+    fixed = PasswordGenerator.generate_from_rules_many("required: [a]; required: [b]; max-consecutive: 1", 8, 500)
+    assert set(fixed) == {"abababab", "babababa"}
+    with pytest.raises(ValueError, match="count"):
+        PasswordGenerator.generate_from_rules_many(rules, 12, -1)
+
+
+def test_generate_from_rules_length_validation():
+    """Test explicit lengths outside the policy range are rejected."""
+    with pytest.raises(ValueError, match="Invalid password length"):
+        PasswordGenerator.generate_from_rules("minlength: 12", 10)
+
+
+def test_generate_from_rules_unsatisfiable_runs():
+    """Test a single-character alphabet cannot satisfy max-consecutive."""
+    with pytest.raises(ValueError, match="cannot be satisfied"):
+        PasswordGenerator.generate_from_rules("allowed: [a]; max-consecutive: 3")
+
+
+def test_policy_check():
+    """Test PasswordPolicy.check rejects each kind of violation."""
+    policy = PasswordPolicy("abc123", required=("123",), min_length=8, max_length=10, max_consecutive=2)
+    assert policy.check("abcabc12")
+    assert not policy.check("abcabc1")          # too short
+    assert not policy.check("abcabcabc")        # missing required digit
+    assert not policy.check("abcabc1x")         # outside alphabet
+    assert not policy.check("aaabcab1")         # run of three
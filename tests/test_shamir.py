@@ -0,0 +1,115 @@
+import itertools
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.generator import PasswordGenerator
+from securepass.shamir import (
+    combine, combine_many, format_share, format_shares, parse_share, parse_split, split,
+)
+
+
+def _gf_mul(a, b):
+    """Reference GF(256) multiplication by shift and add."""
+    product = 0
+    while b:
+        if b & 1:
+            product ^= a
+        a = (a << 1) ^ (0x11B if a & 0x80 else 0)
+        b >>= 1
+    return product
+
+
+def test_any_threshold_subset_recovers():
+    """Test every subset of at least threshold shares recovers the secret."""
+    secret = b"break-glass-Secret!"
+    shares = split(secret, 3, 5)
+    assert [x for x, _ in shares] == [1, 2, 3, 4, 5]
+    assert all(len(data) == len(secret) for _, data in shares)
+    for size in (3, 4, 5):
+        for subset in itertools.combinations(shares, size):
+            assert combine(subset) == secret
+    assert combine(shares[:2]) != secret
+
+
+def test_shares_are_polynomial_points():
+    """Test a 2-of-n share is secret + slope * x in GF(256), byte by byte."""
+    secret = bytes(range(256))
+    (x1, y1), (x2, y2) = split(secret, 2, 2)
+    slope = bytes(a ^ b for a, b in zip(y1, secret))
+    assert y2 == bytes(s ^ _gf_mul(m, x2) for s, m in zip(secret, slope))
+
+
+def test_batch_split_matches_per_secret():
+    """Test a packed batch splits into per-secret shares at the same offsets."""
+    batch = PasswordGenerator.generate_passwords(1000, 16, "alnum")
+    shares = split(batch.to_bytes(b""), 2, 3)
+    for i in (0, 517, 999):
+        pair = [(x, data[i * 16:(i + 1) * 16]) for x, data in shares[1:]]
+        assert combine(pair).decode() == batch[i]
+
+
+def test_format_and_parse():
+    """Test x-hex share formatting round-trips, one line per secret."""
+    batch = PasswordGenerator.generate_passwords(50, 12, "full")
+    shares = split(batch.to_bytes(b""), 3, 4)
+    lines = format_shares(shares, 12).decode().splitlines()
+    assert len(lines) == 50
+    assert lines[0].split(" ")[0] == format_share((1, shares[0][1][:12]))
+    sets = [[parse_share(field) for field in line.split(" ")[1:]] for line in lines]
+    assert [s.decode() for s in combine_many(sets)] == batch.tolist()
+
+
+def test_combine_many_mixed_sets():
+    """Test sets with different share numbers and lengths are grouped correctly."""
+    secrets = [b"first-secret", b"2nd", b"third-secret"]
+    sets = [split(secrets[0], 2, 3)[:2], split(secrets[1], 2, 3)[1:], split(secrets[2], 2, 3)[:2]]
+    assert combine_many(sets) == secrets
+
+
+def test_invalid_inputs():
+    """Test malformed specifications, shares and share sets are rejected."""
+    for spec in ["1/3", "4/3", "3", "a/b", "2/256"]:
+        with pytest.raises(ValueError):
+            parse_split(spec)
+    assert parse_split("3/5") == (3, 5)
+    with pytest.raises(ValueError):
+        split(b"x", 1, 3)
+    for text in ["zz", "0-00", "1-0", "1-xy"]:
+        with pytest.raises(ValueError):
+            parse_share(text)
+    with pytest.raises(ValueError):
+        combine([(1, b"ab"), (1, b"cd")])
+    with pytest.raises(ValueError):
+        combine([(1, b"ab"), (2, b"c")])
+    with pytest.raises(ValueError):
+        combine([])
+
+
+def test_cli_split_and_combine(tmp_path):
+    """Test --split output recombines with passgen combine, per line and per custodian file."""
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['-n', '20', '-l', '16', '-c', 'alnum', '--split', '3/5'])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert len(lines) == 20 and all(len(line.split(" ")) == 5 for line in lines)
+
+    subset = "\n".join(" ".join(line.split(" ")[1:4]) for line in lines) + "\n"
+    secrets = runner.invoke(cli.cli, ['combine'], input=subset).output.split()
+    assert len(secrets) == 20 and all(len(secret) == 16 for secret in secrets)
+
+    paths = []
+    for column in (0, 2, 4):
+        path = tmp_path / f"custodian{column}.txt"
+        path.write_text("\n".join(line.split(" ")[column] for line in lines) + "\n")
+        paths.append(str(path))
+    assert runner.invoke(cli.cli, ['combine'] + paths).output.split() == secrets
+
+    single = runner.invoke(cli.cli, ['--split', '2/3', '--no-copy'])
+    assert single.exit_code == 0
+    assert "split into 3 shares" in single.output
+    assert "Generated Password" not in single.output
+
+    assert runner.invoke(cli.cli, ['-n', '2', '--split', '3/5', '--hash', 'scrypt']).exit_code == 1
+    assert runner.invoke(cli.cli, ['combine'], input="1-zz\n").exit_code == 1
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from securepass.generator import PasswordGenerator
+from securepass.similarity import PasswordHistory, levenshtein
+
+
+def _reference_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _random_strings(rng, count, alphabet="abcd", max_length=9):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+            for _ in range(count)]
+
+
+def test_levenshtein():
+    """Test distances, with and without a limit, against the textbook recurrence."""
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("Summer2023!", "Summer2024!") == 1
+    rng = random.Random(7)
+    strings = _random_strings(rng, 200, "abc")
+    for a, b in zip(strings, reversed(strings)):
+        distance = _reference_distance(a, b)
+        assert levenshtein(a, b) == distance
+        for limit in range(4):
+            assert levenshtein(a, b, limit) == min(distance, limit + 1)
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 2, 3])
+def test_history_matches_linear_scan(max_distance):
+    """Test indexed lookups find exactly the entries a linear scan finds."""
+    rng = random.Random(max_distance)
+    entries = _random_strings(rng, 300)
+    history = PasswordHistory(entries, max_distance)
+    for candidate in _random_strings(rng, 300):
+        expected = [e for e in entries if _reference_distance(candidate, e) <= max_distance]
+        assert history.similar(candidate) == expected
+        assert history.too_similar(candidate) is bool(expected)
+
+
+def test_history_size():
+    """Test the history keeps only its most recent entries."""
+    history = PasswordHistory(["Spring2023!", "Summer2023!", "Autumn2023!"], 2, size=2)
+    assert list(history) == ["Summer2023!", "Autumn2023!"]
+    assert not history.too_similar("Spring2023!")
+    assert history.too_similar("Summer2024!")
+    history.add("Winter2023!")
+    assert len(history) == 2
+    assert not history.too_similar("Summer2024!")
+    with pytest.raises(ValueError):
+        PasswordHistory(max_distance=-1)
+
+
+def test_generator_regenerates_similar():
+    """Test the generator redraws candidates too close to the history."""
+    history = PasswordHistory(["00000000"], max_distance=3)
+    candidates = iter([b"00000001", b"10000100", b"12345678"])
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("securepass.generator._CharsetTable.sample", lambda self, n: next(candidates))
+        assert PasswordGenerator.generate_password(8, "digits", reject=history.too_similar) == "12345678"
+
+    rules = "required: upper; required: digit; minlength: 12"
+    history = PasswordHistory([PasswordGenerator.generate_from_rules(rules)], max_distance=3)
+    password = PasswordGenerator.generate_from_rules(rules, reject=history.too_similar)
+    assert not history.too_similar(password)
+
+    # Every 8-digit password is within 8 edits of any other
+    always = PasswordHistory(["00000000"], max_distance=8)
+    with pytest.raises(RuntimeError):
+        PasswordGenerator.generate_from_rules("allowed: digit; maxlength: 8", 8,
+                                              reject=always.too_similar)
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+from unittest.mock import patch
+from securepass import stats
+from securepass.generator import PasswordGenerator, sample_chars
+from securepass.rules import parse_rules
+
+
+def test_stats_disabled_by_default():
+    """Test no collector is active outside a stats block."""
+    assert stats.active() is None
+    PasswordGenerator.generate_password(12)
+    assert stats.active() is None
+
+
+def test_stats_counts_passwords_and_bytes():
+    """Test passwords, randomness reads and timings are recorded."""
+    with PasswordGenerator.stats() as collected:
+        for _ in range(5):
+            PasswordGenerator.generate_from_rules("required: digit; minlength: 16")
+        PasswordGenerator.generate_password(10, "alnum")
+        # Larger than one pool block, so it is read and health-tested directly
+        PasswordGenerator.generate_passwords(5000, 20, "alnum")
+
+    assert stats.active() is None
+    assert collected.passwords == 5006
+    assert collected.random_bytes >= 5 * 16 + 5000 * 20
+    assert collected.read_seconds > 0
+    assert collected.health_seconds > 0
+    assert collected.map_seconds > 0
+    assert collected.join_seconds > 0
+
+
+def test_stats_policy_cache_hits():
+    """Test rule-cache hits and misses are reported per rule string."""
+    rules = "required: upper; minlength: 31"
+    with PasswordGenerator.stats() as collected:
+        parse_rules(rules)
+        parse_rules(rules)
+        parse_rules(rules)
+    assert collected.policy_misses.get(rules, 0) + collected.policy_hits.get(rules, 0) == 3
+    assert collected.policy_hits[rules] >= 2
+
+
+def test_stats_retries_counted():
+    """Test reads wasted by rejection sampling are counted as retries."""
+    reads = iter([b"\xff" * 64, b"\x00" * 64])
+    # Byte 255 is rejected for a three-character alphabet, forcing a second read
+    with patch("securepass.generator._read_random", side_effect=lambda n: next(reads)[:n]):
+        with PasswordGenerator.stats() as collected:
+            assert sample_chars("abc", 8) == b"a" * 8
+    assert collected.retries == 1
+
+
+def test_stats_nesting_restores_previous():
+    """Test nested collectors restore the outer collector on exit."""
+    with PasswordGenerator.stats() as outer:
+        with PasswordGenerator.stats() as inner:
+            PasswordGenerator.generate_from_rules("minlength: 12")
+        assert stats.active() is outer
+        PasswordGenerator.generate_from_rules("minlength: 12")
+    assert inner.passwords == 1
+    assert outer.passwords == 1
+
+
+def test_stats_as_dict():
+    """Test as_dict returns a snapshot of every counter."""
+    with PasswordGenerator.stats() as collected:
+        PasswordGenerator.generate_from_rules("minlength: 12")
+    snapshot = collected.as_dict()
+    assert snapshot["passwords"] == 1
+    assert set(snapshot) >= {"random_bytes", "retries", "read_seconds", "map_seconds",
+                             "join_seconds", "policy_hits", "policy_misses"}
+
+
+def test_stats_are_per_thread():
+    """Test a collector only counts the work of the thread that activated it."""
+    seen = []
+
+    def other_thread():
+        seen.append(stats.active())
+        PasswordGenerator.generate_passwords(100, 12, "alnum")
+        with PasswordGenerator.stats() as own:
+            PasswordGenerator.generate_password(12)
+        seen.append(own.passwords)
+
+    with PasswordGenerator.stats() as collected:
+        worker = threading.Thread(target=other_thread)
+        worker.start()
+        worker.join()
+        PasswordGenerator.generate_password(12)
+    assert seen == [None, 1]
+    assert collected.passwords == 1
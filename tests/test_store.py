@@ -0,0 +1,158 @@
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass import store as store_module
+from securepass.rules import parse_rules
+from securepass.similarity import PasswordHistory
+from securepass.store import SecretStore, parse_interval
+
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path):
+    with SecretStore(str(tmp_path / "secrets.db")) as s:
+        yield s
+
+
+def test_parse_interval():
+    """Test interval strings with and without units."""
+    assert parse_interval("3600") == 3600
+    assert parse_interval("90d") == 90 * DAY
+    assert parse_interval("12h") == 12 * 3600
+    assert parse_interval("2w") == 14 * DAY
+    for bad in ["", "0d", "-1d", "5y", "d"]:
+        with pytest.raises(ValueError):
+            parse_interval(bad)
+
+
+def test_add_and_get(store):
+    """Test entries are generated with their policy."""
+    store.add("db", length=32, charset="alnum", interval=30 * DAY, now=0)
+    secret = store.get("db")
+    assert len(secret) == 32 and secret.isalnum()
+    entry = store.entry("db")
+    assert entry["rotated_at"] == 0 and entry["expires_at"] == 30 * DAY
+    assert store.get("missing") is None
+    assert store.entry("missing") is None
+
+
+def test_add_invalid_policy(store):
+    """Test invalid policies are rejected before anything is stored."""
+    with pytest.raises(ValueError):
+        store.add("x", length=4)
+    with pytest.raises(ValueError):
+        store.add("x", charset="emoji")
+    with pytest.raises(ValueError):
+        store.add("x", rules="required: emoji")
+    with pytest.raises(ValueError):
+        store.add("x", interval=0)
+    assert len(store) == 0
+
+
+def test_rotate_only_due(store):
+    """Test a run rotates due entries and leaves the rest untouched."""
+    store.add_many(["a", "b"], charset="digits", interval=DAY, now=0)
+    store.add_many(["c"], charset="digits", interval=30 * DAY, now=0)
+    before = {name: store.get(name) for name in "abc"}
+
+    assert store.due(now=2 * DAY) == 2
+    assert store.rotate(now=2 * DAY) == 2
+    assert store.get("a") != before["a"] and store.get("b") != before["b"]
+    assert store.get("c") == before["c"]
+    assert store.entry("a")["expires_at"] == 3 * DAY
+    assert store.get("a").isdigit()
+
+    # Nothing is due again until the new expiry
+    assert store.rotate(now=2 * DAY + 1) == 0
+
+
+def test_rotate_keeps_rules(store):
+    """Test entries with passwordrules keep satisfying them after rotation."""
+    rules = "required: upper; required: digit; allowed: lower; max-consecutive: 2"
+    store.add_many([f"svc{i}" for i in range(20)], rules=rules, length=16, interval=DAY, now=0)
+    store.rotate(now=DAY)
+    policy = parse_rules(rules)
+    for i in range(20):
+        secret = store.get(f"svc{i}")
+        assert len(secret) == 16 and policy.check(secret)
+
+
+def test_rotate_chunks_and_limit(store):
+    """Test rotation proceeds in chunks and honors the limit."""
+    store.add_many([f"e{i}" for i in range(25)], charset="alnum", interval=DAY, now=0)
+    reports = []
+    assert store.rotate(now=DAY, chunk_size=10, limit=15, progress=reports.append) == 15
+    assert reports == [10, 15]
+    assert store.due(now=DAY) == 10
+    assert store.rotate(now=DAY, chunk_size=10) == 10
+
+
+def test_rotate_resumes_after_crash(store):
+    """Test a failure mid-run keeps committed chunks and the rerun finishes the rest."""
+    store.add_many([f"e{i}" for i in range(30)], charset="alnum", interval=DAY, now=0)
+    real_generate = store_module._generate
+    calls = {"n": 0}
+
+    def crash_on_second_chunk(policy, count):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("killed")
+        return real_generate(policy, count)
+
+    with patch.object(store_module, "_generate", side_effect=crash_on_second_chunk):
+        with pytest.raises(RuntimeError):
+            store.rotate(now=DAY, chunk_size=10)
+
+    assert store.due(now=DAY) == 20
+    assert store.rotate(now=DAY, chunk_size=10) == 20
+    assert store.due(now=DAY) == 0
+
+
+def test_rotate_avoids_history(store):
+    """Test rotation keeps previous secrets and redraws secrets close to them."""
+    store.add("db", length=12, charset="alnum", interval=DAY, now=0)
+    secrets = [store.get("db")]
+    for day in range(1, 5):
+        store.rotate(now=day * DAY, keep_history=2)
+        secrets.append(store.get("db"))
+    assert store.history("db") == secrets[2:4]
+
+    # A batch draw repeating the current secret with one edit must be redrawn
+    current = store.get("db")
+    near = current[:-1] + ("a" if current[-1] != "a" else "b")
+    with patch.object(store_module, "_generate", return_value=[near]):
+        store.rotate(now=5 * DAY, keep_history=2, max_distance=3)
+    new = store.get("db")
+    assert new != near
+    assert PasswordHistory(secrets[3:], 3).too_similar(new) is False
+    assert store.history("db") == secrets[3:5]
+
+
+def test_cli_add_and_rotate(tmp_path):
+    """Test the add-secret and rotate subcommands."""
+    db = str(tmp_path / "secrets.db")
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['add-secret', 'web', 'api', '--store', db, '--every', '1',
+                                     '-c', 'alnum'])
+    assert result.exit_code == 0
+    assert "Added 2 entries" in result.output
+    with SecretStore(db) as s:
+        before = s.get("web")
+
+    with patch("securepass.store.time.time", return_value=10 ** 10):
+        result = runner.invoke(cli.cli, ['rotate', '--store', db])
+    assert result.exit_code == 0
+    assert "Rotated 2 entries" in result.output
+    with SecretStore(db) as s:
+        assert s.get("web") != before
+
+
+def test_cli_add_secret_bad_interval(tmp_path):
+    """Test an invalid interval is reported as an error."""
+    result = CliRunner().invoke(cli.cli, ['add-secret', 'web', '--store', str(tmp_path / "s.db"),
+                                          '--every', 'soon'])
+    assert result.exit_code == 1
+    assert "Invalid interval" in result.output
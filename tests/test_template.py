@@ -0,0 +1,117 @@
+import io
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import patch
+
+from securepass import cli
+from securepass import template as template_module
+from securepass.rules import parse_rules
+from securepass.template import parse_placeholder, render_template
+
+TEMPLATE = """\
+# database
+DB_PASSWORD={{ passgen length=32 charset=alnum }}
+API_KEY={{ passgen length=32 charset=alnum }}
+PIN={{passgen length=8 charset=digits}}
+SECRET={{ passgen }}
+OTHER={{ not_passgen }}
+"""
+
+
+def _render(text, **kwargs):
+    out = io.StringIO()
+    count = render_template(io.StringIO(text), out, **kwargs)
+    return count, out.getvalue()
+
+
+def _values(rendered):
+    return dict(line.split("=", 1) for line in rendered.splitlines() if "=" in line)
+
+
+def test_render():
+    """Test placeholders are replaced according to their policy."""
+    count, rendered = _render(TEMPLATE)
+    values = _values(rendered)
+    assert count == 4
+    assert rendered.startswith("# database\n")
+    assert len(values["DB_PASSWORD"]) == 32 and values["DB_PASSWORD"].isalnum()
+    assert values["DB_PASSWORD"] != values["API_KEY"]
+    assert len(values["PIN"]) == 8 and values["PIN"].isdigit()
+    assert len(values["SECRET"]) == 20
+    assert values["OTHER"] == "{{ not_passgen }}"
+
+
+def test_one_draw_per_policy():
+    """Test placeholders sharing a policy come from a single batch draw."""
+    with patch.object(template_module, "_draw", wraps=template_module._draw) as draw:
+        _render(TEMPLATE)
+    calls = sorted((call.args[0], call.args[1]) for call in draw.call_args_list)
+    assert calls == [((8, "digits", None), 1), ((20, "full", None), 1), ((32, "alnum", None), 2)]
+
+
+def test_blocks_bound_memory():
+    """Test a large template is drawn block by block."""
+    text = "KEY={{ passgen length=12 charset=alnum }}\n" * 1000
+    with patch.object(template_module, "_draw", wraps=template_module._draw) as draw:
+        count, rendered = _render(text, block_size=4096)
+    assert count == 1000
+    assert draw.call_count > 1
+    assert len(set(_value for _value in rendered.splitlines())) == 1000
+
+
+def test_rules_and_names():
+    """Test rules placeholders and named secrets shared across blocks."""
+    rules = "required: upper; required: digit; allowed: lower; minlength: 16"
+    text = (
+        f'A={{{{ passgen rules="{rules}" name=admin }}}}\n'
+        + "FILLER=x\n" * 50
+        + f"B={{{{ passgen rules='{rules}' name=admin }}}}\n"
+    )
+    count, rendered = _render(text, block_size=64)
+    values = _values(rendered)
+    assert count == 2
+    assert values["A"] == values["B"]
+    assert parse_rules(rules).check(values["A"])
+
+
+def test_invalid_placeholders():
+    """Test malformed and invalid placeholders report their line."""
+    for bad in ["{{ passgen size=3 }}", "{{ passgen length=abc }}", "{{ passgen charset=emoji }}",
+                "{{ passgen length=4 }}", "{{ passgen rules=\"required: emoji\" }}",
+                "{{ passgen length= }}"]:
+        with pytest.raises(ValueError, match="Line 2"):
+            _render("ok\n" + bad + "\n")
+
+    text = "{{ passgen name=a length=10 }}\n{{ passgen name=a length=12 }}\n"
+    with pytest.raises(ValueError, match="different policies"):
+        _render(text)
+
+
+def test_parse_placeholder():
+    """Test argument parsing and defaults."""
+    assert parse_placeholder(" length=32 charset=alnum ").policy == (32, "alnum", None)
+    assert parse_placeholder("").policy == (20, "full", None)
+    parsed = parse_placeholder(' rules="minlength: 10" name=db')
+    assert parsed.rules == "minlength: 10" and parsed.name == "db" and parsed.length is None
+
+
+def test_cli_render(tmp_path):
+    """Test the render subcommand writes the rendered file."""
+    source = tmp_path / "template.env.in"
+    source.write_text(TEMPLATE)
+    output = tmp_path / ".env"
+    result = CliRunner().invoke(cli.cli, ['render', str(source), '-o', str(output)])
+    assert result.exit_code == 0
+    assert len(_values(output.read_text())["DB_PASSWORD"]) == 32
+
+
+def test_cli_render_error(tmp_path):
+    """Test render errors leave no partial output file."""
+    source = tmp_path / "template.env.in"
+    source.write_text("A={{ passgen length=4 }}\n")
+    output = tmp_path / ".env"
+    result = CliRunner().invoke(cli.cli, ['render', str(source), '-o', str(output)])
+    assert result.exit_code == 1
+    assert "Line 1" in result.output
+    assert not output.exists()
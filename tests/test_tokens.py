@@ -0,0 +1,88 @@
+import random
+import re
+import zlib
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.generator import PasswordGenerator
+from securepass.tokens import encode_checksum, generate_tokens, validate, validate_many
+
+
+def test_token_format():
+    """Test tokens carry the prefix, random body and base62 CRC-32 checksum."""
+    token = PasswordGenerator.generate_token()
+    assert re.fullmatch(r"sp_live_[A-Za-z0-9]{36}", token)
+    assert token[-6:] == encode_checksum(zlib.crc32(token[:-6].encode()))
+    assert validate(token)
+    test_token = PasswordGenerator.generate_token("sp_test_", 40)
+    assert len(test_token) == len("sp_test_") + 46
+
+
+def test_encode_checksum():
+    """Test checksums are fixed-width base62."""
+    assert encode_checksum(0) == "aaaaaa"
+    assert encode_checksum(2 ** 32 - 1) == encode_checksum(0xFFFFFFFF)
+    assert len({encode_checksum(v) for v in range(0, 2 ** 32, 2 ** 20)}) == 2 ** 12
+
+
+def test_invalid_generation_arguments():
+    """Test invalid prefixes and lengths are rejected."""
+    for prefix in ["sp-live-", "sp_live", "sp live_"]:
+        with pytest.raises(ValueError):
+            generate_tokens(1, prefix)
+    for length in [15, 129]:
+        with pytest.raises(ValueError):
+            PasswordGenerator.generate_token(length=length)
+
+
+def test_validate_rejects_malformed():
+    """Test typos, truncation and non-tokens fail validation."""
+    token = PasswordGenerator.generate_token()
+    swapped = token[:10] + token[11] + token[10] + token[12:]
+    typo = token[:-1] + ("a" if token[-1] != "a" else "b")
+    candidates = [token, swapped if swapped != token else "x", typo, token[:-1], "",
+                  "no_underscore_at_end_", "sp_live_" + "a" * 8, token.replace("sp_live_", "sp_live-"),
+                  token[:20] + "é" + token[21:]]
+    assert validate_many(candidates) == [True] + [False] * 8
+    assert validate(token, prefix="sp_live_")
+    assert not validate(token, prefix="sp_test_")
+
+
+def test_bulk_matches_single_validation():
+    """Test the vectorized path agrees with one-by-one validation."""
+    rng = random.Random(5)
+    tokens = generate_tokens(2000).tolist() + generate_tokens(500, "sp_test_", 20).tolist()
+    candidates = []
+    for token in tokens:
+        candidates.append(token)
+        chars = list(token)
+        chars[rng.randrange(len(chars))] = rng.choice("aZ9_-é ")
+        candidates.append("".join(chars))
+    candidates += ["x_" + token for token in tokens[:100]]
+    rng.shuffle(candidates)
+    for prefix in [None, "sp_live_", "sp_"]:
+        assert validate_many(candidates, prefix) == [validate(c, prefix) for c in candidates]
+    assert sum(validate_many(candidates)) >= len(tokens)
+
+
+def test_cli_token_and_check(tmp_path):
+    """Test the token and check-tokens subcommands."""
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['token', '-n', '5', '--prefix', 'sp_test_'])
+    assert result.exit_code == 0
+    tokens = result.output.split()
+    assert len(tokens) == 5 and all(t.startswith("sp_test_") for t in tokens)
+
+    candidates = tmp_path / "candidates.txt"
+    candidates.write_text("\n".join(tokens + ["sp_test_notatoken00000000000000000000000"]) + "\n")
+    result = runner.invoke(cli.cli, ['check-tokens', str(candidates)])
+    assert result.output.split() == tokens
+    result = runner.invoke(cli.cli, ['check-tokens', str(candidates), '--invalid'])
+    assert result.output.split() == ["sp_test_notatoken00000000000000000000000"]
+    result = runner.invoke(cli.cli, ['check-tokens', '--prefix', 'sp_live_'], input=tokens[0] + "\n")
+    assert result.output == ""
+
+    result = runner.invoke(cli.cli, ['token', '--prefix', 'bad-'])
+    assert result.exit_code == 1
@@ -0,0 +1,167 @@
+import http.server
+import json
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from securepass import cli
+from securepass.pipeline import GeneratorSource, Pipeline
+from securepass.store import SecretStore
+from securepass.vault import VaultKVWriter, VaultSink
+
+TOKEN = "s.test-token"
+
+
+class StandInVault(http.server.ThreadingHTTPServer):
+    """Minimal Vault KV stand-in: stores POSTed secrets and counts connections."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.secrets = {}
+        self.connections = set()
+        self.requests = 0
+        self.fail_next = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            failing = server.fail_next > 0
+            server.fail_next -= failing
+        if self.headers.get("X-Vault-Token") != TOKEN:
+            return self._reply(403, {"errors": ["permission denied"]})
+        if failing:
+            return self._reply(503, {"errors": ["Vault is sealed"]})
+        with server.lock:
+            server.secrets[self.path] = json.loads(body)
+        self._reply(204)
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def vault():
+    server = StandInVault()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_write_kv2_and_kv1(vault):
+    """Test the request paths and bodies of both KV engine versions."""
+    with VaultKVWriter(vault.url, TOKEN) as writer:
+        writer.write("apps/db primary", "s3cr3t")
+        writer.write("apps/api", {"user": "svc", "password": "pw"})
+    with VaultKVWriter(vault.url, TOKEN, mount="/kv/", kv_version=1, key="password") as writer:
+        writer.write("legacy", "old")
+    assert vault.secrets == {
+        "/v1/secret/data/apps/db%20primary": {"data": {"value": "s3cr3t"}},
+        "/v1/secret/data/apps/api": {"data": {"user": "svc", "password": "pw"}},
+        "/v1/kv/legacy": {"password": "old"},
+    }
+
+
+def test_write_many_reuses_pooled_connections(vault):
+    """Test many writes go over at most pool_size keep-alive connections."""
+    pairs = [(f"bulk/{i}", f"secret-{i}") for i in range(500)]
+    with VaultKVWriter(vault.url, TOKEN, pool_size=4) as writer:
+        assert writer.write_many(iter(pairs)) == 500
+    assert len(vault.secrets) == 500
+    assert vault.secrets["/v1/secret/data/bulk/499"] == {"data": {"value": "secret-499"}}
+    assert len(vault.connections) <= 4
+
+
+def test_retries_transient_failures(vault):
+    """Test 503 responses are retried with backoff until the write succeeds."""
+    vault.fail_next = 2
+    with VaultKVWriter(vault.url, TOKEN, backoff=0.001) as writer:
+        writer.write("flaky", "value")
+    assert vault.requests == 3
+    assert "/v1/secret/data/flaky" in vault.secrets
+
+    vault.fail_next = 10
+    with VaultKVWriter(vault.url, TOKEN, retries=2, backoff=0.001) as writer:
+        with pytest.raises(RuntimeError, match="after 3 attempts: HTTP 503 Vault is sealed"):
+            writer.write("down", "value")
+
+
+def test_permanent_failures_are_not_retried(vault):
+    """Test a 403 fails immediately and stops write_many."""
+    with VaultKVWriter(vault.url, "wrong-token", backoff=0.001) as writer:
+        with pytest.raises(RuntimeError, match="403 permission denied"):
+            writer.write_many((f"x/{i}", "v") for i in range(100))
+    assert vault.requests < 100
+
+
+def test_connection_errors_are_retried(vault):
+    """Test an unreachable server is reported after the retries."""
+    url = vault.url
+    vault.shutdown()
+    vault.server_close()
+    with VaultKVWriter(url, TOKEN, retries=1, backoff=0.001) as writer:
+        with pytest.raises(RuntimeError, match="after 2 attempts"):
+            writer.write("x", "v")
+
+
+def test_pipeline_sink(vault):
+    """Test VaultSink numbers batch passwords across chunks."""
+    Pipeline(GeneratorSource(25, chunk_size=10), VaultSink(vault.url, TOKEN, path_prefix="gen/")).run()
+    assert sorted(vault.secrets) == sorted(f"/v1/secret/data/gen/{i}" for i in range(1, 26))
+
+
+def test_invalid_options():
+    """Test invalid URLs and options are rejected."""
+    for kwargs in [{"url": "ftp://vault"}, {"url": "http://"}, {"url": "http://v", "kv_version": 3},
+                   {"url": "http://v", "pool_size": 0}]:
+        with pytest.raises(ValueError):
+            VaultKVWriter(**kwargs)
+
+
+def test_cli_rotate_and_push(vault, tmp_path, monkeypatch):
+    """Test rotate writes rotated secrets to Vault and push re-sends the store."""
+    db = str(tmp_path / "store.db")
+    with SecretStore(db) as store:
+        store.add_many([f"app/{i}" for i in range(30)], interval=1, now=0)
+    monkeypatch.setenv("VAULT_TOKEN", TOKEN)
+    runner = CliRunner()
+    result = runner.invoke(cli.cli, ['rotate', '--store', db, '--chunk-size', '8',
+                                     '--vault-url', vault.url])
+    assert result.exit_code == 0, result.output
+    with SecretStore(db) as store:
+        current = dict(store.items())
+    assert {path: body["data"]["value"] for path, body in vault.secrets.items()} == {
+        f"/v1/secret/data/{name}": secret for name, secret in current.items()}
+
+    vault.secrets.clear()
+    result = runner.invoke(cli.cli, ['push', '--store', db, '--vault-url', vault.url,
+                                     '--vault-mount', 'kv', '--vault-kv-version', '1'])
+    assert result.exit_code == 0
+    assert len(vault.secrets) == 30 and "/v1/kv/app/0" in vault.secrets
+
+    monkeypatch.delenv("VAULT_TOKEN")
+    result = runner.invoke(cli.cli, ['push', '--store', db, '--vault-url', vault.url])
+    assert result.exit_code != 0
+    assert "VAULT_TOKEN" in result.output